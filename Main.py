@@ -1,11 +1,22 @@
 import os
 from nicegui import ui, app
+from starlette.middleware.gzip import GZipMiddleware
+from frontend.assets import register_static_assets
+from frontend.api import register_api_routes
+from frontend.habitat_viewer_3d import register_model_files
+from frontend.thumbnails import register_thumbnail_files
 
 # --- Global Configuration (no UI creation at import) ---
 def configure_app():
     """Sets up global configuration and styling for NiceGUI at startup."""
     # 1. Set up paths for static files (e.g., NASA logo)
     app.add_static_files('/Images', 'frontend/pages/Images')
+    # Shared CSS/JS under fingerprinted, long-cached URLs
+    register_static_assets()
+    # Exported GLB models for the 3D view
+    register_model_files()
+    # Top-view thumbnails of stored layouts, drawn in the background as jobs finish
+    register_thumbnail_files()
     # 2. Enable dark mode (executed on startup, not at import)
     ui.dark_mode().enable()
 
@@ -17,7 +28,8 @@ def define_routes():
     # Import pages inside the startup handler to avoid global UI creation
     from frontend.pages.page_1_landing import landing_page
     from frontend.pages.page_2_params import params_page
-    from frontend.pages.page_3_result import result_page  # Import the result page
+    from frontend.pages.page_3_result import ResultPage  # One instance per page visit
+    from frontend.pages.page_5_gallery import gallery_page
 
     @ui.page('/')
     def index():
@@ -32,12 +44,22 @@ def define_routes():
 
     @ui.page('/result')
     def result_page_route():
-        """Renders the final design and visualization page."""
+        """Renders the most recent stored layout."""
+        ResultPage()()
+
+    @ui.page('/result/{job_id}')
+    def job_result_page_route(job_id: str):
+        """Renders the layout produced by a generation job, with a preview while it runs."""
         parameters = app.storage.user.get('parameters')  # Retrieve parameters from session
-        if parameters:
-            result_page(parameters)  # Pass parameters to result_page
-        else:
-            ui.label("Error: No parameters found. Please go back and enter them.").classes('text-red-500')
+        ResultPage()(parameters, job_id=job_id)
+
+    @ui.page('/gallery')
+    def gallery_route(page: int = 1):
+        """Renders thumbnails of the stored layouts, newest first."""
+        gallery_page(page)
+
+    # JSON endpoints for job submission/status and server health
+    register_api_routes()
 
 
 # --- Run the App ---
@@ -46,6 +68,9 @@ if __name__ in {"__main__", "__mp_main__"}:
     app.on_startup(configure_app)
     app.on_startup(define_routes)
 
+    # Compress responses (static assets included); middleware must be added before startup
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+
     # Add a storage_secret for user storage
     storage_secret = os.urandom(32).hex()
     ui.run(title="Artemis Habitat Blueprint", reload=True, storage_secret=storage_secret)
\ No newline at end of file
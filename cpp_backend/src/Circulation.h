@@ -0,0 +1,499 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <limits>
+#include <vector>
+#include "Geometry.h"
+
+namespace Circulation {
+
+    constexpr float DEFAULT_CELL_SIZE = 0.25f; // meters
+    // Half the shoulder width of a crew member: a cell is walkable when its horizontal
+    // clearance to the nearest module or wall is at least this.
+    constexpr float CREW_HALF_WIDTH = 0.3f;    // meters
+    // Doors span this height from the module's floor.
+    constexpr float DOOR_HEIGHT = 2.0f;        // meters
+    // Decks are this far apart from the habitat's floor up, as organize_into_levels (main.cpp) splits it.
+    constexpr float LEVEL_HEIGHT = 2.5f;       // meters
+    // A crew member standing on a deck reaches the cells this far above it.
+    constexpr float CREW_HEIGHT = 1.8f;        // meters
+    // How far the egress point may be from the nearest walkable cell before it counts as blocked.
+    constexpr float EGRESS_SNAP_DISTANCE = 1.0f;
+    // Cells at either end of a route that are left out of its corridor width: the spot in front
+    // of a door or the hatch is next to a wall by construction and says nothing about the corridor.
+    constexpr int APPROACH_CELLS = 3;
+    constexpr int UNREACHED = -1;
+    // Ways a crew member can be in a cell (crewAccess)
+    constexpr uint8_t STAND = 1;
+    constexpr uint8_t CLIMB = 2;
+
+    /**
+     * @brief A voxel grid over the habitat recording how many modules cover each cell.
+     * With a radius, cells whose centre lies outside the habitat cylinder are walls.
+     */
+    class OccupancyGrid {
+    public:
+        OccupancyGrid(const glm::vec3& bounds_min, const glm::vec3& bounds_max,
+                      float cell_size = DEFAULT_CELL_SIZE, float radius = 0.0f)
+            : origin_(bounds_min), cell_size_(cell_size) {
+            const glm::vec3 extent = bounds_max - bounds_min;
+            nx_ = std::max(1, static_cast<int>(std::ceil(extent.x / cell_size)));
+            ny_ = std::max(1, static_cast<int>(std::ceil(extent.y / cell_size)));
+            nz_ = std::max(1, static_cast<int>(std::ceil(extent.z / cell_size)));
+            occupancy_.assign(cellCount(), 0);
+            wall_.assign(cellCount(), 0);
+            if (radius > 0.0f) {
+                for (int y = 0; y < ny_; ++y) {
+                    for (int x = 0; x < nx_; ++x) {
+                        const glm::vec3 c = cellCenter(x, y, 0);
+                        if (c.x * c.x + c.y * c.y > radius * radius) {
+                            for (int z = 0; z < nz_; ++z) {
+                                wall_[index(x, y, z)] = 1;
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+        size_t cellCount() const { return static_cast<size_t>(nx_) * ny_ * nz_; }
+        int nx() const { return nx_; }
+        int ny() const { return ny_; }
+        int nz() const { return nz_; }
+        float cellSize() const { return cell_size_; }
+
+        size_t index(int x, int y, int z) const {
+            return (static_cast<size_t>(z) * ny_ + y) * nx_ + x;
+        }
+
+        glm::vec3 cellCenter(int x, int y, int z) const {
+            return origin_ + (glm::vec3(x, y, z) + 0.5f) * cell_size_;
+        }
+
+        // Whether two cells lie in the same z slice
+        bool sameSlice(size_t a, size_t b) const {
+            const size_t stride_z = static_cast<size_t>(nx_) * ny_;
+            return a / stride_z == b / stride_z;
+        }
+
+        glm::vec3 cellCenter(size_t cell) const {
+            const int x = static_cast<int>(cell % nx_);
+            const int y = static_cast<int>((cell / nx_) % ny_);
+            const int z = static_cast<int>(cell / (static_cast<size_t>(nx_) * ny_));
+            return cellCenter(x, y, z);
+        }
+
+        // Returns the cell containing `point`, or false if it lies outside the grid.
+        bool cellAt(const glm::vec3& point, size_t& cell) const {
+            const glm::vec3 local = (point - origin_) / cell_size_;
+            const int x = static_cast<int>(std::floor(local.x));
+            const int y = static_cast<int>(std::floor(local.y));
+            const int z = static_cast<int>(std::floor(local.z));
+            if (x < 0 || y < 0 || z < 0 || x >= nx_ || y >= ny_ || z >= nz_) {
+                return false;
+            }
+            cell = index(x, y, z);
+            return true;
+        }
+
+        // Calls fn(neighbour) for each face-adjacent cell inside the grid.
+        template <typename Fn>
+        void forEachNeighbour(size_t cell, Fn fn) const {
+            const size_t stride_y = nx_;
+            const size_t stride_z = static_cast<size_t>(nx_) * ny_;
+            const int x = static_cast<int>(cell % nx_);
+            const int y = static_cast<int>((cell / nx_) % ny_);
+            const int z = static_cast<int>(cell / stride_z);
+            if (x > 0) fn(cell - 1);
+            if (x < nx_ - 1) fn(cell + 1);
+            if (y > 0) fn(cell - stride_y);
+            if (y < ny_ - 1) fn(cell + stride_y);
+            if (z > 0) fn(cell - stride_z);
+            if (z < nz_ - 1) fn(cell + stride_z);
+        }
+
+        bool isFree(size_t cell) const {
+            return occupancy_[cell] == 0 && wall_[cell] == 0;
+        }
+
+        float freeVolume() const {
+            size_t free_cells = 0;
+            for (size_t cell = 0; cell < cellCount(); ++cell) {
+                free_cells += isFree(cell);
+            }
+            return free_cells * cell_size_ * cell_size_ * cell_size_;
+        }
+
+        // Rasterizes every module of a layout, replacing whatever the grid held before.
+        void build(const std::vector<HabitatObject>& layout) {
+            std::fill(occupancy_.begin(), occupancy_.end(), 0);
+            for (const HabitatObject& obj : layout) {
+                rasterize(obj);
+            }
+        }
+
+    private:
+        // Marks the cells whose centres lie inside the module's (yawed) box.
+        void rasterize(const HabitatObject& obj) {
+            const glm::vec3 half = obj.scale / 2.0f;
+            const glm::vec3 reach = yawedHalfExtents(half, glm::radians(obj.rotation_degrees.z));
+            const glm::ivec3 lo = glm::max(glm::ivec3(glm::floor((obj.position - reach - origin_) / cell_size_)), glm::ivec3(0));
+            const glm::ivec3 hi = glm::min(glm::ivec3(glm::ceil((obj.position + reach - origin_) / cell_size_)),
+                                           glm::ivec3(nx_, ny_, nz_));
+            const float c = std::cos(glm::radians(obj.rotation_degrees.z));
+            const float s = std::sin(glm::radians(obj.rotation_degrees.z));
+
+            for (int z = lo.z; z < hi.z; ++z) {
+                for (int y = lo.y; y < hi.y; ++y) {
+                    for (int x = lo.x; x < hi.x; ++x) {
+                        const glm::vec3 d = cellCenter(x, y, z) - obj.position;
+                        // Into the module's own frame: rotate by -yaw about z
+                        const float local_x = c * d.x + s * d.y;
+                        const float local_y = -s * d.x + c * d.y;
+                        if (std::fabs(local_x) <= half.x && std::fabs(local_y) <= half.y && std::fabs(d.z) <= half.z) {
+                            const size_t cell = index(x, y, z);
+                            if (occupancy_[cell] < std::numeric_limits<uint8_t>::max()) {
+                                ++occupancy_[cell];
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+        glm::vec3 origin_;
+        float cell_size_;
+        int nx_, ny_, nz_;
+        std::vector<uint8_t> occupancy_; // Number of modules covering each cell
+        std::vector<uint8_t> wall_;      // Cells outside the habitat cylinder
+    };
+
+    // How one module connects to the rest of the habitat.
+    struct ModuleAccess {
+        bool reachable = false;             // A walkable route joins the module's door to the egress point
+        float egress_distance = -1.0f;      // Walking distance from the door to the egress point, meters
+        float corridor_width = -1.0f;       // Narrowest horizontal width along that route, meters
+        std::vector<uint32_t> door_cells;   // Walkable cells in front of the door
+    };
+
+    struct CirculationReport {
+        std::vector<ModuleAccess> modules;
+        std::vector<std::vector<float>> walking_distances; // Door to door, meters; -1 if unreachable
+        std::vector<int> unreachable_modules;
+        glm::vec3 egress_point;
+        bool egress_reachable = false;      // Whether a walkable cell lies near the egress point
+        float free_volume = 0.0f;           // m³ not covered by modules
+        float walkable_volume = 0.0f;       // m³ with enough clearance for a crew member
+        float min_corridor_width = -1.0f;   // Narrowest width over all egress routes, meters
+    };
+
+    /**
+     * @brief Horizontal clearance of every cell, in cells: 0 for occupied cells and walls, otherwise
+     * the chessboard distance to the nearest blocked cell in the same z slice. The grid's edge
+     * counts as blocked. Computed by one multi-source BFS per slice.
+     */
+    inline std::vector<int> horizontalClearance(const OccupancyGrid& grid) {
+        const int nx = grid.nx(), ny = grid.ny(), nz = grid.nz();
+        std::vector<int> clearance(grid.cellCount(), UNREACHED);
+        std::vector<uint32_t> queue;
+        queue.reserve(static_cast<size_t>(nx) * ny);
+
+        for (int z = 0; z < nz; ++z) {
+            queue.clear();
+            // Blocked cells first, then free cells on the grid's edge, keeps the queue ordered by distance
+            for (int pass = 0; pass < 2; ++pass) {
+                for (int y = 0; y < ny; ++y) {
+                    for (int x = 0; x < nx; ++x) {
+                        const size_t cell = grid.index(x, y, z);
+                        const bool edge = x == 0 || y == 0 || x == nx - 1 || y == ny - 1;
+                        if (pass == 0 && !grid.isFree(cell)) {
+                            clearance[cell] = 0;
+                            queue.push_back(static_cast<uint32_t>(cell));
+                        } else if (pass == 1 && edge && clearance[cell] == UNREACHED) {
+                            clearance[cell] = 1;
+                            queue.push_back(static_cast<uint32_t>(cell));
+                        }
+                    }
+                }
+            }
+            for (size_t head = 0; head < queue.size(); ++head) {
+                const size_t cell = queue[head];
+                const int x = static_cast<int>(cell % nx);
+                const int y = static_cast<int>((cell / nx) % ny);
+                for (int dy = -1; dy <= 1; ++dy) {
+                    for (int dx = -1; dx <= 1; ++dx) {
+                        const int px = x + dx, py = y + dy;
+                        if (px < 0 || py < 0 || px >= nx || py >= ny) {
+                            continue;
+                        }
+                        const size_t next = grid.index(px, py, z);
+                        if (clearance[next] == UNREACHED) {
+                            clearance[next] = clearance[cell] + 1;
+                            queue.push_back(static_cast<uint32_t>(next));
+                        }
+                    }
+                }
+            }
+        }
+        return clearance;
+    }
+
+    /**
+     * @brief How a crew member can be in each cell, as STAND and CLIMB bits. STAND: the cell is free
+     * and less than CREW_HEIGHT above a deck, with only free cells in between (a module standing on
+     * the deck is no floor). CLIMB: the cell's column is free from the deck below it to the next one,
+     * so a hatch and ladder fit there. Decks are LEVEL_HEIGHT apart from the grid's floor up; a
+     * deck belongs to the lowest cell whose top is above it.
+     */
+    inline std::vector<uint8_t> crewAccess(const OccupancyGrid& grid) {
+        const float cell_size = grid.cellSize();
+        const float epsilon = cell_size * 1e-3f;
+        // Index of the deck at or below a height over the grid's floor
+        auto deckBelow = [](float height) { return static_cast<int>(std::floor(height / LEVEL_HEIGHT)); };
+
+        std::vector<uint8_t> access(grid.cellCount(), 0);
+        for (int y = 0; y < grid.ny(); ++y) {
+            for (int x = 0; x < grid.nx(); ++x) {
+                bool on_deck = false;
+                float deck_height = 0.0f;
+                int level_start = 0;     // First cell above the current deck
+                bool level_free = true;  // Whether every cell from level_start up is free
+                for (int z = 0; z <= grid.nz(); ++z) {
+                    const float bottom = z * cell_size;
+                    const int deck = deckBelow(bottom + cell_size - epsilon);
+                    const bool new_deck = z == grid.nz() || deck > deckBelow(bottom - epsilon);
+                    if (new_deck) {
+                        // Close the level below: a free column is a shaft to climb
+                        for (int k = level_start; level_free && k < z; ++k) {
+                            access[grid.index(x, y, k)] |= CLIMB;
+                        }
+                        if (z == grid.nz()) {
+                            break;
+                        }
+                        on_deck = true;
+                        deck_height = deck * LEVEL_HEIGHT;
+                        level_start = z;
+                        level_free = true;
+                    }
+                    const size_t cell = grid.index(x, y, z);
+                    if (!grid.isFree(cell)) {
+                        on_deck = false;
+                        level_free = false;
+                    } else if (on_deck && bottom - deck_height < CREW_HEIGHT) {
+                        access[cell] |= STAND;
+                    }
+                }
+            }
+        }
+        return access;
+    }
+
+    // Whether a crew member can step between two face-adjacent cells: across a deck standing on
+    // it, up and down only on a ladder.
+    inline bool canStep(const OccupancyGrid& grid, const std::vector<uint8_t>& walkable, size_t from, size_t to) {
+        const uint8_t mode = grid.sameSlice(from, to) ? STAND : CLIMB;
+        return (walkable[from] & mode) && (walkable[to] & mode);
+    }
+
+    // Width of the free passage through a cell with the given clearance, meters.
+    inline float passageWidth(int clearance, float cell_size) {
+        return (2 * clearance - 1) * cell_size;
+    }
+
+    /**
+     * @brief Walking distance, in cells, from a set of source cells to every walkable cell.
+     * Breadth-first over the steps canStep allows between walkable cells; others stay UNREACHED.
+     */
+    inline std::vector<int> walkingDistances(const OccupancyGrid& grid, const std::vector<uint8_t>& walkable,
+                                             const std::vector<uint32_t>& sources) {
+        std::vector<int> distance(grid.cellCount(), UNREACHED);
+        std::vector<uint32_t> queue;
+        for (uint32_t cell : sources) {
+            if ((walkable[cell] & STAND) && distance[cell] == UNREACHED) {
+                distance[cell] = 0;
+                queue.push_back(cell);
+            }
+        }
+        for (size_t head = 0; head < queue.size(); ++head) {
+            const size_t cell = queue[head];
+            grid.forEachNeighbour(cell, [&](size_t next) {
+                if (distance[next] == UNREACHED && canStep(grid, walkable, cell, next)) {
+                    distance[next] = distance[cell] + 1;
+                    queue.push_back(static_cast<uint32_t>(next));
+                }
+            });
+        }
+        return distance;
+    }
+
+    /**
+     * @brief The walkable cells where a crew member stands in front of a module's door.
+     * A door spans a vertical face's width and DOOR_HEIGHT from the module's floor. It goes on the
+     * face turned most towards the habitat axis (modules line the wall and open inwards) unless
+     * neighbouring modules leave no room to stand there, or (given the walking distances to the
+     * egress) no way out from there; then on the next face in that order that has. Compact layouts
+     * pack modules around the axis, so the inward face is often blocked while another one is open.
+     */
+    inline std::vector<uint32_t> doorCells(const OccupancyGrid& grid, const std::vector<uint8_t>& walkable,
+                                           const HabitatObject& obj, const std::vector<int>* to_egress = nullptr) {
+        const float yaw = glm::radians(obj.rotation_degrees.z);
+        const glm::vec2 local_x(std::cos(yaw), std::sin(yaw));
+        const glm::vec2 local_y(-local_x.y, local_x.x);
+        const glm::vec2 half(obj.scale.x / 2.0f, obj.scale.y / 2.0f);
+
+        glm::vec2 inward(-obj.position.x, -obj.position.y);
+        if (glm::length(inward) < 1e-3f) {
+            inward = local_x; // A module on the axis opens along its own x axis
+        }
+        // Candidate faces: outward normal, half width of the face, distance of the face from the centre
+        const glm::vec2 normals[4] = {local_x, -local_x, local_y, -local_y};
+        const glm::vec2 along[4] = {local_y, local_y, local_x, local_x};
+        const float face_half_width[4] = {half.y, half.y, half.x, half.x};
+        const float face_offset[4] = {half.x, half.x, half.y, half.y};
+        int faces[4] = {0, 1, 2, 3};
+        std::stable_sort(faces, faces + 4, [&](int a, int b) {
+            return glm::dot(normals[a], inward) > glm::dot(normals[b], inward);
+        });
+
+        const float step = grid.cellSize();
+        const float floor_z = obj.position.z - obj.scale.z / 2.0f;
+        const float door_top = floor_z + std::min(DOOR_HEIGHT, obj.scale.z);
+        std::vector<uint32_t> fallback; // The first face with room to stand, if none leads out
+        for (int face : faces) {
+            std::vector<uint32_t> cells;
+            // Stand far enough out for the crew member's shoulders to clear the face
+            const float standoff = face_offset[face] + CREW_HALF_WIDTH + step;
+            const glm::vec2 center = glm::vec2(obj.position) + normals[face] * standoff;
+            for (float t = -face_half_width[face]; t <= face_half_width[face]; t += step) {
+                const glm::vec2 p = center + along[face] * t;
+                for (float z = floor_z + step / 2.0f; z < door_top; z += step) {
+                    size_t cell;
+                    if (grid.cellAt(glm::vec3(p, z), cell) && (walkable[cell] & STAND) &&
+                        std::find(cells.begin(), cells.end(), cell) == cells.end()) {
+                        cells.push_back(static_cast<uint32_t>(cell));
+                    }
+                }
+            }
+            const bool leads_out = !to_egress || std::any_of(cells.begin(), cells.end(), [&](uint32_t cell) {
+                return (*to_egress)[cell] != UNREACHED;
+            });
+            if (!cells.empty() && leads_out) {
+                return cells;
+            }
+            if (fallback.empty()) {
+                fallback = std::move(cells);
+            }
+        }
+        return fallback;
+    }
+
+    /**
+     * @brief Analyzes how crew move between the modules of a layout and out through the egress point.
+     * Walkable cells are cells a crew member can stand or climb in (crewAccess) with at least
+     * CREW_HALF_WIDTH of horizontal clearance: routes keep to the decks and change levels up
+     * ladders through free columns, never across open air. Distances are grid (Manhattan) walking
+     * distances, so they slightly overestimate diagonal routes.
+     * @param grid An occupancy grid already built from `layout`.
+     */
+    inline CirculationReport analyzeCirculation(const OccupancyGrid& grid, const std::vector<HabitatObject>& layout,
+                                                const glm::vec3& egress_point) {
+        const float cell_size = grid.cellSize();
+        const float cell_volume = cell_size * cell_size * cell_size;
+        const std::vector<int> clearance = horizontalClearance(grid);
+        const std::vector<uint8_t> access = crewAccess(grid);
+
+        CirculationReport report;
+        report.egress_point = egress_point;
+        std::vector<uint8_t> walkable(grid.cellCount(), 0);
+        for (size_t cell = 0; cell < grid.cellCount(); ++cell) {
+            report.free_volume += grid.isFree(cell) * cell_volume;
+            walkable[cell] = (clearance[cell] - 0.5f) * cell_size >= CREW_HALF_WIDTH ? access[cell] : 0;
+            report.walkable_volume += (walkable[cell] != 0) * cell_volume;
+        }
+
+        // The egress is the cell to stand in nearest to the requested point
+        std::vector<uint32_t> egress_cells;
+        float best = EGRESS_SNAP_DISTANCE;
+        for (size_t cell = 0; cell < grid.cellCount(); ++cell) {
+            if (walkable[cell] & STAND) {
+                const float d = glm::distance(grid.cellCenter(cell), egress_point);
+                if (d <= best) {
+                    best = d;
+                    egress_cells.assign(1, static_cast<uint32_t>(cell));
+                }
+            }
+        }
+        report.egress_reachable = !egress_cells.empty();
+        const std::vector<int> to_egress = walkingDistances(grid, walkable, egress_cells);
+
+        const size_t count = layout.size();
+        report.modules.resize(count);
+        for (size_t i = 0; i < count; ++i) {
+            ModuleAccess& access = report.modules[i];
+            access.door_cells = doorCells(grid, walkable, layout[i], &to_egress);
+
+            uint32_t nearest = 0;
+            int steps = std::numeric_limits<int>::max();
+            for (uint32_t cell : access.door_cells) {
+                if (to_egress[cell] != UNREACHED && to_egress[cell] < steps) {
+                    steps = to_egress[cell];
+                    nearest = cell;
+                }
+            }
+            access.reachable = steps != std::numeric_limits<int>::max();
+            if (!access.reachable) {
+                report.unreachable_modules.push_back(static_cast<int>(i));
+                continue;
+            }
+            access.egress_distance = steps * cell_size;
+
+            // Walk back down the distance field, preferring the roomiest of the equally short steps
+            std::vector<int> route{clearance[nearest]};
+            size_t cell = nearest;
+            while (to_egress[cell] > 0) {
+                size_t next = cell;
+                grid.forEachNeighbour(cell, [&](size_t candidate) {
+                    if (to_egress[candidate] == to_egress[cell] - 1 && canStep(grid, walkable, cell, candidate) &&
+                        (next == cell || clearance[candidate] > clearance[next])) {
+                        next = candidate;
+                    }
+                });
+                cell = next;
+                route.push_back(clearance[cell]);
+            }
+            auto first = route.begin(), last = route.end();
+            if (route.size() > 2 * APPROACH_CELLS) {
+                first += APPROACH_CELLS;
+                last -= APPROACH_CELLS;
+            }
+            access.corridor_width = passageWidth(*std::min_element(first, last), cell_size);
+            if (report.min_corridor_width < 0.0f || access.corridor_width < report.min_corridor_width) {
+                report.min_corridor_width = access.corridor_width;
+            }
+        }
+
+        // Door-to-door walking distances, one BFS per module
+        report.walking_distances.assign(count, std::vector<float>(count, -1.0f));
+        for (size_t i = 0; i < count; ++i) {
+            report.walking_distances[i][i] = 0.0f;
+            if (report.modules[i].door_cells.empty()) {
+                continue;
+            }
+            const std::vector<int> from_door = walkingDistances(grid, walkable, report.modules[i].door_cells);
+            for (size_t j = i + 1; j < count; ++j) {
+                int steps = UNREACHED;
+                for (uint32_t cell : report.modules[j].door_cells) {
+                    if (from_door[cell] != UNREACHED && (steps == UNREACHED || from_door[cell] < steps)) {
+                        steps = from_door[cell];
+                    }
+                }
+                if (steps != UNREACHED) {
+                    report.walking_distances[i][j] = report.walking_distances[j][i] = steps * cell_size;
+                }
+            }
+        }
+        return report;
+    }
+}
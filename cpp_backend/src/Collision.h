@@ -1,28 +1,198 @@
 #pragma once
 
+#include <algorithm>
+#include <cmath>
+#include <vector>
 #include "Geometry.h"
 
 namespace Collision {
 
+    /**
+     * @brief Checks whether two axis-aligned boxes, given by their corners, overlap.
+     * This is the form used by the optimizer, which keeps its AABBs in contiguous arrays.
+     * @return True if the boxes overlap, false otherwise.
+     */
+    inline bool checkAABBOverlap(const glm::vec3& aMin, const glm::vec3& aMax,
+                                 const glm::vec3& bMin, const glm::vec3& bMax) {
+        bool overlapX = aMin.x <= bMax.x && aMax.x >= bMin.x;
+        bool overlapY = aMin.y <= bMax.y && aMax.y >= bMin.y;
+        bool overlapZ = aMin.z <= bMax.z && aMax.z >= bMin.z;
+
+        return overlapX && overlapY && overlapZ;
+    }
+
+    /**
+     * @brief Calculates the volume of overlap between two axis-aligned boxes.
+     * @return The volume of overlap in cubic meters, or 0 if no overlap.
+     */
+    inline float calculateAABBOverlapVolume(const glm::vec3& aMin, const glm::vec3& aMax,
+                                            const glm::vec3& bMin, const glm::vec3& bMax) {
+        if (!checkAABBOverlap(aMin, aMax, bMin, bMax)) {
+            return 0.0f;
+        }
+
+        // Calculate overlap dimensions
+        float xOverlap = std::min(aMax.x, bMax.x) - std::max(aMin.x, bMin.x);
+        float yOverlap = std::min(aMax.y, bMax.y) - std::max(aMin.y, bMin.y);
+        float zOverlap = std::min(aMax.z, bMax.z) - std::max(aMin.z, bMin.z);
+
+        // Calculate overlap volume
+        return xOverlap * yOverlap * zOverlap;
+    }
+
+    // Yaws below this (in radians) are treated as axis-aligned, so unrotated pairs keep the exact AABB test
+    constexpr float AXIS_ALIGNED_EPSILON = 1e-4f;
+    // Overlaps below this volume (one cubic centimetre, in m^3) are boxes touching up to float error
+    constexpr float CONTACT_VOLUME_EPSILON = 1e-6f;
+
+    // A box that stands upright and is rotated about the vertical (z) axis only. Modules never tilt,
+    // so yaw is their one rotational degree of freedom and the box test splits into a 2D
+    // oriented rectangle in the floor plane plus a z interval.
+    struct OrientedBox {
+        glm::vec2 center;
+        glm::vec2 axes[2];         // Unit local x and y axes in the floor plane
+        glm::vec2 half_extents;    // Half length and half width along those axes
+        float min_z;
+        float max_z;
+    };
+
+    inline OrientedBox makeOrientedBox(const glm::vec3& position, const glm::vec3& half_extents, float yaw) {
+        const float c = std::cos(yaw);
+        const float s = std::sin(yaw);
+        OrientedBox box;
+        box.center = glm::vec2(position.x, position.y);
+        box.axes[0] = glm::vec2(c, s);
+        box.axes[1] = glm::vec2(-s, c);
+        box.half_extents = glm::vec2(half_extents.x, half_extents.y);
+        box.min_z = position.z - half_extents.z;
+        box.max_z = position.z + half_extents.z;
+        return box;
+    }
+
+    // Radius of a box's projection onto an axis
+    inline float projectedRadius(const OrientedBox& box, const glm::vec2& axis) {
+        return box.half_extents.x * std::fabs(glm::dot(box.axes[0], axis)) +
+               box.half_extents.y * std::fabs(glm::dot(box.axes[1], axis));
+    }
+
+    /**
+     * @brief Separating Axis Theorem test for two upright oriented boxes.
+     * Besides the vertical axis, only the two face normals of each box can separate them.
+     * @return True if the boxes overlap, false otherwise.
+     */
+    inline bool checkOBBOverlap(const OrientedBox& a, const OrientedBox& b) {
+        if (a.max_z < b.min_z || b.max_z < a.min_z) {
+            return false;
+        }
+        const glm::vec2 offset = b.center - a.center;
+        const glm::vec2* axes[4] = {&a.axes[0], &a.axes[1], &b.axes[0], &b.axes[1]};
+        for (const glm::vec2* axis : axes) {
+            if (std::fabs(glm::dot(offset, *axis)) > projectedRadius(a, *axis) + projectedRadius(b, *axis)) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    /**
+     * @brief Calculates the volume of overlap between two upright oriented boxes.
+     * The floor-plane intersection is found by clipping one rectangle against the other
+     * (Sutherland-Hodgman), which is exact for convex shapes, and multiplied by the z overlap.
+     * @return The volume of overlap in cubic meters, or 0 if no overlap.
+     */
+    inline float calculateOBBOverlapVolume(const OrientedBox& a, const OrientedBox& b) {
+        if (!checkOBBOverlap(a, b)) {
+            return 0.0f;
+        }
+        const float zOverlap = std::min(a.max_z, b.max_z) - std::max(a.min_z, b.min_z);
+
+        // Clipping a quad by four half-planes adds at most one vertex per plane
+        glm::vec2 polygon[8];
+        glm::vec2 clipped[8];
+        const glm::vec2 ex = a.half_extents.x * a.axes[0];
+        const glm::vec2 ey = a.half_extents.y * a.axes[1];
+        polygon[0] = a.center - ex - ey;
+        polygon[1] = a.center + ex - ey;
+        polygon[2] = a.center + ex + ey;
+        polygon[3] = a.center - ex + ey;
+        size_t count = 4;
+
+        // Keep the part of the polygon with |dot(p - b.center, axis)| <= extent on both of b's axes
+        for (int k = 0; k < 2 && count > 0; ++k) {
+            for (float side : {1.0f, -1.0f}) {
+                const glm::vec2 normal = side * b.axes[k];
+                const float limit = glm::dot(b.center, normal) + b.half_extents[k];
+                size_t clipped_count = 0;
+                for (size_t i = 0; i < count; ++i) {
+                    const glm::vec2& p = polygon[i];
+                    const glm::vec2& q = polygon[(i + 1) % count];
+                    const float dp = glm::dot(p, normal) - limit;
+                    const float dq = glm::dot(q, normal) - limit;
+                    if (dp <= 0.0f) {
+                        clipped[clipped_count++] = p;
+                    }
+                    if ((dp < 0.0f && dq > 0.0f) || (dp > 0.0f && dq < 0.0f)) {
+                        clipped[clipped_count++] = p + (q - p) * (dp / (dp - dq));
+                    }
+                }
+                std::copy(clipped, clipped + clipped_count, polygon);
+                count = clipped_count;
+            }
+        }
+
+        // Shoelace formula for the area of the clipped polygon
+        float area = 0.0f;
+        for (size_t i = 0; i < count; ++i) {
+            const glm::vec2& p = polygon[i];
+            const glm::vec2& q = polygon[(i + 1) % count];
+            area += p.x * q.y - q.x * p.y;
+        }
+        return std::fabs(area) * 0.5f * zOverlap;
+    }
+
+    /**
+     * @brief Broad phase: calls fn(i, j), with i < j, for every pair of boxes whose AABBs overlap.
+     * Boxes are sorted by their minimum x and swept, so pairs that are far apart along x are
+     * never tested; only the surviving pairs reach the (more expensive) narrow phase.
+     * The sort order is kept in a per-thread scratch buffer, so this does not allocate once warm.
+     */
+    template <typename PairFn>
+    inline void forEachOverlappingPair(const glm::vec3* aabb_min, const glm::vec3* aabb_max, size_t count, PairFn&& fn) {
+        thread_local std::vector<size_t> order;
+        order.resize(count);
+        for (size_t i = 0; i < count; ++i) {
+            order[i] = i;
+        }
+        std::sort(order.begin(), order.end(), [aabb_min](size_t a, size_t b) {
+            return aabb_min[a].x < aabb_min[b].x;
+        });
+
+        for (size_t k = 0; k < count; ++k) {
+            const size_t i = order[k];
+            for (size_t m = k + 1; m < count; ++m) {
+                const size_t j = order[m];
+                if (aabb_min[j].x > aabb_max[i].x) {
+                    break; // Every later box starts even further along x
+                }
+                if (checkAABBOverlap(aabb_min[i], aabb_max[i], aabb_min[j], aabb_max[j])) {
+                    fn(std::min(i, j), std::max(i, j));
+                }
+            }
+        }
+    }
+
     /**
      * @brief Checks for collision between two objects using their Axis-Aligned Bounding Boxes (AABB).
      * This is a fast but less accurate method, suitable for a first-pass or broad-phase check.
-     * For more accuracy with rotated objects, a Separating Axis Theorem (SAT) or GJK algorithm would be needed.
+     * It ignores rotation; use checkOBBCollision for rotated objects.
+     * The boxes are derived from position and scale, so the objects' cached AABBs need not be current.
      * @param a The first habitat object.
      * @param b The second habitat object.
      * @return True if the bounding boxes overlap, false otherwise.
      */
     inline bool checkAABBCollision(const HabitatObject& a, const HabitatObject& b) {
-        // Ensure AABBs are up-to-date before checking
-        // In a real engine, this would be handled more efficiently.
-        const_cast<HabitatObject&>(a).updateAABB();
-        const_cast<HabitatObject&>(b).updateAABB();
-
-        bool overlapX = a.aabb_min.x <= b.aabb_max.x && a.aabb_max.x >= b.aabb_min.x;
-        bool overlapY = a.aabb_min.y <= b.aabb_max.y && a.aabb_max.y >= b.aabb_min.y;
-        bool overlapZ = a.aabb_min.z <= b.aabb_max.z && a.aabb_max.z >= b.aabb_min.z;
-        
-        return overlapX && overlapY && overlapZ;
+        return checkAABBOverlap(a.position - a.scale / 2.0f, a.position + a.scale / 2.0f,
+                                b.position - b.scale / 2.0f, b.position + b.scale / 2.0f);
     }
 
     /**
@@ -44,20 +214,20 @@ namespace Collision {
      * @return The volume of overlap in cubic meters, or 0 if no overlap.
      */
     inline float calculateOverlapVolume(const HabitatObject& a, const HabitatObject& b) {
-        // Ensure AABBs are up-to-date
-        const_cast<HabitatObject&>(a).updateAABB();
-        const_cast<HabitatObject&>(b).updateAABB();
-
-        if (!checkAABBCollision(a, b)) {
-            return 0.0f;
-        }
+        return calculateAABBOverlapVolume(a.position - a.scale / 2.0f, a.position + a.scale / 2.0f,
+                                          b.position - b.scale / 2.0f, b.position + b.scale / 2.0f);
+    }
 
-        // Calculate overlap dimensions
-        float xOverlap = std::min(a.aabb_max.x, b.aabb_max.x) - std::max(a.aabb_min.x, b.aabb_min.x);
-        float yOverlap = std::min(a.aabb_max.y, b.aabb_max.y) - std::max(a.aabb_min.y, b.aabb_min.y);
-        float zOverlap = std::min(a.aabb_max.z, b.aabb_max.z) - std::max(a.aabb_min.z, b.aabb_min.z);
+    inline OrientedBox makeOrientedBox(const HabitatObject& obj) {
+        return makeOrientedBox(obj.position, obj.scale / 2.0f, glm::radians(obj.rotation_degrees.z));
+    }
 
-        // Calculate overlap volume
-        return xOverlap * yOverlap * zOverlap;
+    /**
+     * @brief Checks for collision between two objects using oriented boxes (SAT).
+     * Only the yaw (rotation_degrees.z) is taken into account, since modules stand upright.
+     * @return True if the oriented boxes overlap, false otherwise.
+     */
+    inline bool checkOBBCollision(const HabitatObject& a, const HabitatObject& b) {
+        return checkOBBOverlap(makeOrientedBox(a), makeOrientedBox(b));
     }
 }
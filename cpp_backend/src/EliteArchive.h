@@ -0,0 +1,86 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+#include "Geometry.h"
+#include "ScoreTerms.h"
+#include "ViolationTracker.h"
+
+// A complete layout solution kept for the caller: positions and yaws by module index, plus its score
+// and the unweighted terms it was computed from.
+struct LayoutCandidate {
+    std::vector<glm::vec3> positions;
+    std::vector<float> yaw; // Radians about z
+    double score;
+    ScoreTerms terms;
+    ViolationTracker violations;
+};
+
+/**
+ * @brief Root-mean-square distance between corresponding modules of two layouts, in meters.
+ */
+inline float layoutDistance(const std::vector<glm::vec3>& a, const std::vector<glm::vec3>& b) {
+    if (a.empty()) {
+        return 0.0f;
+    }
+    float sum = 0.0f;
+    for (size_t i = 0; i < a.size(); ++i) {
+        glm::vec3 d = a[i] - b[i];
+        sum += glm::dot(d, d);
+    }
+    return std::sqrt(sum / a.size());
+}
+
+// Keeps the best `capacity` layouts seen so far that are at least `min_distance` apart from
+// each other, so a single optimization run can offer several genuinely different alternatives.
+class EliteArchive {
+private:
+    size_t capacity;
+    float min_distance;
+    std::vector<LayoutCandidate> candidates; // Sorted by descending score
+
+public:
+    EliteArchive(size_t capacity, float min_distance)
+        : capacity(capacity), min_distance(min_distance) {
+        candidates.reserve(capacity + 1);
+    }
+
+    /**
+     * @brief Offers a layout to the archive.
+     * A layout is rejected if a better layout within min_distance is already kept; otherwise it
+     * replaces any worse layouts within min_distance and the archive is trimmed to capacity.
+     */
+    void offer(const std::vector<glm::vec3>& positions, const std::vector<float>& yaw, double score,
+               const ScoreTerms& terms, const ViolationTracker& violations) {
+        if (capacity == 0) {
+            return;
+        }
+        // Cheap rejection: the archive is full and this is worse than everything in it
+        if (candidates.size() == capacity && score <= candidates.back().score) {
+            return;
+        }
+
+        for (const auto& c : candidates) {
+            if (c.score >= score && layoutDistance(c.positions, positions) < min_distance) {
+                return;
+            }
+        }
+
+        candidates.erase(std::remove_if(candidates.begin(), candidates.end(), [&](const LayoutCandidate& c) {
+            return layoutDistance(c.positions, positions) < min_distance;
+        }), candidates.end());
+
+        auto insert_at = std::find_if(candidates.begin(), candidates.end(), [score](const LayoutCandidate& c) {
+            return c.score < score;
+        });
+        candidates.insert(insert_at, LayoutCandidate{positions, yaw, score, terms, violations});
+        if (candidates.size() > capacity) {
+            candidates.pop_back();
+        }
+    }
+
+    const std::vector<LayoutCandidate>& getCandidates() const {
+        return candidates;
+    }
+};
@@ -1,16 +1,26 @@
 #pragma once
 
+#include <algorithm>
 #include <vector>
 #include <numeric>
+#include <cmath>
+#include <glm/gtc/constants.hpp>
 #include "Geometry.h"
 #include "Collision.h"
+#include "Circulation.h"
+#include "LayoutState.h"
+#include "ScoreTerms.h"
 #include "ViolationTracker.h"
 
 namespace Evaluator {
 
+    // Extent of the habitat the modules have to fit in
+    constexpr float HABITAT_RADIUS = 4.5f; // meters
+    constexpr float HABITAT_HEIGHT = 10.0f; // meters
+
     /**
      * @brief Calculates the total habitable volume by subtracting object volumes from a total bounding volume.
-     * This uses a grid-based numerical method.
+     * This rasterizes the layout into a Circulation::OccupancyGrid and counts its free cells.
      * @param layout A vector of all objects in the habitat.
      * @param habitatBoundsMin The minimum corner of the habitat's total volume.
      * @param habitatBoundsMax The maximum corner of the habitat's total volume.
@@ -18,171 +28,219 @@ namespace Evaluator {
      * @return The calculated habitable volume in cubic meters.
      */
     inline float calculateHabitableVolume(const std::vector<HabitatObject>& layout, const glm::vec3& habitatBoundsMin, const glm::vec3& habitatBoundsMax, float gridSize = 0.25f) {
-        float totalVolume = 0.0f;
-        float pointVolume = gridSize * gridSize * gridSize;
-
-        for (float x = habitatBoundsMin.x; x < habitatBoundsMax.x; x += gridSize) {
-            for (float y = habitatBoundsMin.y; y < habitatBoundsMax.y; y += gridSize) {
-                for (float z = habitatBoundsMin.z; z < habitatBoundsMax.z; z += gridSize) {
-                    glm::vec3 point(x, y, z);
-                    bool isInsideObject = false;
-                    for (const auto& obj : layout) {
-                        if (Collision::isPointInside(point, obj)) {
-                            isInsideObject = true;
-                            break;
-                        }
-                    }
-                    if (!isInsideObject) {
-                        totalVolume += pointVolume;
-                    }
-                }
-            }
-        }
-        return totalVolume;
+        Circulation::OccupancyGrid grid(habitatBoundsMin, habitatBoundsMax, gridSize);
+        grid.build(layout);
+        return grid.freeVolume();
     }
 
+    // --- Penalties (negative contributions to score) ---
+
     /**
-     * @brief The main objective function. It calculates a score for a given layout.
-     * Higher scores are better.
-     * @param layout The layout to evaluate.
-     * @param weights A vector of weights for different criteria (e.g., mass, volume).
-     * @return The final score for the layout, including penalties.
+     * @brief 1. Penalty for collisions between objects.
+     * The broad phase only hands over pairs whose (yaw-enclosing) AABBs overlap. Pairs of
+     * unrotated modules are exact at that point; anything rotated goes through the SAT test.
      */
-    inline double evaluateLayout(const std::vector<HabitatObject>& layout, const std::vector<double>& weights, ViolationTracker* tracker = nullptr) {
-        double score = 0.0;
-
-        // Clear previous violations if tracker is provided
-        if (tracker) {
-            tracker->clear();
-        }
-
-        // --- Penalties (negative contributions to score) ---
-
-        // 1. Penalty for collisions between objects
+    inline double collisionPenalty(const LayoutView& state, const ModuleTable& modules, ViolationTracker* tracker = nullptr) {
         double collision_penalty = 0.0;
-        for (size_t i = 0; i < layout.size(); ++i) {
-            for (size_t j = i + 1; j < layout.size(); ++j) {
-                if (Collision::checkAABBCollision(layout[i], layout[j])) {
-                    float overlap = Collision::calculateOverlapVolume(layout[i], layout[j]);
-                    float severity = std::min(1.0f, overlap / 2.0f); // Normalize severity
-                    collision_penalty += 2000.0 * severity; // Increased penalty
-                    
-                    if (tracker) {
-                        std::string desc = "Module collision detected with " + 
-                                         std::to_string(overlap) + " m³ overlap";
-                        tracker->addViolation(Violation::Type::COLLISION, i, j, desc, severity);
-                    }
+        auto isAxisAligned = [&state](size_t i) {
+            return state.yaw == nullptr ||
+                   std::fabs(std::remainder(state.yaw[i], glm::half_pi<float>())) < Collision::AXIS_ALIGNED_EPSILON;
+        };
+        Collision::forEachOverlappingPair(state.aabb_min, state.aabb_max, state.size(), [&](size_t i, size_t j) {
+            float overlap;
+            if (isAxisAligned(i) && isAxisAligned(j)) {
+                overlap = Collision::calculateAABBOverlapVolume(state.aabb_min[i], state.aabb_max[i],
+                                                                state.aabb_min[j], state.aabb_max[j]);
+            } else {
+                const Collision::OrientedBox a = Collision::makeOrientedBox(state.positions[i], modules.half_extents[i], state.yaw[i]);
+                const Collision::OrientedBox b = Collision::makeOrientedBox(state.positions[j], modules.half_extents[j], state.yaw[j]);
+                if (!Collision::checkOBBOverlap(a, b)) {
+                    return;
                 }
+                overlap = Collision::calculateOBBOverlapVolume(a, b);
+            }
+            // The overlap tests count touching boxes; a contact is no collision
+            if (overlap <= 0.0f) {
+                return;
+            }
+            float severity = std::min(1.0f, overlap / 2.0f); // Normalize severity
+            collision_penalty += 2000.0 * severity; // Increased penalty
+
+            // Overlaps of float-error size still steer the swarm through the penalty, but are not
+            // reported, so a layout the swarm settled into contact with is not listed as colliding
+            if (tracker && overlap >= Collision::CONTACT_VOLUME_EPSILON) {
+                tracker->addViolation(Violation::Type::COLLISION, static_cast<int>(i), static_cast<int>(j),
+                                      overlap, severity);
+            }
+        });
+        return collision_penalty;
+    }
+
+    /**
+     * @brief Distance from the habitat's axis to the farthest corner of a module's footprint,
+     * the (+-half width, +-half depth) rectangle turned by the module's yaw.
+     */
+    inline float footprintRadius(const glm::vec3& position, const glm::vec3& half_extents, float yaw) {
+        const float cos_yaw = std::cos(yaw);
+        const float sin_yaw = std::sin(yaw);
+        float farthest = 0.0f;
+        for (float sx : {-1.0f, 1.0f}) {
+            for (float sy : {-1.0f, 1.0f}) {
+                const float x = position.x + sx * half_extents.x * cos_yaw - sy * half_extents.y * sin_yaw;
+                const float y = position.y + sx * half_extents.x * sin_yaw + sy * half_extents.y * cos_yaw;
+                farthest = std::max(farthest, x * x + y * y);
             }
         }
+        return std::sqrt(farthest);
+    }
 
-        // 2. Penalty for objects being out of bounds
+    /**
+     * @brief 2. Penalty for objects being out of bounds.
+     * A module is outside the shell as soon as any corner of its (turned) footprint is.
+     */
+    inline double boundsPenalty(const LayoutView& state, const ModuleTable& modules, ViolationTracker* tracker = nullptr) {
         double bounds_penalty = 0.0;
-        const float HABITAT_RADIUS = 4.5f; // meters
-        const float HABITAT_HEIGHT = 10.0f; // meters
         
-        for (size_t i = 0; i < layout.size(); ++i) {
-            const auto& obj = layout[i];
-            float radialDist = sqrt(obj.position.x * obj.position.x + obj.position.y * obj.position.y);
-            float radialViolation = radialDist + obj.scale.x / 2.0f - HABITAT_RADIUS;
+        for (size_t i = 0; i < state.size(); ++i) {
+            const glm::vec3& position = state.positions[i];
+            const float yaw = state.yaw ? state.yaw[i] : 0.0f;
+            float radialViolation = footprintRadius(position, modules.half_extents[i], yaw) - HABITAT_RADIUS;
             
             if (radialViolation > 0) {
                 float severity = std::min(1.0f, radialViolation / 2.0f);
                 bounds_penalty += 1000.0 * severity;
                 
                 if (tracker) {
-                    std::string desc = "Module extends beyond habitat radius by " + 
-                                     std::to_string(radialViolation) + " meters";
-                    tracker->addViolation(Violation::Type::BOUNDS, i, -1, desc, severity);
+                    tracker->addViolation(Violation::Type::BOUNDS, static_cast<int>(i), Violation::NO_OBJECT,
+                                          radialViolation, severity, Violation::Bound::RADIUS);
                 }
             }
 
-            if (obj.position.z < 0 || obj.position.z > HABITAT_HEIGHT) {
-                float heightViolation = std::max(-obj.position.z, 
-                                               obj.position.z - HABITAT_HEIGHT);
+            if (position.z < 0 || position.z > HABITAT_HEIGHT) {
+                float heightViolation = std::max(-position.z, 
+                                               position.z - HABITAT_HEIGHT);
                 float severity = std::min(1.0f, heightViolation / 2.0f);
                 bounds_penalty += 1000.0 * severity;
                 
                 if (tracker) {
-                    std::string desc = "Module extends beyond habitat height by " + 
-                                     std::to_string(heightViolation) + " meters";
-                    tracker->addViolation(Violation::Type::BOUNDS, i, -1, desc, severity);
+                    tracker->addViolation(Violation::Type::BOUNDS, static_cast<int>(i), Violation::NO_OBJECT,
+                                          heightViolation, severity, Violation::Bound::HEIGHT);
                 }
             }
         }
+        return bounds_penalty;
+    }
 
-        // 3. Penalty for violating adjacency rules
+    /**
+     * @brief 3. Penalty for violating adjacency rules.
+     * Only the module pairs that a rule of the module catalog applies to are measured; they
+     * were found once, with their minimum distance and penalty, when the ModuleTable was built.
+     */
+    inline double adjacencyPenalty(const LayoutView& state, const ModuleTable& modules, ViolationTracker* tracker = nullptr) {
         double adjacency_penalty = 0.0;
-        const float MIN_CLEAN_DIRTY_DISTANCE = 3.0f; // meters
-        const float MIN_QUIET_NOISY_DISTANCE = 4.0f; // meters
-        
-        for (size_t i = 0; i < layout.size(); ++i) {
-            for (size_t j = i + 1; j < layout.size(); ++j) {
-                const auto& mod1 = layout[i];
-                const auto& mod2 = layout[j];
-
-                float distance = glm::distance(mod1.position, mod2.position);
-
-                // Clean-Dirty violation check
-                if ((mod1.category == ModuleCategory::CLEAN && mod2.category == ModuleCategory::DIRTY) ||
-                    (mod1.category == ModuleCategory::DIRTY && mod2.category == ModuleCategory::CLEAN)) {
-                    
-                    if (distance < MIN_CLEAN_DIRTY_DISTANCE) {
-                        float violation = MIN_CLEAN_DIRTY_DISTANCE - distance;
-                        float severity = std::min(1.0f, violation / MIN_CLEAN_DIRTY_DISTANCE);
-                        adjacency_penalty += 1500.0 * severity;
-                        
-                        if (tracker) {
-                            std::string desc = "Clean and dirty modules too close by " + 
-                                             std::to_string(violation) + " meters";
-                            tracker->addViolation(Violation::Type::ADJACENCY_CLEAN_DIRTY, 
-                                               i, j, desc, severity);
-                        }
-                    }
-                }
+        for (const AdjacencyPair& pair : modules.adjacency_pairs) {
+            const float distance = glm::distance(state.positions[pair.first], state.positions[pair.second]);
+            if (distance < pair.min_distance) {
+                const float violation = pair.min_distance - distance;
+                const float severity = std::min(1.0f, violation / pair.min_distance);
+                adjacency_penalty += pair.penalty * severity;
 
-                // Quiet-Noisy violation check
-                if ((mod1.category == ModuleCategory::QUIET && mod2.category == ModuleCategory::NOISY) ||
-                    (mod1.category == ModuleCategory::NOISY && mod2.category == ModuleCategory::QUIET)) {
-                    
-                    if (distance < MIN_QUIET_NOISY_DISTANCE) {
-                        float violation = MIN_QUIET_NOISY_DISTANCE - distance;
-                        float severity = std::min(1.0f, violation / MIN_QUIET_NOISY_DISTANCE);
-                        adjacency_penalty += 1500.0 * severity;
-                        
-                        if (tracker) {
-                            std::string desc = "Quiet and noisy modules too close by " + 
-                                             std::to_string(violation) + " meters";
-                            tracker->addViolation(Violation::Type::ADJACENCY_QUIET_NOISY, 
-                                               i, j, desc, severity);
-                        }
-                    }
+                if (tracker) {
+                    tracker->addViolation(Violation::Type::ADJACENCY, static_cast<int>(pair.first),
+                                          static_cast<int>(pair.second), violation, severity,
+                                          Violation::Bound::NONE, pair.rule);
                 }
             }
         }
+        return adjacency_penalty;
+    }
 
+    // --- Rewards (positive contributions to score) ---
 
-        // --- Rewards (positive contributions to score) ---
-
-        // 1. Reward for compact layouts (minimize average distance from center)
-        double compactness_reward = 0.0;
+    /**
+     * @brief 1. Reward for compact layouts (minimize average distance from center), in (0, 1].
+     */
+    inline double compactnessReward(const LayoutView& state) {
+        const size_t count = state.size();
         glm::vec3 center(0.0f);
-        for (const auto& obj : layout) {
-            center += obj.position;
+        for (size_t i = 0; i < count; ++i) {
+            center += state.positions[i];
         }
-        center /= layout.size();
+        center /= count;
 
         double avg_dist_from_center = 0.0;
-        for (const auto& obj : layout) {
-            avg_dist_from_center += glm::distance(obj.position, center);
+        for (size_t i = 0; i < count; ++i) {
+            avg_dist_from_center += glm::distance(state.positions[i], center);
+        }
+        avg_dist_from_center /= count;
+        return 1.0 / (1.0 + avg_dist_from_center); // Higher reward for smaller average distance
+    }
+
+    /**
+     * @brief Computes every term of a layout's score, unweighted.
+     * @param state A view of the positions and bounding boxes of the layout to evaluate.
+     * @param modules The immutable per-module data (scales, categories) shared by all layouts.
+     */
+    inline ScoreTerms scoreTerms(const LayoutView& state, const ModuleTable& modules, ViolationTracker* tracker = nullptr) {
+        // Clear previous violations if tracker is provided
+        if (tracker) {
+            tracker->clear();
         }
-        avg_dist_from_center /= layout.size();
-        compactness_reward = 1.0 / (1.0 + avg_dist_from_center); // Higher reward for smaller average distance
 
+        ScoreTerms terms;
+        terms.collision = collisionPenalty(state, modules, tracker);
+        terms.bounds = boundsPenalty(state, modules, tracker);
+        terms.adjacency = adjacencyPenalty(state, modules, tracker);
+        terms.compactness = compactnessReward(state);
+        return terms;
+    }
+
+    /**
+     * @brief The main objective function. It calculates a score for a given layout.
+     * Higher scores are better.
+     * @param state A view of the positions and bounding boxes of the layout to evaluate.
+     * @param modules The immutable per-module data (scales, categories) shared by all layouts.
+     * @param weights Weights of the compactness, collision, bounds and adjacency terms, in that
+     *                order (see ScoreTerms); missing trailing weights are 1.
+     * @return The final score for the layout, including penalties.
+     */
+    inline double evaluateLayout(const LayoutView& state, const ModuleTable& modules, const std::vector<double>& weights, ViolationTracker* tracker = nullptr) {
+        return scoreTerms(state, modules, tracker).weighted(weights);
+    }
+
+    /**
+     * @brief Cheap surrogate for evaluateLayout: the exact score without the collision term.
+     * Every penalty and (valid) weight is non-negative, so this is an upper bound on the real score. A layout whose
+     * bound does not beat a known score cannot beat it after exact evaluation either, so the
+     * (broad plus narrow phase) collision test can be skipped for it.
+     * The tracker receives the bounds and adjacency violations only.
+     */
+    inline double upperBoundScore(const LayoutView& state, const ModuleTable& modules, const std::vector<double>& weights, ViolationTracker* tracker = nullptr) {
+        if (tracker) {
+            tracker->clear();
+        }
+        ScoreTerms terms;
+        terms.bounds = boundsPenalty(state, modules, tracker);
+        terms.adjacency = adjacencyPenalty(state, modules, tracker);
+        terms.compactness = compactnessReward(state);
+        return terms.weighted(weights);
+    }
 
-        // Final Score Calculation
-        score = (compactness_reward * weights[0]) - (collision_penalty + bounds_penalty + adjacency_penalty);
+    /**
+     * @brief Scores a layout held in a LayoutState.
+     */
+    inline double evaluateLayout(const LayoutState& state, const ModuleTable& modules, const std::vector<double>& weights, ViolationTracker* tracker = nullptr) {
+        return evaluateLayout(state.view(), modules, weights, tracker);
+    }
 
-        return score;
+    /**
+     * @brief Convenience overload that scores a layout of full HabitatObjects.
+     * This gathers the layout into structure-of-arrays form first, so it is meant for one-off
+     * evaluations (such as the final result) rather than the optimizer's inner loop.
+     */
+    inline double evaluateLayout(const std::vector<HabitatObject>& layout, const std::vector<double>& weights, ViolationTracker* tracker = nullptr) {
+        const ModuleTable modules = ModuleTable::fromLayout(layout);
+        const LayoutState state = LayoutState::fromLayout(layout, modules);
+        return evaluateLayout(state, modules, weights, tracker);
     }
 }
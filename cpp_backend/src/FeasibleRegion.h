@@ -0,0 +1,130 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <random>
+#include <glm/glm.hpp>
+#include <glm/gtc/constants.hpp>
+#include "Evaluator.h"
+#include "LayoutState.h"
+
+// The region boundsPenalty accepts: module footprints, turned by their yaw, within HABITAT_RADIUS
+// of the axis, at heights between 0 and HABITAT_HEIGHT. Swarms can start inside it, from a
+// low-discrepancy sample, and have modules that leave it put back on its boundary.
+namespace FeasibleRegion {
+
+// Height of one level, as organize_into_levels (main.cpp) splits the habitat
+constexpr float LEVEL_HEIGHT = 2.5f;
+
+// Halton bases of the radius, angle and height within a level
+constexpr uint32_t RADIUS_BASE = 2;
+constexpr uint32_t ANGLE_BASE = 3;
+constexpr uint32_t HEIGHT_BASE = 5;
+
+// The index-th element of the van der Corput sequence in the given base, in [0, 1)
+inline float radicalInverse(uint32_t index, uint32_t base) {
+    const float inverse_base = 1.0f / base;
+    float result = 0.0f;
+    float digit_weight = inverse_base;
+    while (index > 0) {
+        result += (index % base) * digit_weight;
+        index /= base;
+        digit_weight *= inverse_base;
+    }
+    return result;
+}
+
+// Radius a module's center may be at whatever its yaw: every footprint corner lies within the
+// footprint's circumradius of the center
+inline float radialLimit(const ModuleTable& modules, size_t i) {
+    const glm::vec3& half_extents = modules.half_extents[i];
+    return std::max(0.0f, Evaluator::HABITAT_RADIUS - std::hypot(half_extents.x, half_extents.y));
+}
+
+// Attempts to move a module inwards by its footprint's excess before falling back to radialLimit
+constexpr int REPAIR_STEPS = 3;
+
+inline int levelCount() {
+    return std::max(1, static_cast<int>(std::ceil(Evaluator::HABITAT_HEIGHT / LEVEL_HEIGHT)));
+}
+
+/**
+ * @brief Initial module positions from a Halton sequence, uniform over the area of the floor and
+ * stratified by level: module j of particle p starts on level (p + j) mod levelCount(), so every
+ * particle spreads its modules evenly over the levels and every module starts on every level
+ * in some particle. Each swarm shifts the sequence by a random offset (a Cranley-Patterson
+ * rotation), so islands start from different but equally even samples.
+ */
+class HaltonSampler {
+private:
+    float shift[3];
+    uint32_t index = 1; // Index 0 is the origin in every base
+
+public:
+    explicit HaltonSampler(std::mt19937& gen) {
+        std::uniform_real_distribution<float> shift_distr(0.0f, 1.0f);
+        for (float& s : shift) {
+            s = shift_distr(gen);
+        }
+    }
+
+    // Position of module `module` of particle `particle`
+    glm::vec3 sample(const ModuleTable& modules, size_t particle, size_t module) {
+        auto coordinate = [this](uint32_t base, int axis) {
+            const float value = radicalInverse(index, base) + shift[axis];
+            return value - std::floor(value);
+        };
+        const float radius = radialLimit(modules, module) * std::sqrt(coordinate(RADIUS_BASE, 0));
+        const float angle = glm::two_pi<float>() * coordinate(ANGLE_BASE, 1);
+        const int level = static_cast<int>((particle + module) % levelCount());
+        const float z = std::min(Evaluator::HABITAT_HEIGHT, (level + coordinate(HEIGHT_BASE, 2)) * LEVEL_HEIGHT);
+        ++index;
+        return glm::vec3(radius * std::cos(angle), radius * std::sin(angle), z);
+    }
+};
+
+/**
+ * @brief Moves module i back onto the boundary of the feasible region if it left it: radially
+ * towards the axis until its turned footprint fits, and to the nearest allowed height. The part
+ * of the velocity that carried it out is dropped, so the particle does not keep pushing against
+ * the wall.
+ * @return Whether the module had to be moved.
+ */
+inline bool repair(const ModuleTable& modules, size_t i, float yaw, glm::vec3& position, glm::vec3& velocity) {
+    bool repaired = false;
+    const glm::vec3& half_extents = modules.half_extents[i];
+    float excess = Evaluator::footprintRadius(position, half_extents, yaw) - Evaluator::HABITAT_RADIUS;
+    if (excess > 0.0f) {
+        const float radial_distance = std::sqrt(position.x * position.x + position.y * position.y);
+        const glm::vec2 outward = radial_distance > 0.0f
+            ? glm::vec2(position.x / radial_distance, position.y / radial_distance)
+            : glm::vec2(1.0f, 0.0f);
+        // Pulling the center in by the excess brings the farthest corner in by nearly as much
+        float distance = radial_distance;
+        for (int step = 0; step < REPAIR_STEPS && excess > 0.0f; ++step) {
+            distance = std::max(0.0f, distance - excess);
+            position.x = outward.x * distance;
+            position.y = outward.y * distance;
+            excess = Evaluator::footprintRadius(position, half_extents, yaw) - Evaluator::HABITAT_RADIUS;
+        }
+        if (excess > 0.0f) {
+            const float limit = std::min(distance, radialLimit(modules, i));
+            position.x = outward.x * limit;
+            position.y = outward.y * limit;
+        }
+        const float outward_speed = velocity.x * outward.x + velocity.y * outward.y;
+        if (outward_speed > 0.0f) {
+            velocity.x -= outward_speed * outward.x;
+            velocity.y -= outward_speed * outward.y;
+        }
+        repaired = true;
+    }
+    if (position.z < 0.0f || position.z > Evaluator::HABITAT_HEIGHT) {
+        position.z = std::clamp(position.z, 0.0f, Evaluator::HABITAT_HEIGHT);
+        velocity.z = 0.0f;
+        repaired = true;
+    }
+    return repaired;
+}
+}
@@ -2,6 +2,7 @@
 
 #include <vector>
 #include <string>
+#include <cmath>
 
 // For simplicity, we'll assume you have the GLM library for math.
 // You will need to download it and place it in the 'dependencies' folder.
@@ -16,6 +17,45 @@ enum class ModuleCategory {
     QUIET,
     NOISY
 };
+constexpr size_t CATEGORY_COUNT = 5;
+
+// Returns the serialized name of a module category.
+inline const char* categoryName(ModuleCategory category) {
+    switch (category) {
+        case ModuleCategory::CLEAN: return "CLEAN";
+        case ModuleCategory::DIRTY: return "DIRTY";
+        case ModuleCategory::QUIET: return "QUIET";
+        case ModuleCategory::NOISY: return "NOISY";
+        default: return "NEUTRAL";
+    }
+}
+
+// Parses a serialized category name; returns false for unknown names.
+inline bool parseCategory(const std::string& name, ModuleCategory& category) {
+    for (size_t i = 0; i < CATEGORY_COUNT; ++i) {
+        if (name == categoryName(static_cast<ModuleCategory>(i))) {
+            category = static_cast<ModuleCategory>(i);
+            return true;
+        }
+    }
+    return false;
+}
+
+// Parses a serialized category name; unknown names map to NEUTRAL.
+inline ModuleCategory categoryFromName(const std::string& name) {
+    ModuleCategory category = ModuleCategory::NEUTRAL;
+    parseCategory(name, category);
+    return category;
+}
+
+// Half extents of the axis-aligned box that encloses an upright box rotated by `yaw` radians about z.
+inline glm::vec3 yawedHalfExtents(const glm::vec3& half_extents, float yaw) {
+    const float c = std::fabs(std::cos(yaw));
+    const float s = std::fabs(std::sin(yaw));
+    return glm::vec3(c * half_extents.x + s * half_extents.y,
+                     s * half_extents.x + c * half_extents.y,
+                     half_extents.z);
+}
 
 struct Vertex {
     glm::vec3 Position;
@@ -55,8 +95,9 @@ struct HabitatObject {
     }
 
     void updateAABB() {
-        // A simple AABB calculation based on position and scale
-        aabb_min = position - scale / 2.0f;
-        aabb_max = position + scale / 2.0f;
+        // An AABB around the upright module; only the yaw (z rotation) widens it
+        glm::vec3 half_extents = yawedHalfExtents(scale / 2.0f, glm::radians(rotation_degrees.z));
+        aabb_min = position - half_extents;
+        aabb_max = position + half_extents;
     }
 };
@@ -0,0 +1,126 @@
+#pragma once
+
+#include <cstdint>
+#include <vector>
+#include "Geometry.h"
+#include "ModuleCatalog.h"
+
+// Two modules whose categories fall under an adjacency rule of the module catalog
+struct AdjacencyPair {
+    std::uint32_t first;
+    std::uint32_t second;
+    float min_distance;
+    double penalty;
+    std::uint8_t rule; // Index into ModuleCatalog::rules
+};
+
+// Immutable per-module data, shared by index between every layout in a swarm.
+// Names, functions and meshes stay on the original HabitatObjects; only the fields
+// the evaluator reads are gathered here into contiguous arrays.
+struct ModuleTable {
+    std::vector<glm::vec3> scales;
+    std::vector<glm::vec3> half_extents;
+    std::vector<ModuleCategory> categories;
+    // The module pairs the adjacency rules apply to, found once from the catalog's category table
+    // so that evaluations only measure these pairs
+    std::vector<AdjacencyPair> adjacency_pairs;
+
+    size_t size() const {
+        return scales.size();
+    }
+
+    static ModuleTable fromLayout(const std::vector<HabitatObject>& layout,
+                                  const ModuleCatalog& catalog = ModuleCatalog::active()) {
+        ModuleTable table;
+        table.scales.reserve(layout.size());
+        table.half_extents.reserve(layout.size());
+        table.categories.reserve(layout.size());
+        for (const auto& obj : layout) {
+            table.scales.push_back(obj.scale);
+            table.half_extents.push_back(obj.scale / 2.0f);
+            table.categories.push_back(obj.category);
+        }
+        for (size_t i = 0; i < layout.size(); ++i) {
+            for (size_t j = i + 1; j < layout.size(); ++j) {
+                const std::uint8_t rule = catalog.ruleFor(table.categories[i], table.categories[j]);
+                if (rule != ModuleCatalog::NO_RULE) {
+                    table.adjacency_pairs.push_back(AdjacencyPair{static_cast<std::uint32_t>(i), static_cast<std::uint32_t>(j),
+                                                                  catalog.rules[rule].min_distance,
+                                                                  catalog.rules[rule].penalty, rule});
+                }
+            }
+        }
+        return table;
+    }
+};
+
+// A non-owning view of one layout's positions and bounding boxes. The evaluator reads layouts
+// through this, so positions can come straight from a LayoutState or from an external buffer
+// (such as a NumPy array) without being copied. A null `yaw` means every module is axis-aligned.
+struct LayoutView {
+    const glm::vec3* positions;
+    const glm::vec3* aabb_min;
+    const glm::vec3* aabb_max;
+    size_t count;
+    const float* yaw = nullptr; // Rotation of each module about z, in radians
+
+    size_t size() const {
+        return count;
+    }
+};
+
+// The mutable part of a layout (module positions, yaws and their bounding boxes), stored as
+// structure-of-arrays so that copying a layout is a handful of flat memcpy-able vectors.
+struct LayoutState {
+    std::vector<glm::vec3> positions;
+    std::vector<float> yaw; // Rotation about z, in radians
+    std::vector<glm::vec3> aabb_min;
+    std::vector<glm::vec3> aabb_max;
+
+    size_t size() const {
+        return positions.size();
+    }
+
+    void resize(size_t n) {
+        positions.resize(n);
+        yaw.resize(n, 0.0f);
+        aabb_min.resize(n);
+        aabb_max.resize(n);
+    }
+
+    void updateAABB(size_t i, const ModuleTable& modules) {
+        const glm::vec3 half_extents = yawedHalfExtents(modules.half_extents[i], yaw[i]);
+        aabb_min[i] = positions[i] - half_extents;
+        aabb_max[i] = positions[i] + half_extents;
+    }
+
+    void updateAABBs(const ModuleTable& modules) {
+        for (size_t i = 0; i < positions.size(); ++i) {
+            updateAABB(i, modules);
+        }
+    }
+
+    LayoutView view() const {
+        return LayoutView{positions.data(), aabb_min.data(), aabb_max.data(), positions.size(), yaw.data()};
+    }
+
+    static LayoutState fromLayout(const std::vector<HabitatObject>& layout, const ModuleTable& modules) {
+        LayoutState state;
+        state.resize(layout.size());
+        for (size_t i = 0; i < layout.size(); ++i) {
+            state.positions[i] = layout[i].position;
+            state.yaw[i] = glm::radians(layout[i].rotation_degrees.z);
+        }
+        state.updateAABBs(modules);
+        return state;
+    }
+
+    // Writes the positions and yaws back onto full HabitatObjects (e.g. for serialization).
+    void applyTo(std::vector<HabitatObject>& layout) const {
+        for (size_t i = 0; i < layout.size(); ++i) {
+            layout[i].position = positions[i];
+            layout[i].rotation_degrees.z = glm::degrees(yaw[i]);
+            layout[i].updateAABB();
+        }
+    }
+};
@@ -0,0 +1,176 @@
+#pragma once
+
+#include <algorithm>
+#include <array>
+#include <cstdint>
+#include <fstream>
+#include <memory>
+#include <mutex>
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include <nlohmann/json.hpp>
+#include "Geometry.h"
+
+// The catalog file shared with the Python frontend; the build may point this at an absolute path
+#ifndef HABITAT_MODULE_CATALOG
+#define HABITAT_MODULE_CATALOG "schemas/module_definitions.json"
+#endif
+
+// A module "template" from which actual modules are instantiated
+struct ModulePrototype {
+    int id;
+    std::string name;
+    std::string function;
+    double min_volume;
+    // Dimensions in meters
+    double length; // Along y
+    double width;  // Along x
+    double height;
+    ModuleCategory category;
+    // A mission gets max(count, crew_size / crew_per_module) of these (crew_per_module 0 = fixed count)
+    int count;
+    int crew_per_module;
+
+    int countFor(int crew_size) const {
+        return crew_per_module > 0 ? std::max(count, crew_size / crew_per_module) : count;
+    }
+};
+
+// Modules of two categories that have to keep a minimum distance from each other
+struct AdjacencyRule {
+    std::string violation;   // Violation type reported in the output, e.g. "ADJACENCY_CLEAN_DIRTY"
+    std::string description; // e.g. "Clean and dirty modules too close"
+    ModuleCategory first;
+    ModuleCategory second;
+    float min_distance;      // meters
+    double penalty;          // Penalty of a fully violated rule
+};
+
+/**
+ * @brief The module types and adjacency rules of schemas/module_definitions.json.
+ * The rules are also kept as a category-pair table, from which ModuleTable precomputes the
+ * module pairs that a layout's evaluation has to check. The process works with one catalog,
+ * loaded on first use (or installed with setActive() before the optimizer runs).
+ */
+class ModuleCatalog {
+public:
+    static constexpr std::uint8_t NO_RULE = 0xFF;
+
+    std::vector<ModulePrototype> prototypes; // In selection order
+    std::vector<AdjacencyRule> rules;
+
+    // Index into `rules` for every pair of categories, symmetric; NO_RULE where none applies
+    std::array<std::array<std::uint8_t, CATEGORY_COUNT>, CATEGORY_COUNT> rule_table;
+
+    ModuleCatalog() {
+        for (auto& row : rule_table) {
+            row.fill(NO_RULE);
+        }
+    }
+
+    std::uint8_t ruleFor(ModuleCategory a, ModuleCategory b) const {
+        return rule_table[static_cast<size_t>(a)][static_cast<size_t>(b)];
+    }
+
+    const ModulePrototype* find(const std::string& name) const {
+        for (const auto& prototype : prototypes) {
+            if (prototype.name == name) {
+                return &prototype;
+            }
+        }
+        return nullptr;
+    }
+
+    static ModuleCatalog fromJson(const nlohmann::json& data) {
+        auto category = [](const nlohmann::json& name) {
+            ModuleCategory parsed;
+            if (!parseCategory(name.get<std::string>(), parsed)) {
+                throw std::runtime_error("Unknown module category '" + name.get<std::string>() + "'");
+            }
+            return parsed;
+        };
+
+        ModuleCatalog catalog;
+        for (const auto& module : data.at("modules")) {
+            const auto& dimensions = module.at("dimensions_m");
+            catalog.prototypes.push_back(ModulePrototype{
+                module.at("id").get<int>(),
+                module.at("name").get<std::string>(),
+                module.value("function", std::string()),
+                module.value("min_volume_m3", 0.0),
+                dimensions.at("depth").get<double>(),
+                dimensions.at("width").get<double>(),
+                dimensions.at("height").get<double>(),
+                category(module.at("category")),
+                module.value("count", 0),
+                module.value("crew_per_module", 0)});
+        }
+
+        for (const auto& rule : data.value("adjacency_rules", nlohmann::json::array())) {
+            const auto& categories = rule.at("categories");
+            if (categories.size() != 2) {
+                throw std::runtime_error("An adjacency rule needs exactly two categories");
+            }
+            const AdjacencyRule parsed{rule.at("violation").get<std::string>(),
+                                       rule.value("description", rule.at("violation").get<std::string>()),
+                                       category(categories[0]), category(categories[1]),
+                                       rule.at("min_distance_m").get<float>(), rule.value("penalty", 1500.0)};
+            if (parsed.min_distance <= 0.0f) {
+                throw std::runtime_error("Rule '" + parsed.violation + "' needs a positive min_distance_m");
+            }
+            if (catalog.ruleFor(parsed.first, parsed.second) != NO_RULE) {
+                throw std::runtime_error("More than one adjacency rule for " + std::string(categoryName(parsed.first)) +
+                                         " and " + categoryName(parsed.second));
+            }
+            if (catalog.rules.size() >= NO_RULE) {
+                throw std::runtime_error("Too many adjacency rules");
+            }
+            const auto index = static_cast<std::uint8_t>(catalog.rules.size());
+            catalog.rule_table[static_cast<size_t>(parsed.first)][static_cast<size_t>(parsed.second)] = index;
+            catalog.rule_table[static_cast<size_t>(parsed.second)][static_cast<size_t>(parsed.first)] = index;
+            catalog.rules.push_back(parsed);
+        }
+        return catalog;
+    }
+
+    // Reads a catalog file; throws std::runtime_error if it is missing or malformed
+    static ModuleCatalog load(const std::string& path) {
+        std::ifstream in(path);
+        if (!in) {
+            throw std::runtime_error("Cannot open the module catalog " + path);
+        }
+        try {
+            return fromJson(nlohmann::json::parse(in));
+        } catch (const nlohmann::json::exception& e) {
+            throw std::runtime_error("Invalid module catalog " + path + ": " + e.what());
+        }
+    }
+
+    // The process-wide catalog, read from HABITAT_MODULE_CATALOG on first use
+    static const ModuleCatalog& active() {
+        std::lock_guard<std::mutex> lock(activeMutex());
+        auto& catalog = activeSlot();
+        if (!catalog) {
+            catalog = std::make_shared<const ModuleCatalog>(load(HABITAT_MODULE_CATALOG));
+        }
+        return *catalog;
+    }
+
+    // Replaces the process-wide catalog; call before any optimization starts
+    static void setActive(ModuleCatalog catalog) {
+        std::lock_guard<std::mutex> lock(activeMutex());
+        activeSlot() = std::make_shared<const ModuleCatalog>(std::move(catalog));
+    }
+
+private:
+    static std::shared_ptr<const ModuleCatalog>& activeSlot() {
+        static std::shared_ptr<const ModuleCatalog> catalog;
+        return catalog;
+    }
+
+    static std::mutex& activeMutex() {
+        static std::mutex mutex;
+        return mutex;
+    }
+};
@@ -1,130 +1,541 @@
 #pragma once
 
+#include <limits>
 #include <vector>
 #include <random>
 #include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <thread>
+#include <memory>
+#include <optional>
+#include <glm/gtc/constants.hpp>
 #include "Geometry.h"
+#include "LayoutState.h"
 #include "Evaluator.h"
+#include "EliteArchive.h"
+#include "FeasibleRegion.h"
+#include "TrajectoryRecorder.h"
 
 namespace Optimizer {
 
 // --- Part 4: Particle Swarm Optimization (PSO) ---
 
 // Represents a single "particle" in the swarm. A particle is a complete layout solution.
+// Only positions and yaws vary between particles; scales and categories live in the shared ModuleTable,
+// so recording a new best copies flat arrays rather than whole HabitatObjects.
 struct Particle {
-    std::vector<HabitatObject> layout; // The layout itself (position of all modules)
+    LayoutState layout;                // The layout itself (position, yaw and AABB of all modules)
     std::vector<glm::vec3> velocity;   // The "velocity" of each module in the layout
+    std::vector<float> yaw_velocity;   // Angular velocity of each module about z
     double score;                      // The evaluated score of this layout
+    ScoreTerms terms;                  // The unweighted terms behind the score
     ViolationTracker violations;       // Track violations for this layout
+    // The latest move was screened out (OptimizerOptions::surrogate_screening): the layout was not
+    // evaluated, and score, terms and violations are still those of the last exact evaluation
+    bool screened = false;
 
-    std::vector<HabitatObject> best_known_layout; // This particle's best-ever layout
+    std::vector<glm::vec3> best_known_positions; // This particle's best-ever layout
+    std::vector<float> best_known_yaw;
     double best_known_score;
+    ScoreTerms best_known_terms;
     ViolationTracker best_known_violations;
 };
 
-// The main PSO function
-inline std::vector<HabitatObject> findBestLayout(const std::vector<HabitatObject>& initialLayout, int iterations = 100, int num_particles = 30) {
-    std::vector<Particle> swarm(num_particles);
-    std::vector<HabitatObject> global_best_layout = initialLayout;
-    double global_best_score = -std::numeric_limits<double>::infinity();
-    ViolationTracker global_best_violations;
+// Settings for a single optimization run
+struct OptimizerOptions {
+    int iterations = 100;
+    int num_particles = 30;
+    // Number of mutually distinct layouts to keep (1 = only the global best)
+    int top_k = 1;
+    // Minimum RMS module distance, in meters, between any two kept layouts
+    float min_distance = 1.0f;
+    // Let the swarm turn modules about the vertical axis; otherwise they keep their initial yaw
+    bool optimize_rotation = true;
+    // Island model: independent swarms of num_particles each, run on separate cores
+    int islands = 1;
+    // Iterations between migrations, when each island's best layout is sent to the next island
+    int migration_interval = 25;
+    // Skip the exact evaluation of candidates whose upper-bound score cannot beat their personal best
+    bool surrogate_screening = false;
+    // Weights of the score terms, in ScoreTerms order; missing trailing weights are 1
+    std::vector<double> weights = {1.0};
+    // Number of best layouts to keep, with their score terms, for re-ranking under other weights
+    // (0 = none). Unlike the top_k alternatives they only need to be POOL_MIN_DISTANCE apart.
+    int candidate_pool = 0;
+    // Start particles inside the habitat, from a Halton sample stratified by level
+    // (FeasibleRegion::HaltonSampler), instead of uniformly in [-4, 4] on every axis
+    bool feasible_initialization = false;
+    // Put modules that a move took out of the habitat back on its boundary (FeasibleRegion::repair)
+    bool repair_bounds = false;
+};
 
-    std::random_device rd;
-    std::mt19937 gen(rd());
-    std::uniform_real_distribution<> pos_distr(-4.0, 4.0); // Position distribution
-    std::uniform_real_distribution<> vel_distr(-0.5, 0.5); // Velocity distribution
+// Layouts in the candidate pool closer than this (RMS, meters) count as the same layout
+constexpr float POOL_MIN_DISTANCE = 0.05f;
+
+// Evaluation counts of an optimization run, for judging the surrogate pre-screening
+struct OptimizerStats {
+    long long candidates = 0;         // Particle moves that needed a score
+    long long exact_evaluations = 0;  // Moves that went through the full evaluateLayout
+    long long screened_out = 0;       // Moves rejected on the upper bound alone
+    long long improvements = 0;       // Exact evaluations that improved the particle's personal best
+    long long repairs = 0;            // Module moves undone by the bounds repair
+    // First iteration after which the global best had no bounds violation, and no violation at all
+    // (0 = already after initialization, -1 = never); over islands, the earliest
+    int first_in_bounds_iteration = -1;
+    int first_violation_free_iteration = -1;
+
+    OptimizerStats& operator+=(const OptimizerStats& other) {
+        candidates += other.candidates;
+        exact_evaluations += other.exact_evaluations;
+        screened_out += other.screened_out;
+        improvements += other.improvements;
+        repairs += other.repairs;
+        first_in_bounds_iteration = earliest(first_in_bounds_iteration, other.first_in_bounds_iteration);
+        first_violation_free_iteration = earliest(first_violation_free_iteration, other.first_violation_free_iteration);
+        return *this;
+    }
+
+    static int earliest(int a, int b) {
+        return a < 0 ? b : (b < 0 ? a : std::min(a, b));
+    }
+
+    // Share of exact evaluations passed by the surrogate that turned out to be improvements
+    double surrogateHitRate() const {
+        return exact_evaluations > 0 ? static_cast<double>(improvements) / exact_evaluations : 0.0;
+    }
+
+    // Share of candidates that never needed an exact evaluation
+    double exactEvaluationSavings() const {
+        return candidates > 0 ? static_cast<double>(screened_out) / candidates : 0.0;
+    }
+};
+
+// PSO coefficients of one swarm
+struct SwarmParameters {
+    float w = 0.5f;  // Inertia weight
+    float c1 = 1.5f; // Cognitive (personal best) weight
+    float c2 = 1.5f; // Social (global best) weight
+};
+
+// Islands run with different coefficients, from exploitative (low inertia, particles trusting
+// their own bests) to exploratory (high inertia, particles following the island's best).
+// A single swarm keeps the default coefficients.
+inline SwarmParameters islandParameters(int island, int island_count) {
+    if (island_count <= 1) {
+        return SwarmParameters{};
+    }
+    const float t = static_cast<float>(island) / (island_count - 1);
+    return SwarmParameters{0.4f + 0.4f * t, 2.0f - t, 1.0f + t};
+}
+
+// Boxes look the same after half a turn, so yaw only needs to cover [0, pi)
+constexpr float YAW_PERIOD = glm::pi<float>();
+// Largest change of yaw per iteration, in radians
+constexpr float MAX_YAW_VELOCITY = glm::pi<float>() / 8.0f;
+
+// Shortest signed turn from one yaw to another, in [-pi/2, pi/2]
+inline float yawDifference(float from, float to) {
+    return std::remainder(to - from, YAW_PERIOD);
+}
+
+// Reattaches the names, functions and meshes of the original modules to a solution
+inline std::vector<HabitatObject> toLayout(const std::vector<HabitatObject>& initialLayout, const LayoutCandidate& candidate) {
+    std::vector<HabitatObject> layout = initialLayout;
+    for (size_t i = 0; i < layout.size(); ++i) {
+        layout[i].position = candidate.positions[i];
+        layout[i].rotation_degrees.z = glm::degrees(candidate.yaw[i]);
+        layout[i].updateAABB();
+    }
+    return layout;
+}
+
+// One particle swarm over a fixed set of modules. The swarm can be advanced a few iterations
+// at a time and can take in layouts found elsewhere, which is what the island model needs.
+// Every improved personal best is also offered to the archive, if one is given, and every
+// iteration is recorded to the trajectory track, if one is given.
+class Swarm {
+private:
+    const ModuleTable& modules;
+    OptimizerOptions options;
+    SwarmParameters parameters;
+    EliteArchive* archive;
+    EliteArchive* pool;
+    Trajectory::Track* trajectory;
+    std::vector<Particle> particles;
+    LayoutCandidate global_best;
+    OptimizerStats stats;
+    int iteration = 0; // Iterations run so far
+    std::mt19937 gen;
+
+    // Adaptive parameters based on violations
+    static constexpr float violation_repulsion = 0.2f; // Strength of violation avoidance
 
-    // 1. Initialize the swarm
-    for (int i = 0; i < num_particles; ++i) {
-        swarm[i].layout = initialLayout;
-        swarm[i].velocity.resize(initialLayout.size());
+    void recordPersonalBest(Particle& p) {
+        p.best_known_score = p.score;
+        p.best_known_positions = p.layout.positions;
+        p.best_known_yaw = p.layout.yaw;
+        p.best_known_terms = p.terms;
+        p.best_known_violations = p.violations;
+        if (archive) {
+            archive->offer(p.best_known_positions, p.best_known_yaw, p.best_known_score, p.best_known_terms, p.best_known_violations);
+        }
+        if (pool) {
+            pool->offer(p.best_known_positions, p.best_known_yaw, p.best_known_score, p.best_known_terms, p.best_known_violations);
+        }
 
-        for (size_t j = 0; j < initialLayout.size(); ++j) {
-            // Assign random initial positions and velocities
-            swarm[i].layout[j].position = glm::vec3(pos_distr(gen), pos_distr(gen), pos_distr(gen));
-            swarm[i].velocity[j] = glm::vec3(vel_distr(gen), vel_distr(gen), vel_distr(gen));
+        if (p.score > global_best.score) {
+            global_best.score = p.score;
+            global_best.positions = p.layout.positions;
+            global_best.yaw = p.layout.yaw;
+            global_best.terms = p.terms;
+            global_best.violations = p.violations;
         }
+    }
 
-        // Evaluate with violation tracking
-        swarm[i].score = Evaluator::evaluateLayout(swarm[i].layout, {1.0}, &swarm[i].violations);
-        swarm[i].best_known_layout = swarm[i].layout;
-        swarm[i].best_known_score = swarm[i].score;
-        swarm[i].best_known_violations = swarm[i].violations;
+    // Notes the first iteration at which the global best got in bounds, and violation-free
+    void recordProgress() {
+        if (stats.first_in_bounds_iteration < 0 && global_best.terms.bounds == 0.0) {
+            stats.first_in_bounds_iteration = iteration;
+        }
+        if (stats.first_violation_free_iteration < 0 && global_best.violations.getViolationCount() == 0) {
+            stats.first_violation_free_iteration = iteration;
+        }
+    }
 
-        if (swarm[i].score > global_best_score) {
-            global_best_score = swarm[i].score;
-            global_best_layout = swarm[i].layout;
-            global_best_violations = swarm[i].violations;
+    void recordFrame() {
+        for (const auto& p : particles) {
+            // A screened-out layout has no score; NaN tells readers it was not evaluated
+            trajectory->addParticle(p.layout.positions, p.layout.yaw,
+                                    p.screened ? std::numeric_limits<double>::quiet_NaN() : p.score);
         }
+        trajectory->endFrame(global_best.score);
     }
 
-    // PSO parameters
-    const float w = 0.5;  // Inertia weight
-    const float c1 = 1.5; // Cognitive (personal best) weight
-    const float c2 = 1.5; // Social (global best) weight
-    
-    // Adaptive parameters based on violations
-    const float violation_repulsion = 0.2f; // Strength of violation avoidance
-
-    // 2. Run the optimization loop
-    for (int iter = 0; iter < iterations; ++iter) {
-        for (auto& p : swarm) {
-            // Update velocity and position for each module in the particle's layout
-            for (size_t i = 0; i < p.layout.size(); ++i) {
-                std::uniform_real_distribution<> r_distr(0.0, 1.0);
-                float r1 = r_distr(gen);
-                float r2 = r_distr(gen);
-
-                glm::vec3 cognitive_component = c1 * r1 * (p.best_known_layout[i].position - p.layout[i].position);
-                glm::vec3 social_component = c2 * r2 * (global_best_layout[i].position - p.layout[i].position);
-                
-                // Add violation avoidance component
-                glm::vec3 violation_avoidance(0.0f);
-                for (const auto& v : p.violations.getViolations()) {
-                    if (v.object1Index == i || v.object2Index == i) {
-                        // Move away from violation
-                        glm::vec3 violation_pos;
-                        if (v.object1Index == i) {
-                            violation_pos = p.layout[v.object2Index].position;
-                        } else {
-                            violation_pos = p.layout[v.object1Index].position;
-                        }
-                        glm::vec3 away_dir = p.layout[i].position - violation_pos;
-                        if (glm::length(away_dir) > 0.0001f) { // Prevent division by zero
-                            away_dir = glm::normalize(away_dir);
+public:
+    Swarm(const std::vector<HabitatObject>& initialLayout, const ModuleTable& modules, const OptimizerOptions& options,
+          const SwarmParameters& parameters, unsigned int seed, EliteArchive* archive = nullptr,
+          EliteArchive* pool = nullptr, Trajectory::Track* trajectory = nullptr)
+        : modules(modules), options(options), parameters(parameters), archive(archive), pool(pool),
+          trajectory(trajectory), particles(options.num_particles), gen(seed) {
+        const LayoutState initial_state = LayoutState::fromLayout(initialLayout, modules);
+        global_best = LayoutCandidate{initial_state.positions, initial_state.yaw,
+                                      -std::numeric_limits<double>::infinity(), ScoreTerms(), ViolationTracker()};
+
+        std::uniform_real_distribution<> pos_distr(-4.0, 4.0); // Position distribution
+        std::uniform_real_distribution<> vel_distr(-0.5, 0.5); // Velocity distribution
+        std::uniform_real_distribution<> yaw_distr(0.0, YAW_PERIOD); // Yaw distribution
+        std::uniform_real_distribution<> yaw_vel_distr(-MAX_YAW_VELOCITY, MAX_YAW_VELOCITY);
+
+        // Upper bound on violations per layout: every pair can collide and break one adjacency rule,
+        // and every module can exceed both bounds. Reserving this up front keeps the loop allocation-free.
+        const size_t n = initialLayout.size();
+        const size_t max_violations = n * (n > 0 ? n - 1 : 0) + 2 * n;
+        global_best.violations.reserve(max_violations);
+
+        // Only drawn from when asked for, so the uniform start sees the same random numbers as before
+        std::optional<FeasibleRegion::HaltonSampler> sampler;
+        if (options.feasible_initialization) {
+            sampler.emplace(gen);
+        }
+
+        // Initialize the swarm
+        for (size_t particle = 0; particle < particles.size(); ++particle) {
+            Particle& p = particles[particle];
+            p.layout.resize(n);
+            p.velocity.resize(n);
+            p.yaw_velocity.assign(n, 0.0f);
+            p.violations.reserve(max_violations);
+            p.best_known_violations.reserve(max_violations);
+
+            for (size_t j = 0; j < n; ++j) {
+                // Assign random initial positions and velocities
+                if (options.feasible_initialization) {
+                    p.layout.positions[j] = sampler->sample(modules, particle, j);
+                } else {
+                    p.layout.positions[j] = glm::vec3(pos_distr(gen), pos_distr(gen), pos_distr(gen));
+                }
+                p.velocity[j] = glm::vec3(vel_distr(gen), vel_distr(gen), vel_distr(gen));
+                if (options.optimize_rotation) {
+                    p.layout.yaw[j] = yaw_distr(gen);
+                    p.yaw_velocity[j] = yaw_vel_distr(gen);
+                } else {
+                    p.layout.yaw[j] = initial_state.yaw[j];
+                }
+            }
+            p.layout.updateAABBs(modules);
+
+            // Evaluate with violation tracking
+            p.terms = Evaluator::scoreTerms(p.layout.view(), modules, &p.violations);
+            p.score = p.terms.weighted(options.weights);
+            recordPersonalBest(p);
+        }
+        recordProgress();
+        if (trajectory) {
+            recordFrame();
+        }
+    }
+
+    // Runs the optimization loop for the given number of iterations
+    void step(int iterations) {
+        const float w = parameters.w;
+        const float c1 = parameters.c1;
+        const float c2 = parameters.c2;
+        const size_t n = modules.size();
+        std::uniform_real_distribution<> r_distr(0.0, 1.0);
+
+        for (int iter = 0; iter < iterations; ++iter) {
+            for (auto& p : particles) {
+                // Update velocity and position for each module in the particle's layout
+                std::vector<glm::vec3>& positions = p.layout.positions;
+                std::vector<float>& yaw = p.layout.yaw;
+                for (size_t i = 0; i < n; ++i) {
+                    float r1 = r_distr(gen);
+                    float r2 = r_distr(gen);
+
+                    glm::vec3 cognitive_component = c1 * r1 * (p.best_known_positions[i] - positions[i]);
+                    glm::vec3 social_component = c2 * r2 * (global_best.positions[i] - positions[i]);
+
+                    // Add violation avoidance component
+                    glm::vec3 violation_avoidance(0.0f);
+                    const int index = static_cast<int>(i);
+                    for (const auto& v : p.violations.getViolations()) {
+                        const int other = v.otherObject(index);
+                        if (v.involves(index) && other != Violation::NO_OBJECT) {
+                            // Move away from violation
+                            glm::vec3 violation_pos = positions[other];
+                            glm::vec3 away_dir = positions[i] - violation_pos;
+                            if (glm::length(away_dir) > 0.0001f) { // Prevent division by zero
+                                away_dir = glm::normalize(away_dir);
+                            }
+                            violation_avoidance += violation_repulsion * v.severity * away_dir;
                         }
-                        violation_avoidance += violation_repulsion * v.severity * away_dir;
                     }
+
+                    p.velocity[i] = w * p.velocity[i] + cognitive_component + social_component + violation_avoidance;
+
+                    // Clamp velocity to avoid explosion
+                    p.velocity[i] = glm::clamp(p.velocity[i], -1.0f, 1.0f);
+
+                    positions[i] += p.velocity[i];
+
+                    // Yaw follows the same update, with differences taken the short way round
+                    if (options.optimize_rotation) {
+                        float yaw_velocity = w * p.yaw_velocity[i] +
+                                             c1 * r1 * yawDifference(yaw[i], p.best_known_yaw[i]) +
+                                             c2 * r2 * yawDifference(yaw[i], global_best.yaw[i]);
+                        p.yaw_velocity[i] = glm::clamp(yaw_velocity, -MAX_YAW_VELOCITY, MAX_YAW_VELOCITY);
+                        yaw[i] = std::fmod(yaw[i] + p.yaw_velocity[i] + YAW_PERIOD, YAW_PERIOD);
+                    }
+                    // After the turn, since turning can push a corner out as well
+                    if (options.repair_bounds && FeasibleRegion::repair(modules, i, yaw[i], positions[i], p.velocity[i])) {
+                        ++stats.repairs;
+                    }
+                    p.layout.updateAABB(i, modules);
                 }
-                
-                p.velocity[i] = w * p.velocity[i] + cognitive_component + social_component + violation_avoidance;
 
-                // Clamp velocity to avoid explosion
-                p.velocity[i] = glm::clamp(p.velocity[i], -1.0f, 1.0f);
+                ++stats.candidates;
+                if (options.surrogate_screening) {
+                    // The bound skips the collision test; if even it cannot beat the personal best,
+                    // the exact score cannot either. The bound is no score, so the particle keeps the
+                    // score, terms and violations (collisions included) of its last exact evaluation
+                    // and steers by them, as it would have without screening.
+                    const double bound = Evaluator::upperBoundScore(p.layout.view(), modules, options.weights);
+                    p.screened = bound <= p.best_known_score;
+                    if (p.screened) {
+                        ++stats.screened_out;
+                        continue;
+                    }
+                }
 
-                p.layout[i].position += p.velocity[i];
-                p.layout[i].updateAABB();
-            }
+                // Evaluate with violation tracking
+                p.terms = Evaluator::scoreTerms(p.layout.view(), modules, &p.violations);
+                p.score = p.terms.weighted(options.weights);
+                ++stats.exact_evaluations;
 
-            // Evaluate with violation tracking
-            p.score = Evaluator::evaluateLayout(p.layout, {1.0}, &p.violations);
-
-            // Update personal best
-            if (p.score > p.best_known_score) {
-                p.best_known_score = p.score;
-                p.best_known_layout = p.layout;
-                p.best_known_violations = p.violations;
-
-                // Update global best
-                if (p.score > global_best_score) {
-                    global_best_score = p.score;
-                    global_best_layout = p.layout;
-                    global_best_violations = p.violations;
+                // Update personal (and global) best
+                if (p.score > p.best_known_score) {
+                    ++stats.improvements;
+                    recordPersonalBest(p);
                 }
             }
+            ++iteration;
+            recordProgress();
+            if (trajectory) {
+                recordFrame();
+            }
+        }
+    }
+
+    // Replaces the particle with the worst personal best by a layout from another swarm.
+    // The migrant arrives at rest, so it pulls on this swarm through the personal and global bests.
+    void acceptMigrant(const LayoutCandidate& migrant) {
+        auto worst = std::min_element(particles.begin(), particles.end(), [](const Particle& a, const Particle& b) {
+            return a.best_known_score < b.best_known_score;
+        });
+        if (worst == particles.end() || worst->best_known_score >= migrant.score) {
+            return;
         }
+        Particle& p = *worst;
+        p.layout.positions = migrant.positions;
+        p.layout.yaw = migrant.yaw;
+        p.layout.updateAABBs(modules);
+        std::fill(p.velocity.begin(), p.velocity.end(), glm::vec3(0.0f));
+        std::fill(p.yaw_velocity.begin(), p.yaw_velocity.end(), 0.0f);
+        p.score = migrant.score;
+        p.terms = migrant.terms;
+        p.violations = migrant.violations;
+        p.screened = false;
+        recordPersonalBest(p);
+        recordProgress();
+    }
+
+    const LayoutCandidate& best() const {
+        return global_best;
     }
 
-    return global_best_layout;
+    const OptimizerStats& getStats() const {
+        return stats;
+    }
+};
+
+// Runs a single swarm and returns the global best
+inline LayoutCandidate runSwarm(const std::vector<HabitatObject>& initialLayout, const OptimizerOptions& options,
+                                EliteArchive* archive = nullptr, OptimizerStats* stats = nullptr,
+                                EliteArchive* pool = nullptr, Trajectory::Recorder* recorder = nullptr) {
+    const ModuleTable modules = ModuleTable::fromLayout(initialLayout);
+    Swarm swarm(initialLayout, modules, options, SwarmParameters{}, std::random_device{}(), archive, pool,
+                recorder ? recorder->track(0) : nullptr);
+    swarm.step(options.iterations);
+    if (stats) {
+        *stats += swarm.getStats();
+    }
+    return swarm.best();
+}
+
+// Runs options.islands swarms with different coefficients in parallel and returns the overall best.
+// Islands advance in epochs of migration_interval iterations (fork-join, one thread per core);
+// between epochs each island sends its best layout to the next island in a ring, replacing
+// that island's worst particle. Each island keeps its own archive and pool, merged into `archive`
+// and `pool` at the end, and records to its own track of `recorder`.
+inline LayoutCandidate runIslands(const std::vector<HabitatObject>& initialLayout, const OptimizerOptions& options,
+                                  EliteArchive* archive = nullptr, OptimizerStats* stats = nullptr,
+                                  EliteArchive* pool = nullptr, Trajectory::Recorder* recorder = nullptr) {
+    const int island_count = std::max(1, options.islands);
+    if (island_count == 1) {
+        return runSwarm(initialLayout, options, archive, stats, pool, recorder);
+    }
+
+    const ModuleTable modules = ModuleTable::fromLayout(initialLayout);
+    const size_t archive_capacity = static_cast<size_t>(std::max(1, options.top_k));
+    std::vector<EliteArchive> archives(island_count, EliteArchive(archive_capacity, options.min_distance));
+    std::vector<EliteArchive> pools(island_count, EliteArchive(static_cast<size_t>(std::max(0, options.candidate_pool)),
+                                                               POOL_MIN_DISTANCE));
+    std::vector<std::unique_ptr<Swarm>> swarms(island_count);
+    std::random_device rd;
+    std::vector<unsigned int> seeds(island_count);
+    for (auto& seed : seeds) {
+        seed = rd();
+    }
+
+    const unsigned int num_threads = std::min<unsigned int>(island_count, std::max(1u, std::thread::hardware_concurrency()));
+    // Runs task(island) for every island on num_threads threads and waits for all of them
+    auto forEachIsland = [&](auto&& task) {
+        std::atomic<int> next_island{0};
+        auto worker = [&]() {
+            for (int island = next_island++; island < island_count; island = next_island++) {
+                task(island);
+            }
+        };
+        std::vector<std::thread> workers;
+        for (unsigned int t = 1; t < num_threads; ++t) {
+            workers.emplace_back(worker);
+        }
+        worker();
+        for (auto& thread : workers) {
+            thread.join();
+        }
+    };
+
+    forEachIsland([&](int island) {
+        swarms[island] = std::make_unique<Swarm>(initialLayout, modules, options, islandParameters(island, island_count),
+                                                 seeds[island], archive ? &archives[island] : nullptr,
+                                                 pool ? &pools[island] : nullptr,
+                                                 recorder ? recorder->track(island) : nullptr);
+    });
+
+    const int interval = std::max(1, options.migration_interval);
+    for (int done = 0; done < options.iterations; done += interval) {
+        const int epoch = std::min(interval, options.iterations - done);
+        forEachIsland([&](int island) {
+            swarms[island]->step(epoch);
+        });
+
+        // Ring migration; the bests are copied first so every island sends what it had before this round
+        std::vector<LayoutCandidate> emigrants;
+        emigrants.reserve(island_count);
+        for (const auto& swarm : swarms) {
+            emigrants.push_back(swarm->best());
+        }
+        for (int island = 0; island < island_count; ++island) {
+            swarms[(island + 1) % island_count]->acceptMigrant(emigrants[island]);
+        }
+    }
+
+    auto merge = [](const std::vector<EliteArchive>& from, EliteArchive* into) {
+        if (!into) {
+            return;
+        }
+        for (const auto& island_archive : from) {
+            for (const auto& candidate : island_archive.getCandidates()) {
+                into->offer(candidate.positions, candidate.yaw, candidate.score, candidate.terms, candidate.violations);
+            }
+        }
+    };
+    merge(archives, archive);
+    merge(pools, pool);
+
+    if (stats) {
+        for (const auto& swarm : swarms) {
+            *stats += swarm->getStats();
+        }
+    }
+
+    const LayoutCandidate* best = &swarms.front()->best();
+    for (const auto& swarm : swarms) {
+        if (swarm->best().score > best->score) {
+            best = &swarm->best();
+        }
+    }
+    return *best;
+}
+
+// The main PSO function. A recorder, if given, must have been made for one island of
+// num_particles particles and receives every iteration of the run.
+inline std::vector<HabitatObject> findBestLayout(const std::vector<HabitatObject>& initialLayout, int iterations = 100, int num_particles = 30, bool optimize_rotation = true,
+                                                 Trajectory::Recorder* recorder = nullptr) {
+    OptimizerOptions options;
+    options.iterations = iterations;
+    options.num_particles = num_particles;
+    options.optimize_rotation = optimize_rotation;
+    return toLayout(initialLayout, runSwarm(initialLayout, options, nullptr, nullptr, nullptr, recorder));
+}
+
+// Returns up to options.top_k layouts, best first, that are pairwise at least options.min_distance
+// apart. The first entry is always the global best, so this costs the same single optimization run
+// (one swarm, or options.islands swarms in parallel).
+// If `pool` is given, it receives up to options.candidate_pool of the best layouts seen, best first.
+// If `recorder` is given (made for options.islands islands), it receives every iteration of every island.
+inline std::vector<LayoutCandidate> findDiverseLayouts(const std::vector<HabitatObject>& initialLayout, const OptimizerOptions& options,
+                                                       OptimizerStats* stats = nullptr, std::vector<LayoutCandidate>* pool = nullptr,
+                                                       Trajectory::Recorder* recorder = nullptr) {
+    EliteArchive archive(static_cast<size_t>(std::max(1, options.top_k)), options.min_distance);
+    EliteArchive candidate_pool(static_cast<size_t>(std::max(0, options.candidate_pool)), POOL_MIN_DISTANCE);
+    runIslands(initialLayout, options, &archive, stats, pool && options.candidate_pool > 0 ? &candidate_pool : nullptr,
+               recorder);
+    if (pool) {
+        *pool = candidate_pool.getCandidates();
+    }
+    return archive.getCandidates();
 }
 }
@@ -0,0 +1,49 @@
+#pragma once
+
+#include <cstddef>
+#include <vector>
+
+// The unweighted components of a layout's score: the compactness reward and the three penalties.
+// Stored layouts keep these next to their score, so they can be re-scored under other weights
+// without being evaluated again.
+struct ScoreTerms {
+    // Positions of the terms in a weight vector, and the order in which they are serialized
+    enum Term : size_t { COMPACTNESS, COLLISION, BOUNDS, ADJACENCY, COUNT };
+
+    double compactness = 0.0; // Reward, in (0, 1]
+    double collision = 0.0;   // Penalties, all >= 0
+    double bounds = 0.0;
+    double adjacency = 0.0;
+
+    static const char* name(size_t term) {
+        switch (term) {
+            case COMPACTNESS: return "compactness";
+            case COLLISION: return "collision";
+            case BOUNDS: return "bounds";
+            case ADJACENCY: return "adjacency";
+            default: return "unknown";
+        }
+    }
+
+    double operator[](size_t term) const {
+        switch (term) {
+            case COMPACTNESS: return compactness;
+            case COLLISION: return collision;
+            case BOUNDS: return bounds;
+            default: return adjacency;
+        }
+    }
+
+    // Weights missing from the end of the vector count as 1, so the historical {1.0} keeps its meaning
+    static double weight(const std::vector<double>& weights, size_t term) {
+        return term < weights.size() ? weights[term] : 1.0;
+    }
+
+    // The score under the given weights; higher is better
+    double weighted(const std::vector<double>& weights) const {
+        return weight(weights, COMPACTNESS) * compactness -
+               (weight(weights, COLLISION) * collision +
+                weight(weights, BOUNDS) * bounds +
+                weight(weights, ADJACENCY) * adjacency);
+    }
+};
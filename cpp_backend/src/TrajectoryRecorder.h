@@ -0,0 +1,263 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <cstdlib>
+#include <fstream>
+#include <limits>
+#include <string>
+#include <vector>
+#include <glm/glm.hpp>
+#include <glm/gtc/constants.hpp>
+
+// Opt-in recording of how a particle swarm moves, for tuning the PSO coefficients.
+// After the swarm is initialized and after every iteration, the position and yaw of every module
+// of every particle are stored, quantized to int16, together with the particle's score.
+// Nothing is recorded (and nothing is paid) unless the swarm is given a Track.
+//
+// File format (little-endian), read by visual_generation/trajectory.py:
+//   header (48 bytes): "HTRJ", version, frame_count, islands, particles (all islands),
+//                      modules, keyframe_interval, position_quantum (m), yaw_quantum (rad),
+//                      yaw_steps, index_offset (uint64)
+//   frames:            kind (uint8), 3 bytes padding, iteration (uint32), best score (float32),
+//                      scores (float32 x particles; NaN for layouts that surrogate screening
+//                      rejected without evaluating them),
+//                      values (particles x modules x {x, y, z, yaw}) as
+//                        KEYFRAME: int16 quantized values
+//                        DELTA8:   int8 differences to the previous frame's quantized values
+//                        DELTA16:  int16 differences to the previous frame's quantized values
+//                      Yaw values lie in [0, yaw_steps) and their differences wrap around, so a
+//                      module turning past pi does not force a wide frame.
+//   index:             byte offset of every frame (uint64 x frame_count)
+// Every keyframe_interval-th frame is a keyframe, so a reader can seek to any frame by decoding
+// at most keyframe_interval - 1 deltas. Deltas are exact in quantized units, so they never drift.
+namespace Trajectory {
+
+constexpr char MAGIC[4] = {'H', 'T', 'R', 'J'};
+constexpr uint32_t FORMAT_VERSION = 1;
+
+// 1 cm steps cover +-327 m in int16, and an int8 delta holds the largest move of one iteration
+// (the velocity is clamped to 1 m per axis), so only migrations and keyframes need int16 values
+constexpr float POSITION_QUANTUM = 0.01f;
+// Yaw lies in [0, pi); 512 steps per half turn (about 0.35 degrees each) keep the largest turn
+// of one iteration (pi / 8) within an int8 delta
+constexpr int32_t YAW_STEPS = 512;
+constexpr float YAW_QUANTUM = glm::pi<float>() / YAW_STEPS;
+constexpr int DEFAULT_KEYFRAME_INTERVAL = 25;
+// x, y, z and yaw of each module
+constexpr size_t VALUES_PER_MODULE = 4;
+
+enum FrameKind : uint8_t { KEYFRAME = 0, DELTA8 = 1, DELTA16 = 2 };
+
+inline int16_t quantize(float value, float quantum) {
+    const float steps = std::round(value / quantum);
+    return static_cast<int16_t>(std::clamp(steps, -32768.0f, 32767.0f));
+}
+
+inline int16_t quantizeYaw(float yaw) {
+    const int32_t steps = static_cast<int32_t>(std::lround(yaw / YAW_QUANTUM)) % YAW_STEPS;
+    return static_cast<int16_t>(steps < 0 ? steps + YAW_STEPS : steps);
+}
+
+// Difference between two quantized values; yaw differences are taken the short way round
+inline int32_t valueDelta(int32_t from, int32_t to, bool is_yaw) {
+    int32_t delta = to - from;
+    if (is_yaw) {
+        delta = ((delta % YAW_STEPS) + YAW_STEPS + YAW_STEPS / 2) % YAW_STEPS - YAW_STEPS / 2;
+    }
+    return delta;
+}
+
+// The frames of one swarm, kept in memory as quantized absolute values until the run is over.
+// A track is only ever written by the thread advancing its swarm.
+class Track {
+private:
+    size_t values_per_particle;
+    size_t particles;
+    std::vector<int16_t> values;   // frames x particles x values_per_particle
+    std::vector<float> scores;     // frames x particles
+    std::vector<float> best_scores; // frames
+
+public:
+    Track(size_t particles, size_t modules, size_t expected_frames)
+        : values_per_particle(modules * VALUES_PER_MODULE), particles(particles) {
+        // Reserving the whole run keeps recording allocation-free
+        values.reserve(expected_frames * particles * values_per_particle);
+        scores.reserve(expected_frames * particles);
+        best_scores.reserve(expected_frames);
+    }
+
+    // Appends one particle's state to the current frame
+    void addParticle(const std::vector<glm::vec3>& positions, const std::vector<float>& yaw, double score) {
+        for (size_t i = 0; i < positions.size(); ++i) {
+            values.push_back(quantize(positions[i].x, POSITION_QUANTUM));
+            values.push_back(quantize(positions[i].y, POSITION_QUANTUM));
+            values.push_back(quantize(positions[i].z, POSITION_QUANTUM));
+            values.push_back(quantizeYaw(yaw[i]));
+        }
+        scores.push_back(static_cast<float>(score));
+    }
+
+    // Closes the current frame, once every particle was added
+    void endFrame(double best_score) {
+        best_scores.push_back(static_cast<float>(best_score));
+    }
+
+    size_t frameCount() const {
+        return best_scores.size();
+    }
+
+    const int16_t* frameValues(size_t frame) const {
+        return values.data() + frame * particles * values_per_particle;
+    }
+
+    const float* frameScores(size_t frame) const {
+        return scores.data() + frame * particles;
+    }
+
+    float bestScore(size_t frame) const {
+        return best_scores[frame];
+    }
+};
+
+// Collects one Track per island and encodes them into a single file once the run is over;
+// frame t of the file holds the particles of every island after iteration t, island by island.
+class Recorder {
+private:
+    size_t particles_per_island;
+    size_t modules;
+    int keyframe_interval;
+    std::vector<Track> tracks;
+
+    template <typename T>
+    static void put(std::ofstream& out, const T& value) {
+        out.write(reinterpret_cast<const char*>(&value), sizeof(T));
+    }
+
+    template <typename T>
+    static void putArray(std::ofstream& out, const std::vector<T>& values) {
+        out.write(reinterpret_cast<const char*>(values.data()), values.size() * sizeof(T));
+    }
+
+    void putHeader(std::ofstream& out, uint32_t frame_count, uint64_t index_offset) const {
+        out.write(MAGIC, sizeof(MAGIC));
+        put(out, FORMAT_VERSION);
+        put(out, frame_count);
+        put(out, static_cast<uint32_t>(tracks.size()));
+        put(out, static_cast<uint32_t>(particles()));
+        put(out, static_cast<uint32_t>(modules));
+        put(out, static_cast<uint32_t>(keyframe_interval));
+        put(out, POSITION_QUANTUM);
+        put(out, YAW_QUANTUM);
+        put(out, static_cast<uint32_t>(YAW_STEPS));
+        put(out, index_offset);
+    }
+
+public:
+    Recorder(size_t islands, size_t particles_per_island, size_t modules, int iterations,
+             int keyframe_interval = DEFAULT_KEYFRAME_INTERVAL)
+        : particles_per_island(particles_per_island), modules(modules),
+          keyframe_interval(std::max(1, keyframe_interval)) {
+        const size_t expected_frames = static_cast<size_t>(std::max(0, iterations)) + 1;
+        tracks.reserve(std::max<size_t>(1, islands));
+        for (size_t island = 0; island < std::max<size_t>(1, islands); ++island) {
+            tracks.emplace_back(particles_per_island, modules, expected_frames);
+        }
+    }
+
+    Track* track(size_t island) {
+        return island < tracks.size() ? &tracks[island] : nullptr;
+    }
+
+    // Particles per frame, over all islands
+    size_t particles() const {
+        return tracks.size() * particles_per_island;
+    }
+
+    // Frames recorded by every island
+    size_t frameCount() const {
+        size_t count = tracks.empty() ? 0 : tracks.front().frameCount();
+        for (const auto& island_track : tracks) {
+            count = std::min(count, island_track.frameCount());
+        }
+        return count;
+    }
+
+    // Bytes the frames would take as float32 values and scores, for judging the encoding
+    size_t rawSize() const {
+        return frameCount() * particles() * (modules * VALUES_PER_MODULE + 1) * sizeof(float);
+    }
+
+    // Encodes the recorded frames into `path`. Returns the file size in bytes, or 0 on failure.
+    size_t write(const std::string& path) const {
+        std::ofstream out(path, std::ios::binary | std::ios::trunc);
+        if (!out) {
+            return 0;
+        }
+        const uint32_t frame_count = static_cast<uint32_t>(frameCount());
+        putHeader(out, frame_count, 0);
+
+        const size_t island_values = particles_per_island * modules * VALUES_PER_MODULE;
+        const size_t frame_values = tracks.size() * island_values;
+        std::vector<int32_t> current(frame_values), previous(frame_values), deltas(frame_values);
+        std::vector<int16_t> values16(frame_values);
+        std::vector<int8_t> values8(frame_values);
+        std::vector<float> scores(particles());
+        std::vector<uint64_t> offsets;
+        offsets.reserve(frame_count);
+
+        for (uint32_t frame = 0; frame < frame_count; ++frame) {
+            float best_score = -std::numeric_limits<float>::infinity();
+            for (size_t island = 0; island < tracks.size(); ++island) {
+                const Track& island_track = tracks[island];
+                std::copy_n(island_track.frameValues(frame), island_values, current.begin() + island * island_values);
+                std::copy_n(island_track.frameScores(frame), particles_per_island, scores.begin() + island * particles_per_island);
+                best_score = std::max(best_score, island_track.bestScore(frame));
+            }
+
+            // The narrowest encoding that holds every difference; a keyframe when none does
+            FrameKind kind = KEYFRAME;
+            if (frame % keyframe_interval != 0) {
+                int32_t largest_delta = 0;
+                for (size_t i = 0; i < frame_values; ++i) {
+                    deltas[i] = valueDelta(previous[i], current[i], i % VALUES_PER_MODULE == 3);
+                    largest_delta = std::max(largest_delta, std::abs(deltas[i]));
+                }
+                if (largest_delta <= INT8_MAX) {
+                    kind = DELTA8;
+                } else if (largest_delta <= INT16_MAX) {
+                    kind = DELTA16;
+                }
+            }
+
+            offsets.push_back(static_cast<uint64_t>(out.tellp()));
+            put(out, static_cast<uint8_t>(kind));
+            const uint8_t padding[3] = {0, 0, 0};
+            out.write(reinterpret_cast<const char*>(padding), sizeof(padding));
+            put(out, frame);
+            put(out, best_score);
+            putArray(out, scores);
+            if (kind == DELTA8) {
+                for (size_t i = 0; i < frame_values; ++i) {
+                    values8[i] = static_cast<int8_t>(deltas[i]);
+                }
+                putArray(out, values8);
+            } else {
+                for (size_t i = 0; i < frame_values; ++i) {
+                    values16[i] = static_cast<int16_t>(kind == KEYFRAME ? current[i] : deltas[i]);
+                }
+                putArray(out, values16);
+            }
+            std::swap(current, previous);
+        }
+
+        const uint64_t index_offset = static_cast<uint64_t>(out.tellp());
+        putArray(out, offsets);
+        const size_t size = static_cast<size_t>(out.tellp());
+        out.seekp(0);
+        putHeader(out, frame_count, index_offset);
+        return out.good() ? size : 0;
+    }
+};
+}
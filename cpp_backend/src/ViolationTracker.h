@@ -1,29 +1,89 @@
 #pragma once
 
+#include <cstdint>
 #include <vector>
 #include <string>
 #include "Geometry.h"
+#include "ModuleCatalog.h"
 
+// A compact, fixed-size record of a single rule violation. No strings are stored here so
+// that the optimizer can record violations in its hot loop without touching the heap;
+// human-readable text is produced on demand by describeViolation().
 struct Violation {
-    enum class Type {
+    enum class Type : std::uint8_t {
         COLLISION,
         BOUNDS,
-        ADJACENCY_CLEAN_DIRTY,
-        ADJACENCY_QUIET_NOISY
+        ADJACENCY // Which rule is kept in `rule`
     };
 
+    // Which limit a BOUNDS violation exceeded.
+    enum class Bound : std::uint8_t {
+        NONE,
+        RADIUS,
+        HEIGHT
+    };
+
+    static constexpr int NO_OBJECT = -1;
+
     Type type;
-    size_t object1Index;
-    size_t object2Index;  // -1 if not applicable (e.g., bounds violation)
-    std::string description;
-    float severity;  // 0.0 to 1.0
+    Bound bound;
+    std::uint8_t rule; // Index into ModuleCatalog::rules, for ADJACENCY violations
+    int object1Index;
+    int object2Index;  // NO_OBJECT if not applicable (e.g., bounds violation)
+    float magnitude;   // Overlap volume (m³) for collisions, distance (m) otherwise
+    float severity;    // 0.0 to 1.0
+
+    // Returns the index of the other module involved, or NO_OBJECT.
+    int otherObject(int index) const {
+        return object1Index == index ? object2Index : object1Index;
+    }
 
-    Violation(Type t, size_t obj1, size_t obj2, const std::string& desc, float sev)
-        : type(t), object1Index(obj1), object2Index(obj2), description(desc), severity(sev) {}
+    bool involves(int index) const {
+        return object1Index == index || object2Index == index;
+    }
 };
 
+/**
+ * @brief Returns the serialized type of a violation; adjacency violations are named by their
+ * rule in the module catalog (e.g. "ADJACENCY_CLEAN_DIRTY").
+ */
+inline std::string violationTypeName(const Violation& v) {
+    switch (v.type) {
+        case Violation::Type::COLLISION: return "COLLISION";
+        case Violation::Type::BOUNDS: return "BOUNDS";
+        case Violation::Type::ADJACENCY: {
+            const auto& rules = ModuleCatalog::active().rules;
+            return v.rule < rules.size() ? rules[v.rule].violation : "ADJACENCY";
+        }
+        default: return "UNKNOWN";
+    }
+}
+
+/**
+ * @brief Builds the human-readable description of a violation.
+ * This allocates, so it should only be called when the final result is serialized.
+ */
+inline std::string describeViolation(const Violation& v) {
+    switch (v.type) {
+        case Violation::Type::COLLISION:
+            return "Module collision detected with " + std::to_string(v.magnitude) + " m³ overlap";
+        case Violation::Type::BOUNDS:
+            return std::string("Module extends beyond habitat ") +
+                   (v.bound == Violation::Bound::HEIGHT ? "height" : "radius") +
+                   " by " + std::to_string(v.magnitude) + " meters";
+        case Violation::Type::ADJACENCY: {
+            const auto& rules = ModuleCatalog::active().rules;
+            const std::string rule = v.rule < rules.size() ? rules[v.rule].description : "Modules too close";
+            return rule + " by " + std::to_string(v.magnitude) + " meters";
+        }
+        default:
+            return "Unknown violation";
+    }
+}
+
 class ViolationTracker {
 private:
+    // Cleared between evaluations but never shrunk, so the buffer is reused across iterations.
     std::vector<Violation> violations;
 
 public:
@@ -31,8 +91,13 @@ public:
         violations.clear();
     }
 
-    void addViolation(Violation::Type type, size_t obj1, size_t obj2, const std::string& description, float severity) {
-        violations.emplace_back(type, obj1, obj2, description, severity);
+    void reserve(size_t capacity) {
+        violations.reserve(capacity);
+    }
+
+    void addViolation(Violation::Type type, int obj1, int obj2, float magnitude, float severity,
+                      Violation::Bound bound = Violation::Bound::NONE, std::uint8_t rule = 0) {
+        violations.push_back(Violation{type, bound, rule, obj1, obj2, magnitude, severity});
     }
 
     const std::vector<Violation>& getViolations() const {
@@ -50,4 +115,4 @@ public:
         }
         return total;
     }
-};
\ No newline at end of file
+};
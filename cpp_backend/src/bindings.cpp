@@ -0,0 +1,264 @@
+// In-process Python bindings for the evaluator and optimizer (module name: habitat_core).
+//
+// Layout batches are read directly from NumPy's buffer: a C-contiguous float32 array of shape
+// (N_layouts, N_modules, 3) has exactly the memory layout of N_layouts * N_modules glm::vec3s,
+// so the evaluator walks it in place. The GIL is released while C++ runs.
+//
+// Example:
+//     import numpy as np, habitat_core
+//     names, scales, categories = habitat_core.mission_modules(crew_size=4)
+//     positions = np.random.uniform(-4, 4, (100000, len(names), 3)).astype(np.float32)
+//     scores = habitat_core.evaluate_layouts(positions, scales, categories)
+
+#include <algorithm>
+#include <memory>
+#include <stdexcept>
+#include <thread>
+#include <vector>
+
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+#include "Geometry.h"
+#include "LayoutState.h"
+#include "Evaluator.h"
+#include "Optimizer.h"
+#include "ModuleCatalog.h"
+#include "ModulePrototypes.h"
+
+namespace py = pybind11;
+
+static_assert(sizeof(glm::vec3) == 3 * sizeof(float), "glm::vec3 must be tightly packed to alias NumPy buffers");
+
+namespace {
+
+// Builds the shared module table from a (N_modules, 3) scale array and category names;
+// unknown names raise ValueError rather than silently scoring the module as NEUTRAL.
+ModuleTable makeModuleTable(const py::array_t<float, py::array::c_style | py::array::forcecast>& scales,
+                            const std::vector<std::string>& categories) {
+    if (scales.ndim() != 2 || scales.shape(1) != 3) {
+        throw std::invalid_argument("scales must have shape (N_modules, 3)");
+    }
+    if (static_cast<size_t>(scales.shape(0)) != categories.size()) {
+        throw std::invalid_argument("scales and categories must describe the same number of modules");
+    }
+
+    std::vector<HabitatObject> modules(categories.size());
+    auto s = scales.unchecked<2>();
+    for (size_t i = 0; i < modules.size(); ++i) {
+        modules[i].scale = glm::vec3(s(i, 0), s(i, 1), s(i, 2));
+        if (!parseCategory(categories[i], modules[i].category)) {
+            throw std::invalid_argument("Unknown module category '" + categories[i] +
+                                        "' (expected CLEAN, DIRTY, QUIET, NOISY or NEUTRAL)");
+        }
+    }
+    return ModuleTable::fromLayout(modules);
+}
+
+// Scores layouts [begin, end) of a (N, M, 3) position buffer. AABBs are derived into a scratch
+// buffer owned by the calling thread; positions are read in place.
+void evaluateRange(const glm::vec3* positions, size_t begin, size_t end, const ModuleTable& modules,
+                   const std::vector<double>& weights, double* scores) {
+    const size_t count = modules.size();
+    std::vector<glm::vec3> aabb_min(count);
+    std::vector<glm::vec3> aabb_max(count);
+    for (size_t layout = begin; layout < end; ++layout) {
+        const glm::vec3* layout_positions = positions + layout * count;
+        for (size_t i = 0; i < count; ++i) {
+            aabb_min[i] = layout_positions[i] - modules.half_extents[i];
+            aabb_max[i] = layout_positions[i] + modules.half_extents[i];
+        }
+        LayoutView view{layout_positions, aabb_min.data(), aabb_max.data(), count};
+        scores[layout] = Evaluator::evaluateLayout(view, modules, weights);
+    }
+}
+
+py::array_t<double> evaluateLayouts(const py::array_t<float, py::array::c_style>& positions,
+                                    const py::array_t<float, py::array::c_style | py::array::forcecast>& scales,
+                                    const std::vector<std::string>& categories,
+                                    const std::vector<double>& weights,
+                                    unsigned int num_threads) {
+    if (positions.ndim() != 3 || positions.shape(2) != 3) {
+        throw std::invalid_argument("positions must have shape (N_layouts, N_modules, 3)");
+    }
+    const ModuleTable modules = makeModuleTable(scales, categories);
+    if (static_cast<size_t>(positions.shape(1)) != modules.size()) {
+        throw std::invalid_argument("positions and scales must describe the same number of modules");
+    }
+    if (weights.empty()) {
+        throw std::invalid_argument("weights must not be empty");
+    }
+
+    const size_t num_layouts = static_cast<size_t>(positions.shape(0));
+    py::array_t<double> scores(static_cast<py::ssize_t>(num_layouts));
+    const glm::vec3* data = reinterpret_cast<const glm::vec3*>(positions.data());
+    double* out = scores.mutable_data();
+
+    if (num_threads == 0) {
+        num_threads = std::max(1u, std::thread::hardware_concurrency());
+    }
+    num_threads = static_cast<unsigned int>(std::min<size_t>(num_threads, std::max<size_t>(1, num_layouts)));
+
+    {
+        py::gil_scoped_release release;
+        if (num_threads == 1) {
+            evaluateRange(data, 0, num_layouts, modules, weights, out);
+        } else {
+            std::vector<std::thread> workers;
+            const size_t chunk = (num_layouts + num_threads - 1) / num_threads;
+            for (size_t begin = 0; begin < num_layouts; begin += chunk) {
+                const size_t end = std::min(num_layouts, begin + chunk);
+                workers.emplace_back(evaluateRange, data, begin, end, std::cref(modules), std::cref(weights), out);
+            }
+            for (auto& worker : workers) {
+                worker.join();
+            }
+        }
+    }
+    return scores;
+}
+
+py::dict evaluateLayout(const py::array_t<float, py::array::c_style>& positions,
+                        const py::array_t<float, py::array::c_style | py::array::forcecast>& scales,
+                        const std::vector<std::string>& categories,
+                        const std::vector<double>& weights) {
+    if (positions.ndim() != 2 || positions.shape(1) != 3) {
+        throw std::invalid_argument("positions must have shape (N_modules, 3)");
+    }
+    const ModuleTable modules = makeModuleTable(scales, categories);
+    if (static_cast<size_t>(positions.shape(0)) != modules.size()) {
+        throw std::invalid_argument("positions and scales must describe the same number of modules");
+    }
+
+    const size_t count = modules.size();
+    const glm::vec3* data = reinterpret_cast<const glm::vec3*>(positions.data());
+    std::vector<glm::vec3> aabb_min(count);
+    std::vector<glm::vec3> aabb_max(count);
+    ViolationTracker tracker;
+    ScoreTerms terms;
+    double score;
+    {
+        py::gil_scoped_release release;
+        for (size_t i = 0; i < count; ++i) {
+            aabb_min[i] = data[i] - modules.half_extents[i];
+            aabb_max[i] = data[i] + modules.half_extents[i];
+        }
+        LayoutView view{data, aabb_min.data(), aabb_max.data(), count};
+        terms = Evaluator::scoreTerms(view, modules, &tracker);
+        score = terms.weighted(weights);
+    }
+
+    py::list violations;
+    for (const auto& v : tracker.getViolations()) {
+        py::dict violation;
+        violation["type"] = violationTypeName(v);
+        violation["object1"] = v.object1Index;
+        violation["object2"] = v.object2Index;
+        violation["severity"] = v.severity;
+        violation["description"] = describeViolation(v);
+        violations.append(violation);
+    }
+
+    py::dict score_terms;
+    for (size_t term = 0; term < ScoreTerms::COUNT; ++term) {
+        score_terms[ScoreTerms::name(term)] = terms[term];
+    }
+
+    py::dict result;
+    result["score"] = score;
+    result["score_terms"] = score_terms;
+    result["violations"] = violations;
+    return result;
+}
+
+py::tuple findBestLayout(const py::array_t<float, py::array::c_style | py::array::forcecast>& scales,
+                         const std::vector<std::string>& categories,
+                         int iterations,
+                         int num_particles,
+                         const std::string& trajectory_path) {
+    const ModuleTable modules = makeModuleTable(scales, categories);
+    std::vector<HabitatObject> initial_layout(modules.size());
+    for (size_t i = 0; i < initial_layout.size(); ++i) {
+        initial_layout[i].scale = modules.scales[i];
+        initial_layout[i].category = modules.categories[i];
+    }
+
+    std::vector<HabitatObject> best;
+    double score;
+    size_t trajectory_bytes = 0;
+    {
+        py::gil_scoped_release release;
+        std::unique_ptr<Trajectory::Recorder> recorder;
+        if (!trajectory_path.empty()) {
+            recorder = std::make_unique<Trajectory::Recorder>(1, num_particles, initial_layout.size(), iterations);
+        }
+        // Positions are returned on their own, so modules stay axis-aligned
+        best = Optimizer::findBestLayout(initial_layout, iterations, num_particles, false, recorder.get());
+        score = Evaluator::evaluateLayout(best, {1.0});
+        if (recorder) {
+            trajectory_bytes = recorder->write(trajectory_path);
+        }
+    }
+    if (!trajectory_path.empty() && trajectory_bytes == 0) {
+        throw std::runtime_error("Could not write the trajectory to " + trajectory_path);
+    }
+
+    py::array_t<float> positions({static_cast<py::ssize_t>(best.size()), static_cast<py::ssize_t>(3)});
+    auto p = positions.mutable_unchecked<2>();
+    for (size_t i = 0; i < best.size(); ++i) {
+        p(i, 0) = best[i].position.x;
+        p(i, 1) = best[i].position.y;
+        p(i, 2) = best[i].position.z;
+    }
+    return py::make_tuple(positions, score);
+}
+
+py::tuple missionModules(int crew_size) {
+    const auto modules = Optimizer::select_modules_for_mission(crew_size, ModuleCatalog::active());
+    std::vector<std::string> names;
+    std::vector<std::string> categories;
+    py::array_t<float> scales({static_cast<py::ssize_t>(modules.size()), static_cast<py::ssize_t>(3)});
+    auto s = scales.mutable_unchecked<2>();
+    for (size_t i = 0; i < modules.size(); ++i) {
+        names.push_back(modules[i].name);
+        categories.push_back(categoryName(modules[i].category));
+        s(i, 0) = modules[i].scale.x;
+        s(i, 1) = modules[i].scale.y;
+        s(i, 2) = modules[i].scale.z;
+    }
+    return py::make_tuple(names, scales, categories);
+}
+
+} // namespace
+
+PYBIND11_MODULE(habitat_core, m) {
+    m.doc() = "In-process access to the habitat layout evaluator and PSO optimizer.";
+
+    m.def("load_module_catalog", [](const std::string& path) { ModuleCatalog::setActive(ModuleCatalog::load(path)); },
+          py::arg("path"),
+          "Replaces the module catalog (by default the build's schemas/module_definitions.json).\n"
+          "Module tables built afterwards use its adjacency rules; call it before optimizing.");
+
+    m.def("mission_modules", &missionModules, py::arg("crew_size"),
+          "Returns (names, scales, categories) of the modules selected for a crew size.");
+
+    m.def("evaluate_layouts", &evaluateLayouts,
+          py::arg("positions").noconvert(), py::arg("scales"), py::arg("categories"),
+          py::arg("weights") = std::vector<double>{1.0}, py::arg("num_threads") = 0u,
+          "Scores a batch of layouts.\n\n"
+          "positions must be a C-contiguous float32 array of shape (N_layouts, N_modules, 3); it is read\n"
+          "in place. Returns a float64 array of N_layouts scores. num_threads=0 uses every core.\n"
+          "weights are the compactness, collision, bounds and adjacency weights; missing trailing weights are 1.");
+
+    m.def("evaluate_layout", &evaluateLayout,
+          py::arg("positions").noconvert(), py::arg("scales"), py::arg("categories"),
+          py::arg("weights") = std::vector<double>{1.0},
+          "Scores one (N_modules, 3) float32 layout and returns {'score', 'score_terms', 'violations'}.");
+
+    m.def("find_best_layout", &findBestLayout,
+          py::arg("scales"), py::arg("categories"), py::arg("iterations") = 500, py::arg("num_particles") = 30,
+          py::arg("trajectory_path") = std::string(),
+          "Runs the particle swarm optimizer with axis-aligned modules and returns (positions, score).\n"
+          "With a trajectory_path, every iteration is recorded there for visual_generation.trajectory.");
+}
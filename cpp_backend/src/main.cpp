@@ -1,4 +1,6 @@
+#include <chrono>
 #include <iostream>
+#include <memory>
 #include <vector>
 #include <string>
 
@@ -7,46 +9,12 @@
 #include <nlohmann/json.hpp>
 
 #include "Geometry.h"
+#include "Circulation.h"
 #include "Optimizer.h"
 #include "ModulePrototypes.h" // Include the new module library
 
 using json = nlohmann::json;
 
-// Part 2: Intelligent Module Generation
-std::vector<HabitatObject> select_modules_for_mission(int crew_size, const std::map<int, Optimizer::ModulePrototype>& prototypes) {
-    std::vector<HabitatObject> selected_modules;
-
-    // Core modules always included
-    selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(3))); // Galley
-    selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(4))); // Gym
-    selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(5))); // Waste Management
-    selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(6))); // Work Area
-    selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(7))); // Medical Bay
-
-    // Add modules based on crew size
-    int num_private_quarters = std::max(1, crew_size / 2);
-    for (int i = 0; i < num_private_quarters; ++i) {
-        selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(1)));
-    }
-
-    int num_washrooms = std::max(1, crew_size / 4);
-    for (int i = 0; i < num_washrooms; ++i) {
-        selected_modules.push_back(Optimizer::create_module_from_prototype(prototypes.at(2)));
-    }
-    
-    // Assign unique names
-    std::map<std::string, int> name_counts;
-    for (auto& mod : selected_modules) {
-        name_counts[mod.name]++;
-        if (name_counts[mod.name] > 1) {
-            mod.name += "_" + std::to_string(name_counts[mod.name] -1);
-        }
-    }
-
-    return selected_modules;
-}
-
-
 // Helper function to organize modules into levels
 struct Level {
     float min_z;
@@ -93,6 +61,30 @@ std::vector<Level> organize_into_levels(const std::vector<HabitatObject>& layout
     return levels;
 }
 
+// Helper function with the basic information of a single module
+json module_to_json(const HabitatObject& obj, size_t index) {
+    json module_json;
+    module_json["index"] = index;
+    module_json["name"] = obj.name;
+    module_json["position"] = {
+        {"x", obj.position.x},
+        {"y", obj.position.y},
+        {"z", obj.position.z}
+    };
+    module_json["rotation_degrees"] = {
+        {"x", obj.rotation_degrees.x},
+        {"y", obj.rotation_degrees.y},
+        {"z", obj.rotation_degrees.z}
+    };
+    module_json["scale"] = {
+        {"x", obj.scale.x},
+        {"y", obj.scale.y},
+        {"z", obj.scale.z}
+    };
+    module_json["category"] = categoryName(obj.category);
+    return module_json;
+}
+
 json level_to_json(const Level& level, const std::vector<HabitatObject>& layout) {
     json level_json;
     level_json["min_z"] = level.min_z;
@@ -100,30 +92,7 @@ json level_to_json(const Level& level, const std::vector<HabitatObject>& layout)
     
     json modules = json::array();
     for (size_t idx : level.module_indices) {
-        const auto& obj = layout[idx];
-        json module_json;
-        module_json["index"] = idx;
-        module_json["name"] = obj.name;
-        module_json["position"] = {
-            {"x", obj.position.x},
-            {"y", obj.position.y},
-            {"z", obj.position.z}
-        };
-        module_json["scale"] = {
-            {"x", obj.scale.x},
-            {"y", obj.scale.y},
-            {"z", obj.scale.z}
-        };
-        module_json["category"] = [&obj]() {
-            switch (obj.category) {
-                case ModuleCategory::CLEAN: return "CLEAN";
-                case ModuleCategory::DIRTY: return "DIRTY";
-                case ModuleCategory::QUIET: return "QUIET";
-                case ModuleCategory::NOISY: return "NOISY";
-                default: return "NEUTRAL";
-            }
-        }();
-        modules.push_back(module_json);
+        modules.push_back(module_to_json(layout[idx], idx));
     }
     level_json["modules"] = modules;
     
@@ -136,18 +105,10 @@ json violations_to_json(const std::vector<Violation>& violations) {
     
     for (const auto& v : violations) {
         json violation;
-        violation["type"] = [&]() {
-            switch (v.type) {
-                case Violation::Type::COLLISION: return "COLLISION";
-                case Violation::Type::BOUNDS: return "BOUNDS";
-                case Violation::Type::ADJACENCY_CLEAN_DIRTY: return "ADJACENCY_CLEAN_DIRTY";
-                case Violation::Type::ADJACENCY_QUIET_NOISY: return "ADJACENCY_QUIET_NOISY";
-                default: return "UNKNOWN";
-            }
-        }();
+        violation["type"] = violationTypeName(v);
         violation["object1"] = v.object1Index;
         violation["object2"] = v.object2Index;
-        violation["description"] = v.description;
+        violation["description"] = describeViolation(v);
         violation["severity"] = v.severity;
         violations_json.push_back(violation);
     }
@@ -155,6 +116,155 @@ json violations_to_json(const std::vector<Violation>& violations) {
     return violations_json;
 }
 
+// Helper function to summarize violations by type, with overall totals
+json violation_summary_to_json(const ViolationTracker& tracker) {
+    json violation_summary;
+    std::map<std::string, int> violation_counts;
+    std::map<std::string, float> max_severities;
+    
+    for (const auto& v : tracker.getViolations()) {
+        std::string type = violationTypeName(v);
+        violation_counts[type]++;
+        max_severities[type] = std::max(max_severities[type], v.severity);
+    }
+    
+    for (const auto& [type, count] : violation_counts) {
+        violation_summary[type] = {
+            {"count", count},
+            {"max_severity", max_severities[type]}
+        };
+    }
+    violation_summary["total_violations"] = tracker.getViolationCount();
+    violation_summary["total_severity"] = tracker.getTotalSeverity();
+    return violation_summary;
+}
+
+// Helper function to build the per-module array, with each module's level and violations
+json layout_modules_to_json(const std::vector<HabitatObject>& layout, const std::vector<Level>& levels, const ViolationTracker& tracker) {
+    json modules_array = json::array();
+    for (size_t i = 0; i < layout.size(); i++) {
+        json module_data = module_to_json(layout[i], i);
+
+        // Add level information
+        for (size_t level_idx = 0; level_idx < levels.size(); level_idx++) {
+            if (std::find(levels[level_idx].module_indices.begin(),
+                         levels[level_idx].module_indices.end(), i) != levels[level_idx].module_indices.end()) {
+                module_data["level"] = level_idx;
+                module_data["level_height"] = {
+                    {"min", levels[level_idx].min_z},
+                    {"max", levels[level_idx].max_z}
+                };
+                break;
+            }
+        }
+
+        // Add violation information specific to this module
+        json module_violations = json::array();
+        for (const auto& v : tracker.getViolations()) {
+            if (v.involves(static_cast<int>(i))) {
+                json violation_data = {
+                    {"type", violationTypeName(v)},
+                    {"severity", v.severity},
+                    {"description", describeViolation(v)}
+                };
+                
+                violation_data["other_module"] = v.otherObject(static_cast<int>(i));
+                
+                module_violations.push_back(violation_data);
+            }
+        }
+        module_data["violations"] = module_violations;
+        
+        modules_array.push_back(module_data);
+    }
+    return modules_array;
+}
+
+// Helper function to convert the unweighted score terms of a layout to JSON
+json score_terms_to_json(const ScoreTerms& terms) {
+    json terms_json;
+    for (size_t term = 0; term < ScoreTerms::COUNT; term++) {
+        terms_json[ScoreTerms::name(term)] = terms[term];
+    }
+    return terms_json;
+}
+
+// Helper function to convert the candidate pool to compact JSON arrays, one row per layout,
+// so that the layouts can be re-ranked under other weights without re-running the optimizer
+json candidate_pool_to_json(const std::vector<LayoutCandidate>& pool) {
+    json term_names = json::array();
+    for (size_t term = 0; term < ScoreTerms::COUNT; term++) {
+        term_names.push_back(ScoreTerms::name(term));
+    }
+    json scores = json::array();
+    json terms = json::array();
+    json positions = json::array();
+    json yaw_degrees = json::array();
+    for (const auto& candidate : pool) {
+        scores.push_back(candidate.score);
+        json row = json::array();
+        for (size_t term = 0; term < ScoreTerms::COUNT; term++) {
+            row.push_back(candidate.terms[term]);
+        }
+        terms.push_back(row);
+        json layout_positions = json::array();
+        json layout_yaw = json::array();
+        for (size_t i = 0; i < candidate.positions.size(); i++) {
+            layout_positions.push_back({candidate.positions[i].x, candidate.positions[i].y, candidate.positions[i].z});
+            layout_yaw.push_back(glm::degrees(candidate.yaw[i]));
+        }
+        positions.push_back(layout_positions);
+        yaw_degrees.push_back(layout_yaw);
+    }
+    return {
+        {"term_names", term_names},
+        {"scores", scores},
+        {"terms", terms},
+        {"positions", positions},
+        {"yaw_degrees", yaw_degrees}
+    };
+}
+
+// Distances and widths of -1 (not reachable) are written as null
+json meters_or_null(float value) {
+    return value < 0.0f ? json(nullptr) : json(value);
+}
+
+// Helper function to convert a circulation analysis to JSON
+json circulation_to_json(const Circulation::CirculationReport& report, const Circulation::OccupancyGrid& grid,
+                         const std::vector<HabitatObject>& layout) {
+    json modules = json::array();
+    json distances = json::array();
+    for (size_t i = 0; i < layout.size(); i++) {
+        const auto& access = report.modules[i];
+        modules.push_back({
+            {"index", i},
+            {"name", layout[i].name},
+            {"reachable", access.reachable},
+            {"egress_distance_m", meters_or_null(access.egress_distance)},
+            {"corridor_width_m", meters_or_null(access.corridor_width)}
+        });
+        json row = json::array();
+        for (float distance : report.walking_distances[i]) {
+            row.push_back(meters_or_null(distance));
+        }
+        distances.push_back(row);
+    }
+
+    return {
+        {"cell_size_m", grid.cellSize()},
+        {"grid_cells", {grid.nx(), grid.ny(), grid.nz()}},
+        {"egress_point", {{"x", report.egress_point.x}, {"y", report.egress_point.y}, {"z", report.egress_point.z}}},
+        {"egress_reachable", report.egress_reachable},
+        {"free_volume_m3", report.free_volume},
+        {"walkable_volume_m3", report.walkable_volume},
+        {"min_corridor_width_m", meters_or_null(report.min_corridor_width)},
+        {"unreachable_modules", report.unreachable_modules},
+        {"modules", modules},
+        {"walking_distances_m", distances}
+    };
+}
+
 int main() {
     // 1. Read all input from stdin
     std::string input_str;
@@ -181,20 +291,89 @@ int main() {
     int mission_days = input_json["habitat"]["mission_days"];
     std::string material = input_json["habitat"]["habitat_material"];
 
-    // Get the module library
-    auto module_prototypes = Optimizer::get_module_prototypes();
+    // Load the module library and adjacency rules, shared with the Python frontend.
+    // Every later evaluation reads this catalog, so it is installed before anything runs.
+    std::string catalog_path = input_json.value("module_catalog", std::string(HABITAT_MODULE_CATALOG));
+    try {
+        ModuleCatalog::setActive(ModuleCatalog::load(catalog_path));
+    } catch (const std::exception& e) {
+        json error_output;
+        error_output["status"] = "error";
+        error_output["message"] = e.what();
+        std::cout << error_output.dump(4) << std::endl;
+        return 1;
+    }
 
     // Create an initial layout based on parameters
-    std::vector<HabitatObject> initial_layout = select_modules_for_mission(crew_size, module_prototypes);
-
+    std::vector<HabitatObject> initial_layout = Optimizer::select_modules_for_mission(crew_size, ModuleCatalog::active());
+
+
+    // Optional request for alternative layouts: {"alternatives": {"count": K, "min_distance_m": d}}
+    Optimizer::OptimizerOptions options;
+    options.iterations = 500;
+    json alternatives_request = input_json.value("alternatives", json::object());
+    options.top_k = alternatives_request.value("count", 1);
+    options.min_distance = alternatives_request.value("min_distance_m", 1.0f);
+    // Modules may be turned about the vertical axis unless the request pins them axis-aligned
+    options.optimize_rotation = input_json.value("optimize_rotation", true);
+    // Optional island model: {"islands": {"count": N, "migration_interval": M}}
+    json islands_request = input_json.value("islands", json::object());
+    options.islands = islands_request.value("count", 1);
+    options.migration_interval = islands_request.value("migration_interval", 25);
+    // Optional upper-bound pre-screening of candidates before their exact evaluation
+    options.surrogate_screening = input_json.value("surrogate_screening", false);
+    // Optional start inside the habitat (Halton sample by level) and repair of moves that leave it
+    options.feasible_initialization = input_json.value("feasible_initialization", false);
+    options.repair_bounds = input_json.value("repair_bounds", false);
+    // Optional score weights by term name, e.g. {"weights": {"compactness": 2.0, "adjacency": 0.5}};
+    // terms that are left out keep a weight of 1
+    json weights_request = input_json.value("weights", json::object());
+    options.weights.assign(ScoreTerms::COUNT, 1.0);
+    for (size_t term = 0; term < ScoreTerms::COUNT; term++) {
+        options.weights[term] = weights_request.value(ScoreTerms::name(term), 1.0);
+        if (options.weights[term] < 0.0) {
+            // Negative weights would turn penalties into rewards and break the upper-bound screening
+            json error_output;
+            error_output["status"] = "error";
+            error_output["message"] = std::string("Weight of '") + ScoreTerms::name(term) + "' must not be negative";
+            std::cout << error_output.dump(4) << std::endl;
+            return 1;
+        }
+    }
+    // Optional pool of stored layouts for re-ranking: {"candidate_pool": {"size": N}}
+    options.candidate_pool = input_json.value("candidate_pool", json::object()).value("size", 0);
+    // Optional circulation settings: {"circulation": {"cell_size_m": s, "egress": {"x": .., "y": .., "z": ..}}}
+    json circulation_request = input_json.value("circulation", json::object());
+    float circulation_cell_size = circulation_request.value("cell_size_m", Circulation::DEFAULT_CELL_SIZE);
+    json egress_request = circulation_request.value("egress", json::object());
+    // By default the crew leave through a hatch in the wall at floor level
+    glm::vec3 egress_point(egress_request.value("x", Evaluator::HABITAT_RADIUS),
+                           egress_request.value("y", 0.0f),
+                           egress_request.value("z", 0.0f));
+
+    // Optional recording of every iteration for replay: {"trajectory": {"path": p, "keyframe_interval": k}}
+    json trajectory_request = input_json.value("trajectory", json::object());
+    std::string trajectory_path = trajectory_request.value("path", std::string());
+    std::unique_ptr<Trajectory::Recorder> trajectory_recorder;
+    if (!trajectory_path.empty()) {
+        trajectory_recorder = std::make_unique<Trajectory::Recorder>(
+            std::max(1, options.islands), options.num_particles, initial_layout.size(), options.iterations,
+            trajectory_request.value("keyframe_interval", Trajectory::DEFAULT_KEYFRAME_INTERVAL));
+    }
 
     // 4. Run the optimization process with violation tracking
     ViolationTracker violation_tracker;
-    std::vector<HabitatObject> final_layout = Optimizer::findBestLayout(initial_layout, 500);
+    Optimizer::OptimizerStats optimizer_stats;
+    std::vector<LayoutCandidate> candidate_pool;
+    auto optimization_start = std::chrono::steady_clock::now();
+    std::vector<LayoutCandidate> candidates = Optimizer::findDiverseLayouts(initial_layout, options, &optimizer_stats,
+                                                                            &candidate_pool, trajectory_recorder.get());
+    const double optimization_ms =
+        std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - optimization_start).count();
+    std::vector<HabitatObject> final_layout = Optimizer::toLayout(initial_layout, candidates.front());
     
     // Evaluate the final layout to get violations
-    std::vector<double> weights = {1.0}; // Default weights
-    Evaluator::evaluateLayout(final_layout, weights, &violation_tracker);
+    Evaluator::evaluateLayout(final_layout, options.weights, &violation_tracker);
 
     // NOTE: Off-screen rendering would happen here.
     // This was a placeholder and is no longer needed, as the frontend will draw the SVG.
@@ -224,108 +403,37 @@ int main() {
     output_json["violations"] = violations;
     
     // Add violation summary by type
-    json violation_summary;
-    std::map<std::string, int> violation_counts;
-    std::map<std::string, float> max_severities;
-    
-    for (const auto& v : violation_tracker.getViolations()) {
-        std::string type;
-        switch (v.type) {
-            case Violation::Type::COLLISION: type = "COLLISION"; break;
-            case Violation::Type::BOUNDS: type = "BOUNDS"; break;
-            case Violation::Type::ADJACENCY_CLEAN_DIRTY: type = "ADJACENCY_CLEAN_DIRTY"; break;
-            case Violation::Type::ADJACENCY_QUIET_NOISY: type = "ADJACENCY_QUIET_NOISY"; break;
-            default: type = "UNKNOWN"; break;
-        }
-        violation_counts[type]++;
-        max_severities[type] = std::max(max_severities[type], v.severity);
-    }
-    
-    for (const auto& [type, count] : violation_counts) {
-        violation_summary[type] = {
-            {"count", count},
-            {"max_severity", max_severities[type]}
-        };
+    output_json["violation_summary"] = violation_summary_to_json(violation_tracker);
+
+    // Add the weights the layout was optimized under and its unweighted score terms
+    for (size_t term = 0; term < ScoreTerms::COUNT; term++) {
+        output_json["weights"][ScoreTerms::name(term)] = options.weights[term];
     }
-    output_json["violation_summary"] = violation_summary;
-    output_json["violation_summary"] = {
-        {"total_violations", violation_tracker.getViolationCount()},
-        {"total_severity", violation_tracker.getTotalSeverity()}
+    output_json["score"] = candidates.front().score;
+    output_json["score_terms"] = score_terms_to_json(candidates.front().terms);
+
+    // Add evaluation counts and convergence figures, so the effect of surrogate pre-screening and of
+    // the feasible-region start and repair can be measured
+    output_json["optimizer_stats"] = {
+        {"surrogate_screening", options.surrogate_screening},
+        {"feasible_initialization", options.feasible_initialization},
+        {"repair_bounds", options.repair_bounds},
+        {"islands", options.islands},
+        {"optimization_ms", optimization_ms},
+        {"candidates", optimizer_stats.candidates},
+        {"exact_evaluations", optimizer_stats.exact_evaluations},
+        {"screened_out", optimizer_stats.screened_out},
+        {"improvements", optimizer_stats.improvements},
+        {"surrogate_hit_rate", optimizer_stats.surrogateHitRate()},
+        {"exact_evaluation_savings", optimizer_stats.exactEvaluationSavings()},
+        {"repairs", optimizer_stats.repairs},
+        {"first_in_bounds_iteration", optimizer_stats.first_in_bounds_iteration},
+        {"first_violation_free_iteration", optimizer_stats.first_violation_free_iteration}
     };
 
     // Add module details and sizes
-    json modules_array = json::array();
-    for (size_t i = 0; i < final_layout.size(); i++) {
-        const auto& obj = final_layout[i];
-        json module_data;
-        
-        // Basic module information
-        module_data["index"] = i;
-        module_data["name"] = obj.name;
-        module_data["position"] = {
-            {"x", obj.position.x},
-            {"y", obj.position.y},
-            {"z", obj.position.z}
-        };
-        module_data["scale"] = {
-            {"x", obj.scale.x},
-            {"y", obj.scale.y},
-            {"z", obj.scale.z}
-        };
-        module_data["category"] = [&]() {
-            switch (obj.category) {
-                case ModuleCategory::CLEAN: return "CLEAN";
-                case ModuleCategory::DIRTY: return "DIRTY";
-                case ModuleCategory::QUIET: return "QUIET";
-                case ModuleCategory::NOISY: return "NOISY";
-                default: return "NEUTRAL";
-            }
-        }();
-
-        // Add level information
-        for (size_t level_idx = 0; level_idx < levels.size(); level_idx++) {
-            if (std::find(levels[level_idx].module_indices.begin(),
-                         levels[level_idx].module_indices.end(), i) != levels[level_idx].module_indices.end()) {
-                module_data["level"] = level_idx;
-                module_data["level_height"] = {
-                    {"min", levels[level_idx].min_z},
-                    {"max", levels[level_idx].max_z}
-                };
-                break;
-            }
-        }
-
-        // Add violation information specific to this module
-        json module_violations = json::array();
-        for (const auto& v : violation_tracker.getViolations()) {
-            if (v.object1Index == i || v.object2Index == i) {
-                json violation_data = {
-                    {"type", [&v]() {
-                        switch (v.type) {
-                            case Violation::Type::COLLISION: return "COLLISION";
-                            case Violation::Type::BOUNDS: return "BOUNDS";
-                            case Violation::Type::ADJACENCY_CLEAN_DIRTY: return "ADJACENCY_CLEAN_DIRTY";
-                            case Violation::Type::ADJACENCY_QUIET_NOISY: return "ADJACENCY_QUIET_NOISY";
-                            default: return "UNKNOWN";
-                        }
-                    }()},
-                    {"severity", v.severity},
-                    {"description", v.description}
-                };
-                
-                if (v.object1Index == i) {
-                    violation_data["other_module"] = v.object2Index;
-                } else {
-                    violation_data["other_module"] = v.object1Index;
-                }
-                
-                module_violations.push_back(violation_data);
-            }
-        }
-        module_data["violations"] = module_violations;
-        
-        modules_array.push_back(module_data);
-
+    json modules_array = layout_modules_to_json(final_layout, levels, violation_tracker);
+    for (const auto& obj : final_layout) {
         // Add size information for the frontend
         output_json["module_sizes"][obj.name] = {
             {"area_m2", obj.scale.x * obj.scale.y},
@@ -336,6 +444,62 @@ int main() {
         };
     }
 
+    output_json["modules"] = modules_array;
+
+    // Check that the crew can walk from every module to the others and out of the habitat
+    auto circulation_start = std::chrono::steady_clock::now();
+    Circulation::OccupancyGrid occupancy(glm::vec3(-Evaluator::HABITAT_RADIUS, -Evaluator::HABITAT_RADIUS, 0.0f),
+                                         glm::vec3(Evaluator::HABITAT_RADIUS, Evaluator::HABITAT_RADIUS, Evaluator::HABITAT_HEIGHT),
+                                         circulation_cell_size, Evaluator::HABITAT_RADIUS);
+    occupancy.build(final_layout);
+    Circulation::CirculationReport circulation = Circulation::analyzeCirculation(occupancy, final_layout, egress_point);
+    output_json["circulation"] = circulation_to_json(circulation, occupancy, final_layout);
+    output_json["circulation"]["analysis_ms"] =
+        std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - circulation_start).count();
+
+    // Add the alternative layouts, best first; the first one is the layout above
+    if (options.top_k > 1) {
+        json alternatives = json::array();
+        for (size_t rank = 0; rank < candidates.size(); rank++) {
+            std::vector<HabitatObject> alternative_layout = Optimizer::toLayout(initial_layout, candidates[rank]);
+            auto alternative_levels = organize_into_levels(alternative_layout);
+            const ViolationTracker& alternative_violations = candidates[rank].violations;
+            alternatives.push_back({
+                {"rank", rank},
+                {"score", candidates[rank].score},
+                {"score_terms", score_terms_to_json(candidates[rank].terms)},
+                {"modules", layout_modules_to_json(alternative_layout, alternative_levels, alternative_violations)},
+                {"violations", violations_to_json(alternative_violations.getViolations())},
+                {"violation_summary", violation_summary_to_json(alternative_violations)}
+            });
+        }
+        output_json["alternatives"] = alternatives;
+    }
+
+    // Add the stored layouts for re-ranking (see visual_generation/reranking.py)
+    if (options.candidate_pool > 0) {
+        output_json["candidate_pool"] = candidate_pool_to_json(candidate_pool);
+    }
+
+    // Write the recorded trajectory (see visual_generation/trajectory.py); a failed write
+    // is reported but does not fail the layout
+    if (trajectory_recorder) {
+        auto write_start = std::chrono::steady_clock::now();
+        size_t trajectory_bytes = trajectory_recorder->write(trajectory_path);
+        output_json["trajectory"] = {
+            {"path", trajectory_path},
+            {"frames", trajectory_recorder->frameCount()},
+            {"islands", std::max(1, options.islands)},
+            {"particles", trajectory_recorder->particles()},
+            {"bytes", trajectory_bytes},
+            {"raw_bytes", trajectory_recorder->rawSize()},
+            {"write_ms", std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - write_start).count()}
+        };
+        if (trajectory_bytes == 0) {
+            output_json["trajectory"]["error"] = "Could not write " + trajectory_path;
+        }
+    }
+
     // Add habitat dimensions based on the final layout
     float min_z = std::numeric_limits<float>::max();
     float max_z = std::numeric_limits<float>::lowest();
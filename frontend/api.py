@@ -0,0 +1,76 @@
+"""
+JSON endpoints next to the UI pages. They submit and track layout jobs through the same
+scheduler as the parameters page, and expose server health for load testing
+(see tools/load_test.py).
+"""
+import os
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from nicegui import app
+
+from frontend.server_metrics import lag_monitor, process_metrics
+from visual_generation.job_queue import PRIORITY_INTERACTIVE, QueueFullError, get_scheduler
+from visual_generation.schema_utils import validate_parameters
+
+# Comma-separated addresses of reverse proxies (or load generators) that may name the user a job
+# is submitted for with the X-User-Id header; e.g. HABITAT_TRUSTED_PROXIES=127.0.0.1
+TRUSTED_PROXIES = frozenset(
+    address.strip() for address in os.environ.get('HABITAT_TRUSTED_PROXIES', '').split(',') if address.strip()
+)
+
+
+def job_user_id(request):
+    """
+    Returns the user a submitted job counts against for the per-user running limit: the client's
+    address, or the X-User-Id header when the request comes from a trusted proxy. Clients can
+    choose the header freely, so honouring it from anyone would let them sidestep the limit.
+    """
+    address = request.client.host if request.client else 'unknown'
+    user_id = request.headers.get('X-User-Id')
+    if user_id and address in TRUSTED_PROXIES:
+        return user_id
+    return address
+
+
+def register_api_routes():
+    """Registers the /api routes and starts the event-loop lag monitor."""
+    # Imported here, like the pages in Main.define_routes, to avoid UI work at import time
+    from frontend.pages.page_2_params import LAYOUT_OPTIONS
+
+    lag_monitor.start()
+
+    @app.post('/api/jobs')
+    async def submit_job(request: Request):
+        """Validates habitat parameters and queues a layout job, as the Generate button does."""
+        try:
+            parameters = await request.json()
+        except ValueError:  # Includes json.JSONDecodeError, and bodies that are not UTF-8
+            return JSONResponse({'error': 'The request body is not valid JSON.'}, status_code=400)
+        is_valid, message = validate_parameters(parameters)
+        if not is_valid:
+            return JSONResponse({'error': message}, status_code=422)
+
+        try:
+            job_id = get_scheduler().submit(parameters, user_id=job_user_id(request), priority=PRIORITY_INTERACTIVE,
+                                            options=LAYOUT_OPTIONS)
+        except QueueFullError as e:
+            return JSONResponse({'error': str(e)}, status_code=429)
+        return {'job_id': job_id, 'result_url': f'/result/{job_id}'}
+
+    @app.get('/api/jobs/{job_id}')
+    def job_status(job_id: str):
+        """Returns a job's status and queue position."""
+        status = get_scheduler().get_status(job_id)
+        if status is None:
+            return JSONResponse({'error': f'Unknown job {job_id}'}, status_code=404)
+        return status
+
+    @app.get('/api/stats')
+    def server_stats():
+        """Returns queue depth, event-loop lag and process figures."""
+        return {
+            'scheduler': get_scheduler().stats(),
+            'event_loop_lag': lag_monitor.snapshot(),
+            'process': process_metrics(),
+        }
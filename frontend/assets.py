@@ -0,0 +1,46 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from nicegui import app, ui
+
+STATIC_DIR = Path(__file__).parent / 'static'
+# Asset URLs change whenever the files do, so browsers may cache them indefinitely
+CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@lru_cache(maxsize=None)
+def asset_fingerprint():
+    """Returns a short content hash over every file in the static directory."""
+    digest = hashlib.sha256()
+    for path in sorted(STATIC_DIR.rglob('*')):
+        if path.is_file():
+            digest.update(path.relative_to(STATIC_DIR).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def asset_url(filename):
+    """Returns the fingerprinted URL of a file in frontend/static."""
+    return f'/assets/{asset_fingerprint()}/{filename}'
+
+
+def register_static_assets():
+    """Serves frontend/static under a fingerprinted path with long-lived cache headers."""
+    app.add_static_files(f'/assets/{asset_fingerprint()}', str(STATIC_DIR), max_cache_age=CACHE_MAX_AGE)
+
+
+def use_assets(*filenames):
+    """
+    Adds <link>/<script> tags for the given static files to the current page.
+    Only the tags are sent with each page; the files themselves come from the browser cache.
+    """
+    tags = []
+    for filename in filenames:
+        if filename.endswith('.css'):
+            tags.append(f'<link rel="stylesheet" href="{asset_url(filename)}">')
+        elif filename.endswith('.js'):
+            tags.append(f'<script defer src="{asset_url(filename)}"></script>')
+        else:
+            raise ValueError(f'Unsupported asset type: {filename}')
+    ui.add_head_html('\n'.join(tags))
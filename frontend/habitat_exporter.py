@@ -3,7 +3,72 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.lib import colors
 import json
+import math
 import os
+import struct
+import numpy as np
+
+CATEGORY_COLORS = {
+    'CLEAN': '#90EE90',
+    'DIRTY': '#FFB6C1',
+    'QUIET': '#E6E6FA',
+    'NOISY': '#FFA07A',
+    'NEUTRAL': '#ADD8E6'
+}
+
+# glTF constants
+GLB_MAGIC = 0x46546C67  # 'glTF'
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+GL_ARRAY_BUFFER = 34962
+GL_ELEMENT_ARRAY_BUFFER = 34963
+GL_FLOAT = 5126
+GL_UNSIGNED_SHORT = 5123
+SHELL_SEGMENTS = 48
+
+
+def _hex_to_linear_rgba(hex_color, alpha=1.0):
+    """Converts an sRGB hex color to the linear RGBA factors glTF materials expect."""
+    srgb = [int(hex_color[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+    return [c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4 for c in srgb] + [alpha]
+
+
+def _unit_box():
+    """Positions, normals and indices of a unit cube centered on the origin (4 vertices per face)."""
+    positions, normals, indices = [], [], []
+    for axis in range(3):
+        for sign in (-1.0, 1.0):
+            normal = [0.0, 0.0, 0.0]
+            normal[axis] = sign
+            u, v = [a for a in range(3) if a != axis]
+            base = len(positions)
+            for du, dv in ((-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)):
+                corner = [0.0, 0.0, 0.0]
+                corner[axis] = 0.5 * sign
+                corner[u], corner[v] = du, dv
+                positions.append(corner)
+                normals.append(normal)
+            # Keep counter-clockwise winding when seen from outside
+            if (sign > 0) == ((v - u) % 3 == 1):
+                indices += [base, base + 1, base + 2, base, base + 2, base + 3]
+            else:
+                indices += [base, base + 2, base + 1, base, base + 3, base + 2]
+    return positions, normals, indices
+
+
+def _unit_cylinder(segments=SHELL_SEGMENTS):
+    """Side wall of a radius 1 cylinder from y=0 to y=1 (glTF is Y-up)."""
+    positions, normals, indices = [], [], []
+    for k in range(segments + 1):
+        angle = 2 * math.pi * k / segments
+        x, z = math.cos(angle), math.sin(angle)
+        positions += [[x, 0.0, z], [x, 1.0, z]]
+        normals += [[x, 0.0, z], [x, 0.0, z]]
+    for k in range(segments):
+        a, b, c, d = 2 * k, 2 * k + 1, 2 * k + 2, 2 * k + 3
+        indices += [a, b, c, c, b, d]
+    return positions, normals, indices
+
 
 class HabitatExporter:
     def __init__(self, layout_data):
@@ -42,17 +107,13 @@ class HabitatExporter:
         scale = module.get('scale', {'x': 1, 'y': 1, 'z': 1})
         
         # Determine color based on category
-        color = {
-            'CLEAN': '#90EE90',
-            'DIRTY': '#FFB6C1',
-            'QUIET': '#E6E6FA',
-            'NOISY': '#FFA07A',
-            'NEUTRAL': '#ADD8E6'
-        }.get(module.get('category', 'NEUTRAL'))
-        
-        # Create module rectangle
+        color = CATEGORY_COLORS.get(module.get('category', 'NEUTRAL'))
+        
+        # Create module rectangle, turned by the module's yaw about its center
+        yaw = module.get('rotation_degrees', {}).get('z', 0)
         x, y = pos['x'] - scale['x']/2, pos['y'] - scale['y']/2
         group.add(group.rect((x, y), (scale['x'], scale['y']),
+                           transform=f"rotate({yaw} {pos['x']} {pos['y']})",
                            fill=color, stroke='black', stroke_width=1))
         
         # Add module label
@@ -110,9 +171,127 @@ class HabitatExporter:
         x, y = pos['x'] * 20, pos['y'] * 20
         width, height = scale['x'] * 20, scale['y'] * 20
         
-        # Draw module rectangle
-        canvas.rect(x - width/2, y - height/2, width, height)
+        # Draw module rectangle, turned by the module's yaw about its center
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.rotate(module.get('rotation_degrees', {}).get('z', 0))
+        canvas.rect(-width/2, -height/2, width, height)
+        canvas.restoreState()
         
         # Add module label
         canvas.setFont("Helvetica", 8)
-        canvas.drawString(x - len(module['name'])*2, y, module['name'])
\ No newline at end of file
+        canvas.drawString(x - len(module['name'])*2, y, module['name'])
+
+    def build_glb(self):
+        """
+        Builds a binary glTF (GLB) of the layout.
+        All geometry lives in one binary buffer: a single unit box shared by every module
+        (placed by its node's translation, yaw and scale) and the habitat shell's wall.
+        Each category gets a material, and modules are grouped under one node per level.
+        The habitat's z-up coordinates are converted to glTF's y-up: (x, y, z) -> (x, z, -y).
+        """
+        binary = bytearray()
+        buffer_views, accessors = [], []
+
+        def add_view(data, target):
+            # Every view starts on a 4-byte boundary
+            binary.extend(b'\x00' * (-len(binary) % 4))
+            buffer_views.append({'buffer': 0, 'byteOffset': len(binary), 'byteLength': len(data), 'target': target})
+            binary.extend(data)
+            return len(buffer_views) - 1
+
+        def add_geometry(positions, normals, indices):
+            positions = np.asarray(positions, dtype=np.float32)
+            normals = np.asarray(normals, dtype=np.float32)
+            indices = np.asarray(indices, dtype=np.uint16)
+            attributes = {}
+            for name, values in (('POSITION', positions), ('NORMAL', normals)):
+                accessor = {'bufferView': add_view(values.tobytes(), GL_ARRAY_BUFFER), 'componentType': GL_FLOAT,
+                            'count': len(values), 'type': 'VEC3'}
+                if name == 'POSITION':
+                    accessor['min'] = positions.min(axis=0).tolist()
+                    accessor['max'] = positions.max(axis=0).tolist()
+                accessors.append(accessor)
+                attributes[name] = len(accessors) - 1
+            accessors.append({'bufferView': add_view(indices.tobytes(), GL_ELEMENT_ARRAY_BUFFER),
+                              'componentType': GL_UNSIGNED_SHORT, 'count': len(indices), 'type': 'SCALAR'})
+            return attributes, len(accessors) - 1
+
+        box_attributes, box_indices = add_geometry(*_unit_box())
+        shell_attributes, shell_indices = add_geometry(*_unit_cylinder())
+
+        # One material and one mesh per category; the meshes share the box accessors
+        materials, meshes, category_mesh = [], [], {}
+        for category, color in CATEGORY_COLORS.items():
+            materials.append({'name': category, 'pbrMetallicRoughness': {
+                'baseColorFactor': _hex_to_linear_rgba(color), 'metallicFactor': 0.1, 'roughnessFactor': 0.7}})
+            meshes.append({'name': f'Module {category}', 'primitives': [
+                {'attributes': box_attributes, 'indices': box_indices, 'material': len(materials) - 1}]})
+            category_mesh[category] = len(meshes) - 1
+        materials.append({'name': 'Shell', 'alphaMode': 'BLEND', 'doubleSided': True, 'pbrMetallicRoughness': {
+            'baseColorFactor': _hex_to_linear_rgba('#CCCCCC', 0.25), 'metallicFactor': 0.0, 'roughnessFactor': 1.0}})
+        meshes.append({'name': 'Habitat Shell', 'primitives': [
+            {'attributes': shell_attributes, 'indices': shell_indices, 'material': len(materials) - 1}]})
+
+        dimensions = self.layout_data['habitat_dimensions']
+        radius = dimensions['cylindrical_base_diameter_m'] / 2
+        nodes = [
+            {'name': 'Habitat', 'children': []},
+            {'name': 'Habitat Shell', 'mesh': len(meshes) - 1,
+             'scale': [radius, dimensions['total_height_m'], radius]},
+        ]
+        nodes[0]['children'].append(1)
+
+        # Modules, grouped by level
+        level_nodes = {}
+        for module in self.layout_data['modules']:
+            level = module.get('level', 0)
+            if level not in level_nodes:
+                level_height = module.get('level_height', {})
+                nodes.append({'name': f'Level {level}', 'children': [],
+                              'extras': {'min_z': level_height.get('min'), 'max_z': level_height.get('max')}})
+                level_nodes[level] = len(nodes) - 1
+                nodes[0]['children'].append(level_nodes[level])
+
+            pos = module['position']
+            scale = module.get('scale', {'x': 1, 'y': 1, 'z': 1})
+            half_yaw = math.radians(module.get('rotation_degrees', {}).get('z', 0)) / 2
+            category = module.get('category', 'NEUTRAL')
+            nodes.append({
+                'name': module['name'],
+                'mesh': category_mesh.get(category, category_mesh['NEUTRAL']),
+                'translation': [pos['x'], pos['z'], -pos['y']],
+                # A yaw about the habitat's z axis is a rotation about glTF's y axis
+                'rotation': [0.0, math.sin(half_yaw), 0.0, math.cos(half_yaw)],
+                'scale': [scale['x'], scale['z'], scale['y']],
+                'extras': {'index': module.get('index'), 'category': category,
+                           'violations': len(module.get('violations', []))},
+            })
+            nodes[level_nodes[level]]['children'].append(len(nodes) - 1)
+
+        binary.extend(b'\x00' * (-len(binary) % 4))
+        gltf = {
+            'asset': {'version': '2.0', 'generator': 'Habitat Designer'},
+            'scene': 0,
+            'scenes': [{'nodes': [0]}],
+            'nodes': nodes,
+            'meshes': meshes,
+            'materials': materials,
+            'accessors': accessors,
+            'bufferViews': buffer_views,
+            'buffers': [{'byteLength': len(binary)}],
+        }
+        json_chunk = json.dumps(gltf, separators=(',', ':')).encode()
+        json_chunk += b' ' * (-len(json_chunk) % 4)
+
+        total_length = 12 + 8 + len(json_chunk) + 8 + len(binary)
+        return b''.join([
+            struct.pack('<III', GLB_MAGIC, 2, total_length),
+            struct.pack('<II', len(json_chunk), GLB_CHUNK_JSON), json_chunk,
+            struct.pack('<II', len(binary), GLB_CHUNK_BIN), bytes(binary),
+        ])
+
+    def export_glb(self, filepath):
+        """Export the layout in 3D as a binary glTF file, for the 3D viewer and CAD/VR tools"""
+        with open(filepath, 'wb') as f:
+            f.write(self.build_glb())
@@ -1,96 +1,159 @@
-from nicegui import ui
-import three
+import hashlib
 import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+from nicegui import app, ui
+
+from frontend.assets import CACHE_MAX_AGE
+from frontend.habitat_exporter import CATEGORY_COLORS, HabitatExporter
+
+# Exported GLB models, named by a hash of the layout they show
+MODELS_DIR = Path(__file__).resolve().parent.parent / 'output' / 'models'
+MODELS_URL = '/models'
+# Models kept on disk; once there are more, the least recently shown are deleted
+MAX_MODEL_FILES = 200
+# Frames shown per second when a recorded optimization is played back
+REPLAY_FPS = 10
+BEST_PARTICLE = -1
+
+
+def register_model_files():
+    """Serves exported models. File names change with their content, so they may be cached indefinitely."""
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    app.add_static_files(MODELS_URL, str(MODELS_DIR), max_cache_age=CACHE_MAX_AGE)
+    evict_model_files()
+
+
+def evict_model_files(keep=MAX_MODEL_FILES):
+    """Deletes all but the `keep` most recently shown models; model_url marks a model as shown by its mtime."""
+    models = []
+    for path in MODELS_DIR.glob('*.glb'):
+        try:
+            models.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            pass  # Evicted by another worker
+    models.sort(reverse=True)
+    for _, path in models[keep:]:
+        path.unlink(missing_ok=True)
+
 
 class HabitatViewer3D:
     def __init__(self, layout_data):
         self.layout_data = layout_data
         self.scene = None
-        self.camera = None
-        self.renderer = None
-        
+
+    def model_key(self):
+        """Returns a content hash of everything the exported model depends on."""
+        content = json.dumps({
+            'modules': self.layout_data['modules'],
+            'habitat_dimensions': self.layout_data['habitat_dimensions'],
+        }, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    def model_url(self):
+        """
+        Exports the layout as a GLB (once per distinct layout while it stays among the
+        MAX_MODEL_FILES most recently shown) and returns its URL.
+        """
+        filename = f'{self.model_key()}.glb'
+        path = MODELS_DIR / filename
+        try:
+            os.utime(path)  # Shown again; keep it from being evicted
+        except FileNotFoundError:
+            MODELS_DIR.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            HabitatExporter(self.layout_data).export_glb(temp_path)
+            os.replace(temp_path, path)
+            evict_model_files()
+        return f'{MODELS_URL}/{filename}'
+
     def setup_scene(self, container):
-        # Create Three.js scene
-        self.scene = three.Scene()
-        
-        # Add camera
-        self.camera = three.PerspectiveCamera(75, aspect_ratio=1.0)
-        self.camera.position = (10, 10, 10)
-        self.camera.look_at((0, 0, 0))
-        
-        # Add lighting
-        ambient_light = three.AmbientLight(color='white', intensity=0.5)
-        directional_light = three.DirectionalLight(color='white', intensity=0.8)
-        directional_light.position = (5, 5, 5)
-        self.scene.add(ambient_light)
-        self.scene.add(directional_light)
-        
-        # Create habitat boundary cylinder
+        """Shows the layout's GLB in an interactive scene; the browser loads the whole model in one request."""
+        url = self.model_url()
         radius = self.layout_data['habitat_dimensions']['cylindrical_base_diameter_m'] / 2
         height = self.layout_data['habitat_dimensions']['total_height_m']
-        cylinder = three.Mesh(
-            geometry=three.CylinderGeometry(radius=radius, height=height),
-            material=three.MeshStandardMaterial(
-                color='#cccccc',
-                transparent=True,
-                opacity=0.3,
-                wireframe=True
-            )
-        )
-        self.scene.add(cylinder)
-        
-        # Add modules
-        for module in self.layout_data['modules']:
-            self.add_module(module)
-        
-        # Create renderer
-        self.renderer = three.Renderer(antialias=True)
+
         container.clear()
         with container:
-            ui.add_head_html('''
-                <style>
-                    .three-scene { width: 100%; height: 100%; }
-                </style>
-            ''')
-            self.renderer.classes('three-scene')
-        
-        # Add orbit controls
-        controls = three.OrbitControls(controlling=self.camera, container=container.id)
-        
-        # Start animation loop
-        def update():
-            self.renderer.render(self.scene, self.camera)
-            
-        ui.timer(interval=1/60, callback=update)
-    
-    def add_module(self, module):
-        # Create module geometry
-        pos = module['position']
-        scale = module.get('scale', {'x': 1, 'y': 1, 'z': 1})
-        
-        # Determine color based on category and violations
-        color = {
-            'CLEAN': '#90EE90',
-            'DIRTY': '#FFB6C1',
-            'QUIET': '#E6E6FA',
-            'NOISY': '#FFA07A',
-            'NEUTRAL': '#ADD8E6'
-        }.get(module.get('category', 'NEUTRAL'))
-        
-        # Create module mesh
-        geometry = three.BoxGeometry(
-            width=scale['x'],
-            height=scale['z'],  # Note: Y is up in Three.js
-            depth=scale['y']
-        )
-        material = three.MeshStandardMaterial(color=color)
-        mesh = three.Mesh(geometry=material)
-        
-        # Position module
-        mesh.position = (pos['x'], pos['z'], pos['y'])  # Convert coordinate systems
-        
-        # Add to scene
-        self.scene.add(mesh)
-        
-        # Add module label
-        self.add_module_label(module, mesh.position)
\ No newline at end of file
+            with ui.scene(width=600, height=600, grid=False, background_color='#0b1020') as self.scene:
+                # glTF is y-up while the scene (like the habitat) is z-up
+                self.scene.gltf(url).rotate(math.pi / 2, 0, 0)
+            self.scene.move_camera(x=2.5 * radius, y=-2.5 * radius, z=1.5 * height, look_at_z=height / 2)
+
+    def setup_replay(self, container, trajectory):
+        """
+        Plays back a recorded optimization (a visual_generation.trajectory.Trajectory): the modules
+        follow one particle through the recorded iterations, by default whichever particle scores
+        best in the shown frame. Frames hold quantized values, so a box whose position and yaw
+        decode to the same values as in the previous shown frame has not moved and is not updated.
+        """
+        modules = self.layout_data['modules']
+        if trajectory.modules != len(modules) or len(trajectory) == 0:
+            ui.notify('The recorded optimization does not match this layout.', type='warning')
+            return
+        radius = self.layout_data['habitat_dimensions']['cylindrical_base_diameter_m'] / 2
+        height = self.layout_data['habitat_dimensions']['total_height_m']
+        particles = {BEST_PARTICLE: 'Best particle'}
+        for particle in range(trajectory.particles):
+            island = f' (island {trajectory.island_of(particle) + 1})' if trajectory.islands > 1 else ''
+            particles[particle] = f'Particle {particle + 1}{island}'
+
+        container.clear()
+        with container:
+            with ui.scene(width=600, height=600, grid=False, background_color='#0b1020') as self.scene:
+                # Cylinders run along the scene's y axis; the shell stands on z = 0
+                self.scene.cylinder(radius, radius, height, radial_segments=32, wireframe=True) \
+                    .rotate(math.pi / 2, 0, 0).move(z=height / 2).material('#8899aa')
+                boxes = []
+                for module in modules:
+                    scale = module.get('scale', {'x': 1, 'y': 1, 'z': 1})
+                    color = CATEGORY_COLORS.get(module.get('category', 'NEUTRAL'), CATEGORY_COLORS['NEUTRAL'])
+                    boxes.append(self.scene.box(scale['x'], scale['y'], scale['z']).material(color, opacity=0.85))
+            self.scene.move_camera(x=2.5 * radius, y=-2.5 * radius, z=1.5 * height, look_at_z=height / 2)
+
+            with ui.row().classes('w-full items-center gap-4 mt-2'):
+                play_button = ui.button(icon='play_arrow').props('round dense')
+                frame_slider = ui.slider(min=0, max=len(trajectory) - 1, value=0).classes('flex-grow')
+                particle_select = ui.select(particles, value=BEST_PARTICLE).props('dark dense filled').classes('w-48')
+            frame_label = ui.label().classes('text-gray-400')
+            shown = {}  # 'positions' (M, 3) and 'yaw' (M,) the boxes were last moved to
+
+            def show_frame():
+                frame = int(frame_slider.value)
+                positions, yaw, scores = trajectory.frame(frame)
+                # Particles screened out in this frame were not evaluated (NaN) and never count as best
+                evaluated = np.where(np.isnan(scores), -np.inf, scores)
+                particle = int(np.argmax(evaluated)) if particle_select.value == BEST_PARTICLE else particle_select.value
+                positions, yaw = positions[particle], yaw[particle]
+                if shown:
+                    moved = np.flatnonzero((positions != shown['positions']).any(axis=1) | (yaw != shown['yaw']))
+                else:
+                    moved = range(len(boxes))
+                for index in moved:
+                    boxes[index].move(*map(float, positions[index])).rotate(0, 0, float(yaw[index]))
+                shown.update(positions=positions, yaw=yaw)
+                _, iteration, best_score = trajectory.header(frame)
+                score = 'was screened out' if np.isnan(scores[particle]) else f'scores {scores[particle]:.3f}'
+                frame_label.set_text(f'Iteration {iteration}: particle {particle + 1} {score} '
+                                     f'(swarm best {best_score:.3f})')
+
+            def advance():
+                if frame_slider.value < len(trajectory) - 1:
+                    frame_slider.set_value(frame_slider.value + 1)
+                else:
+                    toggle_playback()
+
+            def toggle_playback():
+                timer.active = not timer.active
+                play_button.props(f'icon={"pause" if timer.active else "play_arrow"}')
+                if timer.active and frame_slider.value >= len(trajectory) - 1:
+                    frame_slider.set_value(0)  # Start over after the last frame
+
+            timer = ui.timer(1 / REPLAY_FPS, advance, active=False)
+            play_button.on_click(toggle_playback)
+            frame_slider.on_value_change(show_frame)
+            particle_select.on_value_change(show_frame)
+            show_frame()
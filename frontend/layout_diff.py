@@ -0,0 +1,75 @@
+"""
+Index-based diffs between two versions of a layout.
+
+Modules are matched by their index in the layout's module list, and only what the 2D views
+draw is compared: position, scale, yaw, category and the number of violations. A diff holds
+just the changed fields of the changed modules, so a view that already shows one version can
+be patched to the next by frontend/layout_view.js instead of being re-rendered.
+"""
+# Values are rounded to millimetres, so float noise does not show up as a change
+PRECISION = 3
+
+
+def _vector(values, default):
+    return [round(float(values.get(axis, default)), PRECISION) for axis in 'xyz']
+
+
+def module_state(module):
+    """Returns the drawn state of one module, in the form the client-side store keeps."""
+    return {
+        'name': module['name'],
+        'position': _vector(module['position'], 0),
+        'scale': _vector(module.get('scale', {}), 1),
+        'yaw': round(float(module.get('rotation_degrees', {}).get('z', 0)), PRECISION),
+        'category': module.get('category', 'NEUTRAL'),
+        'violations': len(module.get('violations', [])),
+    }
+
+
+def layout_state(layout):
+    """Returns the drawn state of every module of a layout, by index."""
+    return [module_state(module) for module in layout.get('modules', [])]
+
+
+def diff_states(old, new):
+    """
+    Compares two layout states module by module.
+
+    Returns:
+        list | None: [index, {field: new value}] pairs for the modules that changed, or None
+        when the states cannot be matched by index (no previous state, or a different module
+        list) and the view has to be drawn from scratch.
+    """
+    if old is None or len(old) != len(new):
+        return None
+    changes = []
+    for index, (before, after) in enumerate(zip(old, new)):
+        if before['name'] != after['name']:
+            return None
+        changed = {field: value for field, value in after.items() if before[field] != value}
+        if changed:
+            changes.append([index, changed])
+    return changes
+
+
+def diff_layouts(old_layout, new_layout):
+    """Shorthand for diff_states() on two layout dictionaries."""
+    return diff_states(layout_state(old_layout), layout_state(new_layout))
+
+
+def merge_patches(applied, patch):
+    """
+    Merges a view patch into the ones applied before it.
+
+    A patch is {'frame': {'scale', 'shell'} or None, 'modules': diff}. The merged patch has the
+    latest frame and, per module, the latest value of every field that changed, so applying it
+    to the view as first drawn has the same effect as applying the patches one after another.
+    """
+    applied = applied or {'frame': None, 'modules': []}
+    modules = {index: dict(fields) for index, fields in applied['modules']}
+    for index, fields in patch['modules']:
+        modules.setdefault(index, {}).update(fields)
+    return {
+        'frame': patch['frame'] or applied['frame'],
+        'modules': [[index, fields] for index, fields in sorted(modules.items())],
+    }
@@ -19,6 +19,9 @@ class LayoutMetrics:
         # Violation statistics
         self.violation_stats = self._analyze_violations()
 
+        # Circulation statistics
+        self.circulation_stats = self._analyze_circulation()
+
     def _count_modules_by_category(self):
         categories = {'CLEAN': 0, 'DIRTY': 0, 'QUIET': 0, 'NOISY': 0, 'NEUTRAL': 0}
         for module in self.data.get('modules', []):
@@ -41,15 +44,50 @@ class LayoutMetrics:
 
     def _analyze_violations(self):
         violation_summary = self.data.get('violation_summary', {})
-        total_violations = sum(v.get('count', 0) for v in violation_summary.values())
-        max_severity = max((v.get('max_severity', 0) for v in violation_summary.values()), default=0)
+        # Per-type entries are dicts; the backend also reports scalar totals alongside them
+        by_type = {k: v for k, v in violation_summary.items() if isinstance(v, dict)}
+        total_violations = sum(v.get('count', 0) for v in by_type.values())
+        max_severity = max((v.get('max_severity', 0) for v in by_type.values()), default=0)
         
         return {
             'total_count': total_violations,
             'max_severity': max_severity,
-            'by_type': violation_summary
+            'by_type': by_type
+        }
+
+    def _analyze_circulation(self):
+        # Only optimized layouts carry a circulation analysis; previews don't
+        circulation = self.data.get('circulation')
+        if not circulation:
+            return None
+
+        modules = circulation.get('modules', [])
+        egress_distances = [m['egress_distance_m'] for m in modules if m.get('egress_distance_m') is not None]
+        return {
+            'unreachable_modules': [modules[i]['name'] for i in circulation.get('unreachable_modules', [])],
+            'min_corridor_width': circulation.get('min_corridor_width_m'),
+            'corridor_widths': {m['name']: m.get('corridor_width_m') for m in modules},
+            'max_egress_distance': max(egress_distances, default=None),
+            'walkable_volume': circulation.get('walkable_volume_m3', 0),
+            'free_volume': circulation.get('free_volume_m3', 0),
         }
 
+    def _circulation_summary_text(self):
+        stats = self.circulation_stats
+        if stats is None:
+            return "Circulation:\n• Not analyzed\n"
+
+        def meters(value):
+            return 'n/a' if value is None else f"{value:.2f}m"
+
+        unreachable = ', '.join(stats['unreachable_modules']) or 'None'
+        return f"""Circulation:
+• Unreachable Modules: {unreachable}
+• Narrowest Corridor: {meters(stats['min_corridor_width'])}
+• Longest Egress Route: {meters(stats['max_egress_distance'])}
+• Walkable Volume: {stats['walkable_volume']:.1f}m³ of {stats['free_volume']:.1f}m³ free
+"""
+
     def get_summary_text(self):
         """Returns a formatted summary of the layout metrics"""
         return f"""Habitat Overview:
@@ -68,4 +106,5 @@ Module Distribution:
 Layout Issues:
 • Total Violations: {self.violation_stats['total_count']}
 • Maximum Severity: {self.violation_stats['max_severity']:.2f}
-"""
\ No newline at end of file
+
+""" + self._circulation_summary_text()
\ No newline at end of file
@@ -0,0 +1,104 @@
+// Vue component of frontend/layout_view.py: a 2D layout view that is patched in place.
+// A patch is {frame, modules}. `modules` is an index-based diff (see frontend/layout_diff.py),
+// [[index, {position, scale, yaw, category, violations}], ...] with only the changed fields;
+// `frame`, if set, is the view's new scale and shell markup after the habitat's size changed.
+// Every module group in the SVG carries its current state as data attributes, so a diff is merged
+// into that state and the group's rectangle and label are moved, resized and recoloured in place.
+const VECTOR_FIELDS = ["position", "scale"];
+const VIOLATION_STROKE = "#d32f2f";
+
+function readState(group) {
+  const data = group.dataset;
+  return {
+    position: data.position.split(",").map(Number),
+    scale: data.scale.split(",").map(Number),
+    yaw: Number(data.yaw),
+    category: data.category,
+    violations: Number(data.violations),
+  };
+}
+
+function writeState(group, state) {
+  for (const field of VECTOR_FIELDS) {
+    group.dataset[field] = state[field].join(",");
+  }
+  group.dataset.yaw = state.yaw;
+  group.dataset.category = state.category;
+  group.dataset.violations = state.violations;
+}
+
+// Mirrors top_view_svg / side_view_svg: the top view shows x/y and the yaw, the side view x/z
+function drawModule(svg, group, state) {
+  const scale = Number(svg.dataset.scale);
+  const axis = svg.dataset.view === "top" ? 1 : 2;
+  const x = state.position[0] * scale;
+  const y = state.position[axis] * scale;
+  const width = state.scale[0] * scale;
+  const height = state.scale[axis] * scale;
+
+  const rect = group.querySelector("rect");
+  rect.setAttribute("x", x - width / 2);
+  rect.setAttribute("y", y - height / 2);
+  rect.setAttribute("width", width);
+  rect.setAttribute("height", height);
+  if (svg.dataset.view === "top") {
+    rect.setAttribute("transform", `rotate(${state.yaw} ${x} ${y})`);
+  }
+  const colors = JSON.parse(svg.dataset.colors);
+  rect.setAttribute("fill", colors[state.category] || colors.NEUTRAL);
+  rect.setAttribute("stroke", state.violations > 0 ? VIOLATION_STROKE : "black");
+  rect.setAttribute("stroke-width", state.violations > 0 ? 2 : 1);
+
+  const label = group.querySelector("text");
+  label.setAttribute("x", x);
+  label.setAttribute("y", y);
+}
+
+function patchView(svg, patch) {
+  if (patch.frame) {
+    svg.dataset.scale = patch.frame.scale;
+    svg.querySelector("g.shell").innerHTML = patch.frame.shell;
+  }
+  const changes = new Map(patch.modules);
+  for (const group of svg.querySelectorAll("g.module")) {
+    const changed = changes.get(Number(group.dataset.index));
+    // A new scale moves every module, changed or not
+    if (!changed && !patch.frame) continue;
+    const state = Object.assign(readState(group), changed);
+    writeState(group, state);
+    drawModule(svg, group, state);
+  }
+}
+
+export default {
+  template: `<div></div>`,
+  data() {
+    return { renderedProps: null };
+  },
+  mounted() {
+    this.render();
+  },
+  updated() {
+    this.render();
+  },
+  methods: {
+    // Draws the view as first drawn plus every patch applied since, whenever the server sends
+    // the element again; patches sent through applyPatch are already shown and left alone
+    render() {
+      const props = JSON.stringify([this.content, this.patch]);
+      if (props === this.renderedProps) return;
+      this.$el.innerHTML = this.content;
+      if (this.patch) {
+        patchView(this.$el.querySelector("svg[data-view]"), this.patch);
+      }
+      this.renderedProps = props;
+    },
+    applyPatch(patch) {
+      patchView(this.$el.querySelector("svg[data-view]"), patch);
+    },
+  },
+  props: {
+    content: String,
+    patch: Object,
+  },
+};
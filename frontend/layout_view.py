@@ -0,0 +1,47 @@
+"""
+The 2D layout views of the result page, as an element that is patched in place.
+
+The element is drawn once from an SVG. Later versions of the layout reach the browser as
+index-based diffs (see frontend/layout_diff.py), which layout_view.js applies to the SVG.
+The server's copy of the element keeps the SVG as first drawn together with every diff
+applied since, merged into one, so a page that is rebuilt from it (for example after a
+reconnect) shows the same layout as the patched browser.
+"""
+from nicegui.element import Element
+
+from frontend.layout_diff import merge_patches
+
+
+class LayoutView(Element, component='layout_view.js'):
+
+    def __init__(self, svg, state, dimensions):
+        """
+        Args:
+            svg (str): The view as first drawn; modules are tagged with module_group_attributes().
+            state (list): layout_state() of the drawn layout.
+            dimensions (dict): The habitat dimensions the view was drawn for.
+        """
+        super().__init__()
+        self._props['content'] = svg
+        self._props['patch'] = None
+        self.state = state
+        self.dimensions = dimensions
+
+    def apply_patch(self, state, changes, dimensions=None, frame=None):
+        """
+        Patches the view in the browser.
+
+        Args:
+            state (list): layout_state() of the layout the view shows afterwards.
+            changes (list): diff_states() from the view's current state to `state`.
+            dimensions (dict): The new habitat dimensions, if they changed.
+            frame (dict): The view's scale and shell for those dimensions, as {'scale', 'shell'}.
+        """
+        patch = {'frame': frame, 'modules': changes}
+        # Only the browser is sent the diff; the merged copy is kept for rebuilding the element
+        with self._props.suspend_updates():
+            self._props['patch'] = merge_patches(self._props['patch'], patch)
+        self.run_method('applyPatch', patch)
+        self.state = state
+        if dimensions is not None:
+            self.dimensions = dimensions
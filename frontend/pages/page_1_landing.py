@@ -1,118 +1,11 @@
 from nicegui import ui
+from frontend.assets import use_assets
 
 def landing_page():
     """Defines the content and layout for the landing page."""
     
-    # --- 1. Custom CSS for Animated Background (No GSAP/ScrollTrigger imports) ---
-    ui.add_head_html("""
-        <style>
-            /* Base dark background for the body */
-            body { 
-                background-color: #04040A; 
-                /* Allow scrolling now that we have extra content */
-                overflow-y: auto; 
-                overflow-x: hidden;
-            }
-
-            /* Define the blinking animation for the stars */
-            @keyframes blink {
-                0%, 100% { opacity: 1; }
-                50% { opacity: 0.2; } /* Subtler blink */
-            }
-
-            /* Container for the stars - covers the full screen */
-            .star-field {
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                z-index: -10; 
-            }
-
-            /* The actual star element - a small white dot with a subtle blue glow */
-            .star {
-                position: absolute;
-                background: #FFFFFF; 
-                border-radius: 50%;
-                box-shadow: 0 0 5px 1px rgba(66, 165, 245, 0.5); /* Blue glow */
-                animation-name: blink;
-                animation-timing-function: linear;
-                animation-iteration-count: infinite;
-            }
-            
-            /* Class to ensure the content is centered over the background */
-            .content-container {
-                z-index: 10;
-                position: relative;
-            }
-
-            /* --- Logo Positioning --- */
-            /* NASA Logo: Top Left */
-            .hackathon-logo {
-                position: fixed;
-                top: 1rem;    /* Positioned at the top */
-                left: 1rem;   /* Positioned at the left */
-                width: 200px; /* Size */
-                opacity: 0.9; 
-                z-index: 100;
-            }
-            
-            /* Team Logo (NEW): Top Right */
-            .team-logo {
-                position: fixed;
-                top: 1rem;    /* Positioned at the top */
-                right: 1rem;  /* Positioned at the right */
-                width: 120px; /* Size, slightly smaller than the NASA logo */
-                opacity: 0.9;
-                z-index: 100;
-            }
-
-            /* Custom class for page content column - now simply stacked content */
-            .main-page-column {
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                min-height: 100vh;
-            }
-        </style>
-        
-        <!-- Star Field Container -->
-        <div id="star-field" class="star-field"></div>
-        
-        <!-- Star Generation Script -->
-        <script>
-            function createStar(size, duration) {
-                const star = document.createElement('div');
-                star.classList.add('star');
-                
-                // Randomly position the star across the screen
-                const x = Math.random() * 100;
-                const y = Math.random() * 100;
-
-                star.style.left = x + 'vw';
-                star.style.top = y + 'vh';
-                star.style.width = size + 'px';
-                star.style.height = size + 'px';
-
-                // Randomize blink speed and delay
-                star.style.animationDuration = (duration + (Math.random() * 2)) + 's';
-                star.style.animationDelay = (Math.random() * 5) + 's';
-                
-                return star;
-            }
-
-            const starField = document.getElementById('star-field');
-            const numStars = 200; // Total number of stars
-
-            for (let i = 0; i < numStars; i++) {
-                // Generate stars with varying sizes and base animation speeds
-                let size = (Math.random() * 3) + 1.0; 
-                let duration = 3 + (Math.random() * 4); // Duration between 3s and 7s
-                starField.appendChild(createStar(size, duration));
-            }
-        </script>
-    """)
+    # --- 1. Shared styles and the canvas star-field background (cached static assets) ---
+    use_assets('habitat.css', 'starfield.js')
 
     # --- 2. Hackathon Logo (Top Left) ---
     ui.image('Images/NASA-SPACE-APPS-Logo.png').classes('hackathon-logo')
@@ -157,6 +50,7 @@ def landing_page():
                 'Start Designing Now', 
                 on_click=lambda: ui.navigate.to('/parameters')
             ).classes('mt-10 w-64 h-14 bg-green-600 hover:bg-green-500 text-xl font-bold text-white shadow-lg shadow-green-500/50 transition-transform transform hover:scale-105 rounded-full')
+            ui.link('Browse stored designs', '/gallery').classes('mt-4 text-blue-300 hover:text-blue-200')
         
         # --- B. Background Story Data Strip (Full Width) ---
         # This wrapper spans the entire screen width (w-screen) and is centered in the main column (mx-auto).
@@ -1,10 +1,20 @@
-from nicegui import ui
+from nicegui import app, binding, ui
 from typing import Dict, Any
 from visual_generation.schema_utils import validate_parameters
+from frontend.assets import use_assets
+from visual_generation.job_queue import PRIORITY_INTERACTIVE, QueueFullError, get_scheduler
 
-# Define a storage dictionary for the parameters.
+# The parameters chosen by one client. Bindable properties push each change to the bound
+# elements directly, so NiceGUI does not have to poll these objects for changes.
 class Parameters:
-    def __init__(self):
+    location = binding.BindableProperty()
+    crew_size = binding.BindableProperty()
+    mission_days = binding.BindableProperty()
+    mission_type = binding.BindableProperty()
+    deployment_vehicle = binding.BindableProperty()
+    habitat_material = binding.BindableProperty()
+
+    def __init__(self, values=None):
         # Initialize default parameters
         self.location: str = "Moon/Lunar Surface"
         self.crew_size: int = 4
@@ -12,68 +22,48 @@ class Parameters:
         self.mission_type: str = "Exploration"
         self.deployment_vehicle: str = "SLS Block 1B Cargo"
         self.habitat_material: str = "Metallic Hard Shell"
+        # Restore the client's previous choices, if any
+        for name, value in (values or {}).items():
+            if name in self.to_dict():
+                setattr(self, name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "location": self.location,
+            "crew_size": self.crew_size,
+            "mission_days": self.mission_days,
+            "mission_type": self.mission_type,
+            "deployment_vehicle": self.deployment_vehicle,
+            "habitat_material": self.habitat_material,
+        }
 
-# Global state object to store the parameters
-current_parameters = Parameters()
+# Ask the optimizer for a few distinct layouts so the result page can offer alternatives. The
+# pool of layouts for re-ranking (visual_generation/reranking.py) is left out: nothing here reads
+# it, and it would make up most of every stored result.
+# The swarm starts inside the habitat and is kept there, so the best layout gets violation-free
+# in far fewer iterations (see tools/init_benchmark.py). The inside start roughly doubles the
+# optimization time (about 30 to 60 ms at crew 4), as modules packed into the habitat need more
+# collision tests; the repair alone costs next to nothing.
+LAYOUT_OPTIONS = {
+    "alternatives": {"count": 3, "min_distance_m": 1.0},
+    "feasible_initialization": True,
+    "repair_bounds": True,
+}
+# Opt-in recording of every optimizer iteration, replayed in the result page's 3D view
+# (visual_generation/trajectory.py); the scheduler chooses the file
+TRAJECTORY_OPTIONS = {"trajectory": {"keyframe_interval": 25}}
 
 def params_page():
     """
     Creates the UI for setting habitat design parameters.
     The content is centered and includes the deep space background effect.
+    Every page visit gets its own Parameters, seeded from the user's last submission.
     """
+    current_parameters = Parameters(app.storage.user.get('parameters'))
     
     # --- 1. BACKGROUND STYLING (Top-level element) ---
-    # These global styles are added directly to the page head/body.
-    ui.add_head_html("""
-        <style>
-            /* Ensures body background is the deep space color */
-            body { background-color: #04040A !important; } 
-            
-            /* Star field container */
-            .star-field { position: fixed; top: 0; left: 0; width: 100%; height: 100%; z-index: -10; }
-            
-            /* Individual star styles */
-            .star { 
-                position: absolute; 
-                background: #FFFFFF; 
-                border-radius: 50%; 
-                box-shadow: 0 0 5px 1px rgba(66, 165, 245, 0.5); 
-                animation-name: blink; 
-                animation-timing-function: linear; 
-                animation-iteration-count: infinite; 
-            }
-            @keyframes blink { 0%, 100% { opacity: 1; } 50% { opacity: 0.2; } }
-        </style>
-    """)
-
-    # JavaScript to dynamically generate the stars
-    ui.add_body_html("""
-        <div id="star-field" class="star-field"></div>
-        <script>
-            function createStar(size, duration) {
-                const star = document.createElement('div');
-                star.classList.add('star');
-                const x = Math.random() * 100;
-                const y = Math.random() * 100;
-                star.style.left = x + 'vw';
-                star.style.top = y + 'vh';
-                star.style.width = size + 'px';
-                star.style.height = size + 'px';
-                star.style.animationDuration = (duration + (Math.random() * 2)) + 's';
-                star.style.animationDelay = (Math.random() * 5) + 's';
-                return star;
-            }
-            const starField = document.getElementById('star-field');
-            const numStars = 200; 
-            if (starField) { 
-                for (let i = 0; i < numStars; i++) {
-                    let size = (Math.random() * 2) + 1.0; 
-                    let duration = 3 + (Math.random() * 4); 
-                    starField.appendChild(createStar(size, duration));
-                }
-            }
-        </script>
-    """)
+    # Shared styles and the canvas star field are cached static assets.
+    use_assets('habitat.css', 'starfield.js')
 
     # Explicit function for navigation to improve robustness
     def navigate_to_home():
@@ -155,26 +145,28 @@ def params_page():
                     label="Habitat Material/Structure",
                 ).classes('w-full').props('dark filled').bind_value(current_parameters, 'habitat_material')
 
+            record_trajectory = ui.checkbox('Record the optimization for replay').classes('mt-6 text-gray-400').props('dark')
+
             def handle_generate_click():
                 # Convert the parameters object to a dictionary for validation
-                params_dict = {
-                    "location": current_parameters.location,
-                    "crew_size": current_parameters.crew_size,
-                    "mission_days": current_parameters.mission_days,
-                    "mission_type": current_parameters.mission_type,
-                    "deployment_vehicle": current_parameters.deployment_vehicle,
-                    "habitat_material": current_parameters.habitat_material,
-                }
+                params_dict = current_parameters.to_dict()
                 
                 is_valid, message = validate_parameters(params_dict)
                 
                 if is_valid:
-                    ui.notify(message, type='positive')
-                    # Store parameters in session for result page
-                    from nicegui import app
+                    # Store parameters in session for the result page's preview
                     app.storage.user['parameters'] = params_dict
-                    # Navigate to the results page on success
-                    ui.navigate.to('/result')
+                    options = {**LAYOUT_OPTIONS, **TRAJECTORY_OPTIONS} if record_trajectory.value else LAYOUT_OPTIONS
+                    try:
+                        job_id = get_scheduler().submit(params_dict, user_id=app.storage.browser['id'],
+                                                        priority=PRIORITY_INTERACTIVE,
+                                                        options=options)
+                    except QueueFullError as e:
+                        ui.notify(str(e), type='warning', multi_line=True)
+                        return
+                    ui.notify(message, type='positive')
+                    # Navigate to the job's results page on success
+                    ui.navigate.to(f'/result/{job_id}')
                 else:
                     # Display the validation error to the user
                     ui.notify(message, type='negative', multi_line=True, auto_close=False)
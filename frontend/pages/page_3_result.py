@@ -1,29 +1,170 @@
-﻿from nicegui import ui
+﻿from nicegui import core, ui
 import json
 import os
 from pathlib import Path
 import math
+from visual_generation.job_queue import JOB_DONE, JOB_FAILED, JOB_QUEUED, get_scheduler
+from visual_generation.preview_layout import generate_preview_layout
+from visual_generation.trajectory import Trajectory
+from frontend.habitat_viewer_3d import HabitatViewer3D
+from frontend.layout_diff import diff_states, layout_state, module_state
+from frontend.layout_view import LayoutView
+
+# Module fill per category, shared by both 2D views and the client-side patching (layout_view.js)
+CATEGORY_COLORS = {
+    'CLEAN': '#90EE90',
+    'DIRTY': '#FFB6C1',
+    'QUIET': '#E6E6FA',
+    'NOISY': '#FFA07A',
+    'NEUTRAL': '#ADD8E6'
+}
+VIOLATION_STROKE = '#d32f2f'
+TOP_VIEW_SIZE = 600
+SIDE_VIEW_SIZE = (600, 400)
+
+
+def module_group_attributes(index, module):
+    """Tags a module's SVG group with its index and drawn state, so diffs can be applied in the browser."""
+    state = module_state(module)
+    position = ','.join(map(str, state['position']))
+    scale = ','.join(map(str, state['scale']))
+    return (f'class="module" data-name="{state["name"]}" data-index="{index}" '
+            f'data-position="{position}" data-scale="{scale}" data-yaw="{state["yaw"]}" '
+            f'data-category="{state["category"]}" data-violations="{state["violations"]}"')
+
+
+def module_stroke(module):
+    """Outlines modules involved in violations."""
+    if module.get('violations'):
+        return f'stroke="{VIOLATION_STROKE}" stroke-width="2"'
+    return 'stroke="black" stroke-width="1"'
+
 
 class ResultPage:
+    """
+    The result page of one client. A new instance is created for every page visit, so layouts
+    are never shared between browsers, and its state is released when the client is deleted.
+    """
     def __init__(self):
-        self.current_view = 'top'  # Can be 'top', 'side', or '3d'
+        self.current_view = 'top'  # Can be 'top', 'side', '3d' or 'replay'
         self.layout_data = None
         self.visualization_container = None
+        self.status_label = None
+        self.job_id = None
+        self.job_finished = False
+        self.client = None
+        self.unsubscribe_job = None
+        self.alternatives_row = None
+        self.replay_button = None
+        self.layout_view = None  # The LayoutView holding the current 2D view, if any
         
-    def load_layout_data(self):
-        try:
-            output_path = Path('output/layout_result.json')
-            if not output_path.exists():
-                ui.notify('No layout data found. Please generate a layout first.')
+    def load_layout_data(self, job_id=None):
+        """Loads the stored result of a layout job, or without a job the newest stored layout."""
+        if job_id:
+            self.layout_data = get_scheduler().load_result(job_id)
+            if self.layout_data is None:
+                ui.notify(f'No layout found for job {job_id}.')
                 return False
-                
-            with open(output_path, 'r') as f:
-                self.layout_data = json.load(f)
             return True
-        except Exception as e:
-            ui.notify(f'Error loading layout data: {str(e)}')
+
+        self.layout_data = get_scheduler().latest_result()
+        if self.layout_data is None:
+            ui.notify('No layout data found. Please generate a layout first.')
             return False
-            
+        return True
+
+    def receive_job_update(self, status):
+        """Scheduler callback; it may run on a worker thread, so the update is handed to the event loop."""
+        core.loop.call_soon_threadsafe(self.show_job_update, status)
+
+    def show_job_update(self, status):
+        """Shows queue feedback for the page's job and swaps in its layout once it is done."""
+        if self.job_finished or self.client is None:
+            return  # A late update, or the client is already gone
+        with self.client:
+            if status is None:
+                self.job_finished = True
+                self.status_label.set_text('Unknown layout job.')
+            elif status['status'] == JOB_QUEUED:
+                self.status_label.set_text(f"Preview layout - queued for optimization (position {status['queue_position']})")
+            elif status['status'] == JOB_DONE:
+                self.job_finished = True
+                layout = get_scheduler().load_result(self.job_id)
+                if layout is None:
+                    ui.notify(f'No layout found for job {self.job_id}.')
+                else:
+                    self.status_label.set_text('Optimized layout')
+                    self.show_layout(layout)
+                    self.update_alternatives()
+                    self.update_replay_button()
+            elif status['status'] == JOB_FAILED:
+                self.job_finished = True
+                self.status_label.set_text('Optimization failed; showing the preview layout.')
+                ui.notify(status.get('error') or 'Layout optimization failed.', type='negative', multi_line=True)
+            else:
+                self.status_label.set_text('Preview layout - optimizing...')
+
+    def release(self):
+        """Drops the page's state once its client is deleted."""
+        if self.unsubscribe_job is not None:
+            self.unsubscribe_job()
+            self.unsubscribe_job = None
+        self.client = None
+        self.layout_data = None
+        self.visualization_container = None
+        self.status_label = None
+        self.alternatives_row = None
+        self.replay_button = None
+        self.layout_view = None
+
+    def select_alternative(self, rank):
+        """Shows one of the alternative layouts returned by the optimizer."""
+        alternative = self.layout_data['alternatives'][rank]
+        self.status_label.set_text(f"Alternative {rank + 1} (score {alternative['score']:.1f})")
+        self.show_layout(dict(self.layout_data, modules=alternative['modules'],
+                              violations=alternative['violations'],
+                              violation_summary=alternative['violation_summary']))
+
+    def show_layout(self, layout):
+        """
+        Makes `layout` the page's layout and brings the current view up to date with it. This is
+        the entry point for every later version of the page's layout - the optimized result
+        replacing the preview, an alternative, or an edited layout - so they all take the diff
+        path of refresh_visualization() rather than a redraw.
+        """
+        self.layout_data = layout
+        self.refresh_visualization()
+
+    def update_alternatives(self):
+        """Adds a button per alternative layout, if the optimizer returned more than one."""
+        if self.alternatives_row is None:
+            return
+        self.alternatives_row.clear()
+        alternatives = (self.layout_data or {}).get('alternatives', [])
+        if len(alternatives) < 2:
+            return
+        with self.alternatives_row:
+            for alternative in alternatives:
+                rank = alternative['rank']
+                ui.button(f'Alternative {rank + 1}', on_click=lambda rank=rank: self.select_alternative(rank)) \
+                    .classes('bg-indigo-500')
+
+    def load_trajectory(self):
+        """Opens the recorded optimization of the result, if the job asked for one and it was written."""
+        recording = (self.layout_data or {}).get('trajectory')
+        if not recording or 'error' in recording:
+            return None
+        try:
+            return Trajectory(recording['path'])
+        except (OSError, ValueError):
+            return None
+
+    def update_replay_button(self):
+        """Offers the replay only for results with a recorded optimization."""
+        if self.replay_button is not None:
+            recording = (self.layout_data or {}).get('trajectory')
+            self.replay_button.set_visibility(bool(recording) and 'error' not in recording)
+
     def switch_view(self, view_type):
         self.current_view = view_type
         self.update_visualization()
@@ -31,16 +172,31 @@ class ResultPage:
     def draw_top_view(self, container):
         if not self.layout_data:
             return
-            
-        # Get habitat dimensions
+        self.show_view_svg(container, self.top_view_svg())
+
+    def top_view_frame(self):
+        """Returns the top view's scale and its shell layers for the current habitat dimensions."""
         radius = self.layout_data['habitat_dimensions']['cylindrical_base_diameter_m'] / 2
+        scale_factor = (TOP_VIEW_SIZE * 0.8) / (radius * 2)  # Leave some margin
+        shell = f'''
+                <circle cx="0" cy="0" r="{radius * scale_factor}" 
+                        fill="url(#structuralPattern)" stroke="black" stroke-width="2"/>
+                <circle cx="0" cy="0" r="{(radius - 0.5) * scale_factor}" 
+                        fill="url(#insulationPattern)" stroke="#999" stroke-width="1"/>
+                <circle cx="0" cy="0" r="{(radius - 0.8) * scale_factor}" 
+                        fill="white" stroke="#666" stroke-width="1"/>
+        '''
+        return {'scale': scale_factor, 'shell': shell}
+
+    def top_view_svg(self):
+        frame = self.top_view_frame()
+        scale_factor = frame['scale']
+        svg_size = TOP_VIEW_SIZE
         
         # Create SVG for top view
-        svg_size = 600
-        scale_factor = (svg_size * 0.8) / (radius * 2)  # Leave some margin
-        
         svg = f'''
-        <svg width="{svg_size}" height="{svg_size}" viewBox="0 0 {svg_size} {svg_size}">
+        <svg width="{svg_size}" height="{svg_size}" viewBox="0 0 {svg_size} {svg_size}"
+             data-view="top" data-scale="{scale_factor}" data-colors='{json.dumps(CATEGORY_COLORS)}'>
             <defs>
                 <!-- Define patterns for different shell layers -->
                 <pattern id="structuralPattern" patternUnits="userSpaceOnUse" width="10" height="10">
@@ -53,36 +209,25 @@ class ResultPage:
             </defs>
             <g transform="translate({svg_size/2}, {svg_size/2})">
                 <!-- Shell layers -->
-                <circle cx="0" cy="0" r="{radius * scale_factor}" 
-                        fill="url(#structuralPattern)" stroke="black" stroke-width="2"/>
-                <circle cx="0" cy="0" r="{(radius - 0.5) * scale_factor}" 
-                        fill="url(#insulationPattern)" stroke="#999" stroke-width="1"/>
-                <circle cx="0" cy="0" r="{(radius - 0.8) * scale_factor}" 
-                        fill="white" stroke="#666" stroke-width="1"/>
+                <g class="shell">{frame['shell']}</g>
         '''
         
         # Draw modules
-        for module in self.layout_data['modules']:
+        for index, module in enumerate(self.layout_data['modules']):
             x = module['position']['x'] * scale_factor
             y = module['position']['y'] * scale_factor
             width = module.get('scale', {}).get('x', 1) * scale_factor
             height = module.get('scale', {}).get('y', 1) * scale_factor
+            yaw = module.get('rotation_degrees', {}).get('z', 0)
             
-            # Determine color based on category
-            color = {
-                'CLEAN': '#90EE90',
-                'DIRTY': '#FFB6C1',
-                'QUIET': '#E6E6FA',
-                'NOISY': '#FFA07A',
-                'NEUTRAL': '#ADD8E6'
-            }.get(module.get('category', 'NEUTRAL'))
+            color = CATEGORY_COLORS.get(module.get('category', 'NEUTRAL'))
             
             # Add module rectangle
             svg += f'''
-                <g class="module" data-name="{module['name']}">
+                <g {module_group_attributes(index, module)}>
                     <rect x="{x - width/2}" y="{y - height/2}" 
-                          width="{width}" height="{height}"
-                          fill="{color}" stroke="black" stroke-width="1"/>
+                          width="{width}" height="{height}" transform="rotate({yaw} {x} {y})"
+                          fill="{color}" {module_stroke(module)}/>
                     <text x="{x}" y="{y}" text-anchor="middle" 
                           dominant-baseline="middle" font-size="12">
                         {module['name']}
@@ -94,40 +239,21 @@ class ResultPage:
             </g>
         </svg>
         '''
-        
-        container.clear()
-        with container:
-            ui.html(svg).classes('w-full h-full')
+        return svg
             
     def draw_side_view(self, container):
         if not self.layout_data:
             return
-            
-        # Get habitat dimensions
+        self.show_view_svg(container, self.side_view_svg())
+
+    def side_view_frame(self):
+        """Returns the side view's scale and its shell layers for the current habitat dimensions."""
         width = self.layout_data['habitat_dimensions']['cylindrical_base_diameter_m']
         height = self.layout_data['habitat_dimensions']['total_height_m']
-        
-        # Create SVG for side view
-        svg_width = 600
-        svg_height = 400
-        scale_x = (svg_width * 0.8) / width
-        scale_y = (svg_height * 0.8) / height
+        scale_x = (SIDE_VIEW_SIZE[0] * 0.8) / width
+        scale_y = (SIDE_VIEW_SIZE[1] * 0.8) / height
         scale_factor = min(scale_x, scale_y)
-        
-        svg = f'''
-        <svg width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}">
-            <defs>
-                <!-- Define patterns for different shell layers -->
-                <pattern id="structuralPatternSide" patternUnits="userSpaceOnUse" width="10" height="10">
-                    <circle cx="5" cy="5" r="1" fill="#666"/>
-                </pattern>
-                <pattern id="insulationPatternSide" patternUnits="userSpaceOnUse" width="8" height="8">
-                    <path d="M0 0h8v8h-8z" fill="#f0f0f0"/>
-                    <path d="M0 0l8 8M8 0l-8 8" stroke="#ddd" stroke-width="1"/>
-                </pattern>
-            </defs>
-            <g transform="translate({svg_width/2}, {svg_height/2})">
-                <!-- Shell layers -->
+        shell = f'''
                 <!-- Outer structural shell -->
                 <rect x="{-width * scale_factor/2}" y="{-height * scale_factor/2}" 
                       width="{width * scale_factor}" height="{height * scale_factor}"
@@ -143,27 +269,46 @@ class ResultPage:
                       width="{(width - 1.6) * scale_factor}" height="{(height - 1.6) * scale_factor}"
                       fill="white" stroke="#666" stroke-width="1"/>
         '''
+        return {'scale': scale_factor, 'shell': shell}
+
+    def side_view_svg(self):
+        frame = self.side_view_frame()
+        scale_factor = frame['scale']
+        svg_width, svg_height = SIDE_VIEW_SIZE
+        
+        # Create SVG for side view
+        svg = f'''
+        <svg width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}"
+             data-view="side" data-scale="{scale_factor}" data-colors='{json.dumps(CATEGORY_COLORS)}'>
+            <defs>
+                <!-- Define patterns for different shell layers -->
+                <pattern id="structuralPatternSide" patternUnits="userSpaceOnUse" width="10" height="10">
+                    <circle cx="5" cy="5" r="1" fill="#666"/>
+                </pattern>
+                <pattern id="insulationPatternSide" patternUnits="userSpaceOnUse" width="8" height="8">
+                    <path d="M0 0h8v8h-8z" fill="#f0f0f0"/>
+                    <path d="M0 0l8 8M8 0l-8 8" stroke="#ddd" stroke-width="1"/>
+                </pattern>
+            </defs>
+            <g transform="translate({svg_width/2}, {svg_height/2})">
+                <!-- Shell layers -->
+                <g class="shell">{frame['shell']}</g>
+        '''
         
         # Draw modules
-        for module in self.layout_data['modules']:
+        for index, module in enumerate(self.layout_data['modules']):
             x = module['position']['x'] * scale_factor
             z = module['position']['z'] * scale_factor
             width = module.get('scale', {}).get('x', 1) * scale_factor
             height = module.get('scale', {}).get('z', 1) * scale_factor
             
-            color = {
-                'CLEAN': '#90EE90',
-                'DIRTY': '#FFB6C1',
-                'QUIET': '#E6E6FA',
-                'NOISY': '#FFA07A',
-                'NEUTRAL': '#ADD8E6'
-            }.get(module.get('category', 'NEUTRAL'))
+            color = CATEGORY_COLORS.get(module.get('category', 'NEUTRAL'))
             
             svg += f'''
-                <g class="module" data-name="{module['name']}">
+                <g {module_group_attributes(index, module)}>
                     <rect x="{x - width/2}" y="{z - height/2}" 
                           width="{width}" height="{height}"
-                          fill="{color}" stroke="black" stroke-width="1"/>
+                          fill="{color}" {module_stroke(module)}/>
                     <text x="{x}" y="{z}" text-anchor="middle" 
                           dominant-baseline="middle" font-size="12">
                         {module['name']}
@@ -175,16 +320,27 @@ class ResultPage:
             </g>
         </svg>
         '''
-        
-        container.clear()
-        with container:
-            ui.html(svg).classes('w-full h-full')
+        return svg
             
-    def draw_3d_view(self, container):
-        # Placeholder for 3D view
+    def show_view_svg(self, container, svg):
+        """Replaces the container's content with a 2D view of the current layout."""
         container.clear()
         with container:
-            ui.label('3D view will be implemented with Three.js').classes('text-center')
+            self.layout_view = LayoutView(svg, layout_state(self.layout_data),
+                                          self.layout_data['habitat_dimensions']).classes('w-full h-full')
+
+    def draw_3d_view(self, container):
+        self.layout_view = None
+        # The layout is exported once as a GLB and loaded by the browser in a single request
+        HabitatViewer3D(self.layout_data).setup_scene(container)
+
+    def draw_replay_view(self, container):
+        self.layout_view = None
+        trajectory = self.load_trajectory()
+        if trajectory is None:
+            ui.notify('The optimization of this layout was not recorded.')
+            return
+        HabitatViewer3D(self.layout_data).setup_replay(container, trajectory)
             
     def update_visualization(self):
         if self.visualization_container:
@@ -192,29 +348,74 @@ class ResultPage:
                 self.draw_top_view(self.visualization_container)
             elif self.current_view == 'side':
                 self.draw_side_view(self.visualization_container)
+            elif self.current_view == 'replay':
+                self.draw_replay_view(self.visualization_container)
             else:  # 3d view
                 self.draw_3d_view(self.visualization_container)
                 
+    def refresh_visualization(self):
+        """
+        Brings the current view up to date with layout_data. A 2D view that already shows the
+        same modules is patched in the browser with only the changed fields, plus the new scale
+        and shell if the habitat's size changed, as it does when the optimized result replaces
+        the preview. Other views, or a different module list, are redrawn.
+        """
+        if self.layout_view is None:
+            self.update_visualization()
+            return
+        state = layout_state(self.layout_data)
+        changes = diff_states(self.layout_view.state, state)
+        if changes is None:
+            self.update_visualization()
+            return
+        dimensions = self.layout_data['habitat_dimensions']
+        frame = None
+        if dimensions != self.layout_view.dimensions:
+            # The SVG's scale depends on the habitat's size
+            frame = self.top_view_frame() if self.current_view == 'top' else self.side_view_frame()
+        if changes or frame:
+            self.layout_view.apply_patch(state, changes, dimensions, frame)
+
     def export_pdf(self):
         ui.notify('PDF export functionality coming soon')
         
     def export_svg(self):
         ui.notify('SVG export functionality coming soon')
         
-    def __call__(self, router_context=None):
-        """Create and display the result page"""
-        if not self.load_layout_data():
+    def __call__(self, parameters=None, job_id=None):
+        """
+        Create and display the result page.
+        For a job that is still queued or running, an instant preview layout built from the
+        parameters is shown and replaced in place once the job's result is stored. Without a
+        job, the newest successful layout in the scheduler's results is loaded.
+        """
+        self.job_id = job_id
+        self.client = ui.context.client
+        self.client.on_delete(self.release)
+        status = get_scheduler().get_status(job_id) if job_id else None
+        pending = status is not None and status['status'] not in (JOB_DONE, JOB_FAILED)
+        if pending:
+            self.layout_data = generate_preview_layout(parameters or status['parameters'])
+        elif not self.load_layout_data(job_id):
             return
             
         with ui.column().classes('w-full items-center'):
             ui.label('Habitat Layout Result').classes('text-h4 q-ma-md')
+            self.status_label = ui.label(
+                'Preview layout - waiting for optimization...' if pending else 'Stored layout'
+            ).classes('text-gray-400')
             
             # Add view controls
             with ui.row().classes('w-full justify-center gap-4'):
                 ui.button('Top View', on_click=lambda: self.switch_view('top')).classes('bg-blue-500')
                 ui.button('Side View', on_click=lambda: self.switch_view('side')).classes('bg-blue-500')
                 ui.button('3D View', on_click=lambda: self.switch_view('3d')).classes('bg-blue-500')
+                self.replay_button = ui.button('Replay Optimization', on_click=lambda: self.switch_view('replay')) \
+                    .classes('bg-blue-500')
             
+            # Alternative layouts, filled in once the optimized result is available
+            self.alternatives_row = ui.row().classes('w-full justify-center gap-4')
+
             # Add visualization container
             self.visualization_container = ui.element('div').classes('w-3/4 aspect-square')
             
@@ -224,7 +425,10 @@ class ResultPage:
                 ui.button('Export as SVG', on_click=self.export_svg).classes('bg-green-500')
             
             # Initial visualization
+            self.update_alternatives()
+            self.update_replay_button()
             self.update_visualization()
 
-# Create an instance of ResultPage to be used by the router
-result_page = ResultPage()
+        if pending:
+            # Pushed by the scheduler when the job's queue position or state changes
+            self.unsubscribe_job = get_scheduler().subscribe(job_id, self.receive_job_update)
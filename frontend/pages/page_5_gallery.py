@@ -0,0 +1,53 @@
+from html import escape
+from nicegui import ui
+from frontend.assets import use_assets
+from frontend.thumbnails import get_thumbnail_service
+
+# Layouts per gallery page. The whole grid is sent as a single HTML element, and images below
+# the fold are only fetched when scrolled to, so a full page costs little more than an empty one.
+GALLERY_PAGE_SIZE = 200
+
+
+def gallery_tile(service, entry):
+    """One linked thumbnail of the grid."""
+    violations = entry.get('violations', 0)
+    caption = f"{entry.get('modules', 0)} modules, {violations} violation{'' if violations == 1 else 's'}"
+    size = service.size
+    return (f'<a href="/result/{entry["job_id"]}" class="flex flex-col items-center gap-1 p-2 rounded-lg '
+            f'bg-gray-900/90 hover:bg-blue-900/60 transition" title="{escape(entry.get("description", ""))}">'
+            f'<img src="{service.url(entry["key"])}" width="{size}" height="{size}" loading="lazy" '
+            f'decoding="async" alt="Layout {entry["job_id"][:8]}" class="rounded">'
+            f'<span class="text-xs text-gray-300">{caption}</span></a>')
+
+
+def gallery_page(page=1):
+    """Shows the thumbnails of stored layouts, newest first, GALLERY_PAGE_SIZE at a time."""
+    use_assets('habitat.css', 'starfield.js')
+
+    ui.icon('arrow_back', size='2xl') \
+        .classes('fixed top-6 left-6 text-white bg-white/10 p-4 rounded-full cursor-pointer hover:bg-white/20 transition z-50') \
+        .on('click', lambda: ui.navigate.to('/'))
+
+    service = get_thumbnail_service()
+    entries = service.entries()
+    page_count = max(1, -(-len(entries) // GALLERY_PAGE_SIZE))
+    page = min(max(1, page), page_count)
+    shown = entries[(page - 1) * GALLERY_PAGE_SIZE:page * GALLERY_PAGE_SIZE]
+
+    with ui.column().classes('w-full items-center p-8 pt-20 gap-6 content-container'):
+        ui.label('Stored Layouts').classes('text-h4 text-white')
+        if not entries:
+            ui.label('No layouts stored yet. Generate a design to see it here.').classes('text-gray-400')
+            return
+
+        ui.label(f'{len(entries)} layouts, page {page} of {page_count}').classes('text-gray-400')
+        ui.html('<div class="flex flex-wrap justify-center gap-3">'
+                + ''.join(gallery_tile(service, entry) for entry in shown)
+                + '</div>').classes('w-full')
+
+        if page_count > 1:
+            with ui.row().classes('gap-4'):
+                if page > 1:
+                    ui.link('Newer', f'/gallery?page={page - 1}').classes('text-blue-300')
+                if page < page_count:
+                    ui.link('Older', f'/gallery?page={page + 1}').classes('text-blue-300')
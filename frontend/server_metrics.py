@@ -0,0 +1,78 @@
+"""
+Process-level health figures for capacity testing: event-loop lag, CPU, memory and the
+number of optimizer subprocesses currently running.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+
+from nicegui import background_tasks
+
+try:
+    import psutil
+except ImportError:  # CPU/memory/subprocess figures are optional
+    psutil = None
+
+# How often the event loop is asked to wake up, and how many wake-ups are kept
+LAG_SAMPLE_INTERVAL_S = 0.1
+LAG_WINDOW = 100
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes a sleeping task. Anything that blocks the loop
+    (a slow handler, a long synchronous call) shows up directly as lag for every connected client.
+    """
+
+    def __init__(self, interval=LAG_SAMPLE_INTERVAL_S, window=LAG_WINDOW):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = background_tasks.create(self._run(), name='event-loop-lag-monitor')
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def snapshot(self):
+        """Returns the mean and max lag over the recent window, in milliseconds."""
+        if not self.samples:
+            return {'mean_ms': 0.0, 'max_ms': 0.0, 'samples': 0}
+        return {
+            'mean_ms': 1000 * sum(self.samples) / len(self.samples),
+            'max_ms': 1000 * max(self.samples),
+            'samples': len(self.samples),
+        }
+
+
+lag_monitor = EventLoopLagMonitor()
+# Kept across calls so cpu_percent measures the time since the previous sample
+_process = psutil.Process() if psutil is not None else None
+
+
+def process_metrics():
+    """
+    Returns CPU, memory and child-process figures for the server process.
+    Without psutil only the PID is reported.
+    """
+    metrics = {'pid': os.getpid()}
+    if psutil is None:
+        return metrics
+
+    process = _process
+    children = process.children(recursive=True)
+    metrics.update({
+        # Percent of one core since the previous call; the first call reports 0
+        'cpu_percent': process.cpu_percent(interval=None),
+        'system_cpu_percent': psutil.cpu_percent(interval=None),
+        'rss_mb': process.memory_info().rss / (1024 * 1024),
+        'threads': process.num_threads(),
+        'subprocesses': len(children),
+    })
+    return metrics
@@ -0,0 +1,78 @@
+// Twinkling star field drawn on a single canvas.
+// Replaces the 200 absolutely-positioned, CSS-animated <div> stars the pages used to create.
+(function () {
+    const NUM_STARS = 200;
+    const GLOW = 'rgba(66, 165, 245, 0.5)'; // Blue glow
+
+    function createStars() {
+        const stars = [];
+        for (let i = 0; i < NUM_STARS; i++) {
+            stars.push({
+                // Positions are fractions of the viewport so they survive resizes
+                x: Math.random(),
+                y: Math.random(),
+                radius: (Math.random() * 3 + 1.0) / 2,
+                // Blink period between 3s and 9s, with a random phase like the old animation delay
+                period: (3 + Math.random() * 4 + Math.random() * 2) * 1000,
+                phase: Math.random() * 5000,
+            });
+        }
+        return stars;
+    }
+
+    function start() {
+        if (document.getElementById('star-field')) {
+            return;
+        }
+        const canvas = document.createElement('canvas');
+        canvas.id = 'star-field';
+        canvas.className = 'star-field';
+        document.body.prepend(canvas);
+
+        const context = canvas.getContext('2d');
+        const stars = createStars();
+        const reduceMotion = window.matchMedia('(prefers-reduced-motion: reduce)').matches;
+
+        function resize() {
+            const ratio = window.devicePixelRatio || 1;
+            canvas.width = window.innerWidth * ratio;
+            canvas.height = window.innerHeight * ratio;
+            context.setTransform(ratio, 0, 0, ratio, 0, 0);
+        }
+
+        function draw(time) {
+            const width = window.innerWidth;
+            const height = window.innerHeight;
+            context.clearRect(0, 0, width, height);
+            context.fillStyle = '#FFFFFF';
+            context.shadowColor = GLOW;
+            context.shadowBlur = 5;
+            for (const star of stars) {
+                // Same curve as the old keyframes: opacity 1 -> 0.2 -> 1 over one period
+                const t = ((time + star.phase) % star.period) / star.period;
+                context.globalAlpha = reduceMotion ? 1 : 0.2 + 0.8 * Math.abs(1 - 2 * t);
+                context.beginPath();
+                context.arc(star.x * width, star.y * height, star.radius, 0, 2 * Math.PI);
+                context.fill();
+            }
+            if (!reduceMotion) {
+                window.requestAnimationFrame(draw);
+            }
+        }
+
+        resize();
+        window.addEventListener('resize', () => {
+            resize();
+            if (reduceMotion) {
+                draw(0);
+            }
+        });
+        window.requestAnimationFrame(draw);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+})();
@@ -0,0 +1,271 @@
+"""
+Small top-view images of stored layouts, for pages that show many layouts at once.
+
+Building the full SVG top view (ResultPage.draw_top_view) for every entry of a grid is far too
+slow, so each job's layout is drawn once into a small PNG by a pool of worker threads as soon as
+its result is stored. Images are named by a hash of what they show, so a layout is only ever
+drawn once and a URL never changes content; browsers may cache them indefinitely. An index
+(index.jsonl next to the images) maps job IDs to image hashes, so listing layouts reads no
+result files.
+
+Example:
+    service = get_thumbnail_service()
+    key = service.request(result)   # drawn in the background, served once done
+    url = service.url(key)
+    entries = service.entries()     # newest first: {'job_id', 'key', 'created_at', ...}
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from nicegui import app
+from PIL import Image, ImageDraw
+
+from frontend.assets import CACHE_MAX_AGE
+from frontend.habitat_exporter import CATEGORY_COLORS
+from frontend.layout_diff import layout_state
+
+THUMBNAILS_DIR = Path(__file__).resolve().parent.parent / 'output' / 'thumbnails'
+THUMBNAILS_URL = '/thumbnails'
+INDEX_FILENAME = 'index.jsonl'
+# Edge length in pixels; images are drawn at SUPERSAMPLE times that and scaled down for smooth edges
+THUMBNAIL_SIZE = 160
+SUPERSAMPLE = 3
+RENDER_WORKERS = 2
+
+BACKGROUND = '#0b1020'
+SHELL_FILL = '#9e9e9e'
+FLOOR_FILL = '#ffffff'
+VIOLATION_OUTLINE = '#d32f2f'
+
+
+def layout_key(layout_data, size=THUMBNAIL_SIZE):
+    """Returns a content hash of everything a thumbnail of the layout shows."""
+    content = json.dumps({
+        'modules': layout_state(layout_data),
+        'diameter': layout_data['habitat_dimensions']['cylindrical_base_diameter_m'],
+        'size': size,
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+def render_thumbnail(layout_data, size=THUMBNAIL_SIZE):
+    """
+    Draws the layout's top view, as ResultPage.draw_top_view does but without labels or shell
+    patterns: the habitat floor, and every module in its category color turned by its yaw.
+    The view is zoomed out as far as needed to show every module whole.
+
+    Returns:
+        PIL.Image.Image: A size x size RGB image.
+    """
+    canvas_size = size * SUPERSAMPLE
+    image = Image.new('RGB', (canvas_size, canvas_size), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    # Module outlines in meters; modules may reach past the base shell into the upper sections
+    outlines = []
+    for module in layout_state(layout_data):
+        x, y, _ = module['position']
+        half_width, half_depth = module['scale'][0] / 2, module['scale'][1] / 2
+        yaw = math.radians(module['yaw'])
+        cos, sin = math.cos(yaw), math.sin(yaw)
+        corners = [(x + dx * cos - dy * sin, y + dx * sin + dy * cos)
+                   for dx, dy in ((-half_width, -half_depth), (half_width, -half_depth),
+                                  (half_width, half_depth), (-half_width, half_depth))]
+        outlines.append((module, corners))
+
+    radius = layout_data['habitat_dimensions']['cylindrical_base_diameter_m'] / 2
+    extent = max([radius] + [math.hypot(cx, cy) for _, corners in outlines for cx, cy in corners])
+    scale = canvas_size * 0.9 / (extent * 2)
+    center = canvas_size / 2
+
+    def circle(r, fill):
+        draw.ellipse((center - r * scale, center - r * scale, center + r * scale, center + r * scale), fill=fill)
+
+    circle(radius, SHELL_FILL)
+    circle(radius - 0.8, FLOOR_FILL)
+
+    for module, corners in outlines:
+        # The SVG views draw y downwards, and so does Pillow
+        points = [(center + cx * scale, center + cy * scale) for cx, cy in corners]
+        if module['violations']:
+            draw.polygon(points, fill=CATEGORY_COLORS.get(module['category']), outline=VIOLATION_OUTLINE,
+                         width=2 * SUPERSAMPLE)
+        else:
+            draw.polygon(points, fill=CATEGORY_COLORS.get(module['category']), outline='black', width=SUPERSAMPLE)
+
+    return image.resize((size, size), Image.LANCZOS)
+
+
+class ThumbnailService:
+    """Draws thumbnails in a thread pool, keeps them on disk by layout hash and indexes them by job."""
+
+    def __init__(self, directory=THUMBNAILS_DIR, size=THUMBNAIL_SIZE, max_workers=RENDER_WORKERS):
+        self.directory = Path(directory)
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnail')
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> Future of a thumbnail being drawn
+        self._index = None  # job_id -> entry, read from the index file on first use
+
+    def path(self, key):
+        # Keys are generated hex digests; reject anything else to keep paths inside the directory
+        if not key or not all(c in '0123456789abcdef' for c in key):
+            raise ValueError(f'Invalid thumbnail key: {key}')
+        return self.directory / f'{key}.png'
+
+    def url(self, key):
+        return f'{THUMBNAILS_URL}/{key}.png'
+
+    def request(self, layout_data):
+        """
+        Returns the key of the layout's thumbnail, queueing it to be drawn unless it exists
+        or is already queued.
+        """
+        key = layout_key(layout_data, self.size)
+        if self.path(key).exists():
+            return key
+        with self._lock:
+            if key not in self._pending:
+                self._pending[key] = self._executor.submit(self._render, key, layout_data)
+        return key
+
+    def pending(self, key):
+        """Returns the Future of a thumbnail that is still being drawn, or None."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def _render(self, key, layout_data):
+        try:
+            path = self.path(key)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            render_thumbnail(layout_data, self.size).save(temp_path, format='PNG', optimize=True)
+            os.replace(temp_path, path)
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def add_result(self, job_id, result, created_at=None):
+        """Queues the thumbnail of a job's stored layout and records it in the index."""
+        if result.get('status') != 'success' or not result.get('modules'):
+            return None
+        entry = {
+            'job_id': job_id,
+            'key': self.request(result),
+            'created_at': created_at or time.time(),
+            'description': result.get('description', ''),
+            'modules': len(result['modules']),
+            'violations': result.get('violation_summary', {}).get('total_violations', 0),
+        }
+        with self._lock:
+            self._load_index()
+            self._index[job_id] = entry
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / INDEX_FILENAME, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        return entry
+
+    def entries(self):
+        """Returns the index entries of every job with a thumbnail, newest first."""
+        with self._lock:
+            self._load_index()
+            return sorted(self._index.values(), key=lambda entry: entry['created_at'], reverse=True)
+
+    def _load_index(self):
+        """Reads the index file once; later lines override earlier ones. Call with the lock held."""
+        if self._index is not None:
+            return
+        self._index = {}
+        try:
+            with open(self.directory / INDEX_FILENAME, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash
+                    self._index[entry['job_id']] = entry
+        except FileNotFoundError:
+            pass
+
+    def backfill(self, results_dir):
+        """
+        Queues thumbnails for stored job results that have none, e.g. results from before the
+        service existed or images that were deleted. Results are read in the pool, not the caller.
+
+        Returns:
+            concurrent.futures.Future: Done once every missing thumbnail is queued.
+        """
+        def scan():
+            indexed = {entry['job_id']: entry for entry in self.entries()}
+            for path in sorted(Path(results_dir).glob('*.json'), key=lambda p: p.stat().st_mtime):
+                entry = indexed.get(path.stem)
+                if entry is not None and self.path(entry['key']).exists():
+                    continue
+                try:
+                    with open(path, 'r') as f:
+                        result = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    continue
+                if entry is not None:
+                    self.request(result)
+                else:
+                    # Old results are ordered by when they were stored, not when they were found
+                    self.add_result(path.stem, result, created_at=path.stat().st_mtime)
+        return self._executor.submit(scan)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_thumbnail_service():
+    """Returns the process-wide thumbnail service, creating it on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ThumbnailService()
+        return _service
+
+
+def register_thumbnail_files():
+    """
+    Serves thumbnails and has one drawn for every layout job that succeeds. A thumbnail that is
+    still being drawn is served once it is done, so pages may link to it right away.
+    """
+    from visual_generation.job_queue import get_scheduler
+
+    service = get_thumbnail_service()
+    scheduler = get_scheduler()
+    scheduler.add_result_listener(lambda job_id, result: service.add_result(job_id, result))
+    service.backfill(scheduler.results_dir)
+
+    @app.get(f'{THUMBNAILS_URL}/{{filename}}')
+    async def thumbnail(filename: str, request: Request):
+        key = filename.removesuffix('.png')
+        try:
+            path = service.path(key)
+        except ValueError:
+            return Response(status_code=404)
+        # The key is a content hash, so it doubles as the ETag
+        headers = {'Cache-Control': f'public, max-age={CACHE_MAX_AGE}, immutable', 'ETag': f'"{key}"'}
+        if request.headers.get('if-none-match') == headers['ETag']:
+            return Response(status_code=304, headers=headers)
+        if not path.exists():
+            future = service.pending(key)
+            if future is not None:
+                try:
+                    await asyncio.wrap_future(future)
+                except Exception:
+                    pass  # Drawing failed; there is no image to serve
+            if not path.exists():
+                return Response(status_code=404)
+        return FileResponse(path, media_type='image/png', headers=headers)
@@ -0,0 +1,32 @@
+"""
+Shared fixtures. Tests that run the optimizer request `backend`: it builds the backend
+executable from cpp_backend/src with g++ where generate_layout looks for it, unless a build
+is already there, and skips those tests with the reason if it cannot.
+"""
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = PROJECT_ROOT / 'cpp_backend'
+EXECUTABLE = BACKEND_DIR / 'build' / 'Release' / 'habitat_optimizer.exe'
+
+
+@pytest.fixture(scope='session')
+def backend():
+    """Path of the backend executable, built on first use."""
+    if EXECUTABLE.exists():
+        return EXECUTABLE
+    compiler = shutil.which('g++')
+    if compiler is None:
+        pytest.skip(f'The backend is not built ({EXECUTABLE}) and g++ is not available to build it')
+    EXECUTABLE.parent.mkdir(parents=True, exist_ok=True)
+    command = [compiler, '-std=c++17', '-O2', '-pthread', f'-I{BACKEND_DIR / "dependencies"}',
+               str(BACKEND_DIR / 'src' / 'main.cpp'), '-o', str(EXECUTABLE)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        EXECUTABLE.unlink(missing_ok=True)
+        pytest.skip(f'Building the backend failed:\n{process.stderr[-2000:]}')
+    return EXECUTABLE
@@ -0,0 +1,90 @@
+import copy
+
+import numpy as np
+import pytest
+
+from visual_generation.generate_layout import generate_layout
+from visual_generation.reranking import SCORE_TERMS, CandidatePool, assign_levels, weight_vector
+
+PARAMETERS = {
+    "location": "Moon/Lunar Surface",
+    "crew_size": 4,
+    "mission_days": 30,
+    "mission_type": "Exploration",
+    "deployment_vehicle": "SLS Block 1B Cargo",
+    "habitat_material": "Metallic Hard Shell",
+}
+WEIGHTS = {"compactness": 2.0, "adjacency": 0.5}
+
+
+@pytest.fixture(scope='module')
+def result(backend):
+    result = generate_layout(PARAMETERS, {"candidate_pool": {"size": 50}, "weights": WEIGHTS})
+    assert result.get('status') == 'success', result.get('description')
+    return result
+
+
+def test_weight_vector_pads_missing_weights_with_ones():
+    np.testing.assert_array_equal(weight_vector({'adjacency': 0.5}), [1.0, 1.0, 1.0, 0.5])
+    np.testing.assert_array_equal(weight_vector([2.0]), [2.0, 1.0, 1.0, 1.0])
+    np.testing.assert_array_equal(weight_vector([]), [1.0, 1.0, 1.0, 1.0])
+    matrix = np.arange(8.0).reshape(2, 4)
+    np.testing.assert_array_equal(weight_vector(matrix), matrix)
+
+
+@pytest.mark.parametrize('weights', [{'comfort': 1.0}, [1.0] * 5, np.ones((2, 3)), np.ones((2, 2, 4))])
+def test_weight_vector_rejects_malformed_weights(weights):
+    with pytest.raises(ValueError):
+        weight_vector(weights)
+
+
+def test_rank_top_matches_full_sort():
+    rng = np.random.default_rng(0)
+    pool = CandidatePool(rng.random((200, len(SCORE_TERMS))), np.zeros((200, 1, 3)), np.zeros((200, 1)), [{}])
+    weights = [1.5, 1.0, 2.0, 0.5]
+    full_order, full_scores = pool.rank(weights)
+    assert np.all(np.diff(full_scores) <= 0)
+    for top in (1, 7, 199, 200, 500):
+        order, scores = pool.rank(weights, top=top)
+        np.testing.assert_array_equal(order, full_order[:top])
+        np.testing.assert_array_equal(scores, full_scores[:top])
+
+
+def test_rank_rejects_several_weightings():
+    pool = CandidatePool(np.ones((3, len(SCORE_TERMS))), np.zeros((3, 1, 3)), np.zeros((3, 1)), [{}])
+    with pytest.raises(ValueError):
+        pool.rank(np.ones((2, len(SCORE_TERMS))))
+
+
+def test_scores_match_backend(result):
+    pool = CandidatePool.from_result(result)
+    assert len(pool) > 1
+    backend_scores = np.array(result['candidate_pool']['scores'])
+    np.testing.assert_allclose(pool.scores(result['weights']), backend_scores, rtol=1e-6, atol=1e-9)
+
+    order, scores = pool.rank(WEIGHTS, top=5)
+    np.testing.assert_array_equal(order, np.argsort(-backend_scores, kind='stable')[:5])
+    np.testing.assert_allclose(scores, np.sort(backend_scores)[::-1][:5], rtol=1e-6, atol=1e-9)
+
+
+def test_scores_under_several_weightings(result):
+    pool = CandidatePool.from_result(result)
+    weightings = np.array([[1.0, 1.0, 1.0, 1.0], [2.0, 1.0, 1.0, 0.5]])
+    scores = pool.scores(weightings)
+    assert scores.shape == (len(pool), 2)
+    np.testing.assert_allclose(scores[:, 1], pool.scores(WEIGHTS))
+
+
+def test_levels_follow_the_backend(result):
+    modules = copy.deepcopy(result['modules'])
+    for module in modules:
+        module['position']['z'] += 3.0  # Levels count from the lowest floor, so a shift changes nothing
+    assign_levels(modules)
+    for module, expected in zip(modules, result['modules']):
+        assert module['level'] == expected['level']
+        assert module['level_height']['min'] == pytest.approx(expected['level_height']['min'] + 3.0, abs=1e-4)
+
+    pool = CandidatePool.from_result(result)
+    for module, position in zip(pool.layout(len(pool) - 1), pool.positions[-1]):
+        floor = module['level_height']['min']
+        assert floor <= position[2] < module['level_height']['max']
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from frontend.pages.page_2_params import LAYOUT_OPTIONS
+from visual_generation.generate_layout import generate_layout
+from visual_generation.trajectory import KEYFRAME, Trajectory
+
+PARAMETERS = {
+    "location": "Moon/Lunar Surface",
+    "crew_size": 4,
+    "mission_days": 30,
+    "mission_type": "Exploration",
+    "deployment_vehicle": "SLS Block 1B Cargo",
+    "habitat_material": "Metallic Hard Shell",
+}
+KEYFRAME_INTERVAL = 25
+
+
+@pytest.fixture(scope='module')
+def recording(backend, tmp_path_factory):
+    path = tmp_path_factory.mktemp('trajectory') / 'run.traj'
+    options = dict(LAYOUT_OPTIONS, trajectory={"path": str(path), "keyframe_interval": KEYFRAME_INTERVAL})
+    result = generate_layout(PARAMETERS, options)
+    assert result.get('status') == 'success', result.get('description')
+    return result, Trajectory(str(path))
+
+
+def test_header_and_keyframes(recording):
+    result, trajectory = recording
+    assert len(trajectory) > KEYFRAME_INTERVAL
+    assert trajectory.modules == len(result['modules'])
+    np.testing.assert_array_equal(trajectory.keyframes, np.arange(0, len(trajectory), KEYFRAME_INTERVAL))
+    assert trajectory.header(0)[0] == KEYFRAME
+
+
+def test_seeking_matches_stepping(recording):
+    _, trajectory = recording
+    stepped = [trajectory.frame(index) for index in range(len(trajectory))]
+    # Backwards, across keyframes and from arbitrary frames, in a fresh reader and a used one
+    rng = np.random.default_rng(0)
+    indices = [len(trajectory) - 1, 0, KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL, *rng.integers(0, len(trajectory), 20)]
+    for reader in (Trajectory(trajectory.path), trajectory):
+        for index in indices:
+            for decoded, expected in zip(reader.frame(int(index)), stepped[index]):
+                np.testing.assert_array_equal(decoded, expected)
+
+
+def test_decoded_frames_hold_the_result_within_half_a_quantum(recording):
+    result, trajectory = recording
+    # The final layout is the best any particle was at, so some recorded frame holds it
+    final_positions = np.array([[m['position'][axis] for axis in 'xyz'] for m in result['modules']])
+    final_yaw = np.radians([m['rotation_degrees']['z'] for m in result['modules']])
+    period = trajectory.yaw_steps * trajectory.yaw_quantum
+    best_error = np.inf
+    for index in range(len(trajectory)):
+        positions, yaw, _ = trajectory.frame(index)
+        position_error = np.abs(positions - final_positions).max(axis=(1, 2))
+        yaw_error = np.abs((yaw - final_yaw + period / 2) % period - period / 2).max(axis=1)
+        within = yaw_error <= trajectory.yaw_quantum / 2 + 1e-5
+        if within.any():
+            best_error = min(best_error, position_error[within].min())
+    assert best_error <= trajectory.position_quantum / 2 + 1e-5
+
+
+def test_best_scores_and_compression(recording):
+    result, trajectory = recording
+    best = trajectory.best_scores()
+    assert best.shape == (len(trajectory),)
+    assert np.all(np.diff(best) >= 0)
+    assert best[-1] == pytest.approx(result['score'], abs=1e-3)
+    scores = trajectory.scores()
+    np.testing.assert_array_equal(scores[7], trajectory.scores(7))
+    assert trajectory.compression_ratio() > 3.0
+
+
+def test_screened_layouts_are_recorded_without_a_score(backend, tmp_path):
+    path = tmp_path / 'screened.traj'
+    options = dict(LAYOUT_OPTIONS, surrogate_screening=True, trajectory={"path": str(path)})
+    result = generate_layout(PARAMETERS, options)
+    assert result.get('status') == 'success', result.get('description')
+    scores = Trajectory(str(path)).scores()
+    assert not np.isnan(scores[0]).any()
+    assert np.isnan(scores).sum() == result['optimizer_stats']['screened_out']
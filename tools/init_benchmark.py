@@ -0,0 +1,94 @@
+"""
+Benchmark of the optimizer's swarm start and bounds repair.
+
+Runs the optimizer (through generate_layout, as the app does) several times for every crew size
+under each combination of {"feasible_initialization": ..., "repair_bounds": ...}, and reports
+how many iterations the global best needed to get inside the habitat and to become free of
+violations, next to the share of final layouts without violations, the final score and the
+optimization time. Runs whose best never got there count as not reaching it; medians are taken
+over the runs that did. A best that was violation-free may still be traded for a more compact
+layout with violations later on, which is why the final share is reported as well.
+
+Usage (requires the built backend):
+    python -m tools.init_benchmark --runs 10
+    python -m tools.init_benchmark --crew 2 4 6 8 --runs 20 --out output/init_benchmark.json
+"""
+import argparse
+import itertools
+import json
+import statistics
+
+from visual_generation.generate_layout import generate_layout
+
+BASE_PARAMETERS = {
+    "location": "Moon/Lunar Surface",
+    "mission_days": 30,
+    "mission_type": "Exploration",
+    "deployment_vehicle": "SLS Block 1B Cargo",
+    "habitat_material": "Metallic Hard Shell",
+}
+# Today's behaviour first
+MODES = [
+    {"feasible_initialization": initialization, "repair_bounds": repair}
+    for initialization, repair in itertools.product((False, True), (False, True))
+]
+
+
+def mode_name(mode):
+    return '+'.join(name for name, enabled in mode.items() if enabled) or 'uniform'
+
+
+def summarize(stats, key):
+    """Share of runs that reached a state, and the median iteration at which they did."""
+    reached = [run[key] for run in stats if run[key] >= 0]
+    return {
+        'reached': len(reached) / len(stats) if stats else 0.0,
+        'median_iteration': statistics.median(reached) if reached else None,
+    }
+
+
+def run_benchmark(crew_sizes, runs):
+    report = {}
+    for crew_size in crew_sizes:
+        parameters = dict(BASE_PARAMETERS, crew_size=crew_size)
+        for mode in MODES:
+            stats, scores, final_violations = [], [], []
+            for _ in range(runs):
+                result = generate_layout(parameters, mode)
+                if result.get('status') != 'success':
+                    raise RuntimeError(result.get('description') or result.get('message'))
+                stats.append(result['optimizer_stats'])
+                scores.append(result['score'])
+                final_violations.append(result['violation_summary']['total_violations'])
+            entry = {
+                'in_bounds': summarize(stats, 'first_in_bounds_iteration'),
+                'violation_free': summarize(stats, 'first_violation_free_iteration'),
+                'final_violation_free': sum(1 for count in final_violations if count == 0) / runs,
+                'median_score': statistics.median(scores),
+                'median_optimization_ms': statistics.median(run['optimization_ms'] for run in stats),
+                'mean_repairs': statistics.mean(run['repairs'] for run in stats),
+            }
+            report[f'crew {crew_size}, {mode_name(mode)}'] = entry
+            print(f"crew {crew_size:2d} {mode_name(mode):38s} "
+                  f"in bounds {entry['in_bounds']['reached']:4.0%} at {entry['in_bounds']['median_iteration']}, "
+                  f"violation-free {entry['violation_free']['reached']:4.0%} at {entry['violation_free']['median_iteration']} "
+                  f"({entry['final_violation_free']:4.0%} at the end), "
+                  f"score {entry['median_score']:.1f}, {entry['median_optimization_ms']:.0f} ms")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the optimizer's swarm start and bounds repair modes.")
+    parser.add_argument('--crew', type=int, nargs='+', default=[2, 4, 6, 8], help="Crew sizes to optimize for.")
+    parser.add_argument('--runs', type=int, default=10, help="Optimizer runs per crew size and mode.")
+    parser.add_argument('--out', default=None, help="Write the report as JSON to this file.")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.crew, args.runs)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
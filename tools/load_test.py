@@ -0,0 +1,271 @@
+"""
+Concurrent-user load test for a running Habitat Designer instance.
+
+Each simulated designer walks the real flow with its own cookie jar: it loads the landing
+page (/) and the parameters page (/parameters), submits a generate request through
+/api/jobs (the same validation and scheduler path as the Generate button), opens
+/result/<job_id> and polls the job until the optimizer has finished. Page loads are plain
+HTTP requests; the UI's websocket traffic is not simulated. While the sessions run, the
+server's /api/stats endpoint is sampled for event-loop lag, CPU, memory, queue depth and
+optimizer subprocess counts.
+
+The report (JSON) holds p50/p95/p99 latencies per step, job turnaround and rejection counts,
+and the server samples, so runs before and after a concurrency change can be compared.
+
+Every simulated designer names itself with an X-User-Id header, so the scheduler's per-user
+running limit applies to each of them as it would to real users. The server only honours the
+header from trusted addresses; without that, all sessions share the limit of the one address
+they come from.
+
+Usage (requires httpx; start the app first with `HABITAT_TRUSTED_PROXIES=127.0.0.1 python Main.py`):
+    python -m tools.load_test --users 10 --iterations 3
+    python -m tools.load_test --url http://localhost:8080 --users 50 --ramp-up 20 --out output/load_test/50_users.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from visual_generation.sweep import build_grid
+
+JOB_FINISHED = ('done', 'failed')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers, or None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values):
+    """Count, mean and p50/p95/p99/max of a list of durations in seconds."""
+    return {
+        'count': len(values),
+        'mean_s': sum(values) / len(values) if values else None,
+        'p50_s': percentile(values, 50),
+        'p95_s': percentile(values, 95),
+        'p99_s': percentile(values, 99),
+        'max_s': max(values) if values else None,
+    }
+
+
+class LoadTestResults:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # step name -> durations in seconds
+        self.errors = defaultdict(int)      # step name -> failed requests
+        self.job_turnaround = []            # submit -> finished, in seconds
+        self.jobs = defaultdict(int)        # submitted / done / failed / rejected / timed_out
+        self.server_samples = []
+
+    def record(self, step, started, response=None, error=None):
+        self.latencies[step].append(time.perf_counter() - started)
+        if error is not None or (response is not None and response.status_code >= 400):
+            self.errors[step] += 1
+
+
+async def timed_request(client, results, step, method, url, **kwargs):
+    """Sends one request and records its latency under `step`. Returns the response or None."""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        results.record(step, started, error=e)
+        return None
+    results.record(step, started, response=response)
+    return response
+
+
+async def run_session(base_url, parameters, results, args):
+    """One designer: landing page, parameters page, generate, result page, then poll until done."""
+    user_id = uuid.uuid4().hex
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout,
+                                 headers={'X-User-Id': user_id}) as client:
+        for _ in range(args.iterations):
+            await timed_request(client, results, 'GET /', 'GET', '/')
+            await asyncio.sleep(args.think_time)
+            await timed_request(client, results, 'GET /parameters', 'GET', '/parameters')
+            await asyncio.sleep(args.think_time)
+
+            submitted_at = time.perf_counter()
+            response = await timed_request(client, results, 'POST /api/jobs', 'POST', '/api/jobs',
+                                           json=random.choice(parameters))
+            if response is None:
+                continue
+            if response.status_code == 429:
+                results.jobs['rejected'] += 1
+                continue
+            if response.status_code != 200:
+                continue
+            job_id = response.json()['job_id']
+            results.jobs['submitted'] += 1
+
+            await timed_request(client, results, 'GET /result/{job_id}', 'GET', f'/result/{job_id}')
+
+            deadline = submitted_at + args.job_timeout
+            status = None
+            while time.perf_counter() < deadline:
+                response = await timed_request(client, results, 'GET /api/jobs/{job_id}', 'GET',
+                                               f'/api/jobs/{job_id}')
+                if response is not None and response.status_code == 200:
+                    status = response.json()['status']
+                    if status in JOB_FINISHED:
+                        break
+                await asyncio.sleep(args.poll_interval)
+
+            if status in JOB_FINISHED:
+                results.jobs[status] += 1
+                results.job_turnaround.append(time.perf_counter() - submitted_at)
+            else:
+                results.jobs['timed_out'] += 1
+            await asyncio.sleep(args.think_time)
+
+
+async def sample_server(base_url, results, interval, stop):
+    """Polls /api/stats until `stop` is set."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=interval * 5) as client:
+        started = time.perf_counter()
+        while not stop.is_set():
+            try:
+                response = await client.get('/api/stats')
+                if response.status_code == 200:
+                    sample = response.json()
+                    sample['t_s'] = time.perf_counter() - started
+                    results.server_samples.append(sample)
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def summarize_server(samples):
+    """Peak and mean figures over the /api/stats samples."""
+    def series(*keys):
+        values = []
+        for sample in samples:
+            value = sample
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                values.append(value)
+        return values
+
+    summary = {'samples': len(samples)}
+    for name, keys in {
+        'event_loop_lag_max_ms': ('event_loop_lag', 'max_ms'),
+        'event_loop_lag_mean_ms': ('event_loop_lag', 'mean_ms'),
+        'cpu_percent': ('process', 'cpu_percent'),
+        'system_cpu_percent': ('process', 'system_cpu_percent'),
+        'rss_mb': ('process', 'rss_mb'),
+        'subprocesses': ('process', 'subprocesses'),
+        'queued_jobs': ('scheduler', 'queued'),
+        'running_jobs': ('scheduler', 'running'),
+    }.items():
+        values = series(*keys)
+        summary[name] = {
+            'mean': sum(values) / len(values) if values else None,
+            'max': max(values) if values else None,
+        }
+    return summary
+
+
+async def run_load_test(args):
+    parameters = build_grid()
+    results = LoadTestResults()
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_server(args.url, results, args.sample_interval, stop))
+
+    started = time.perf_counter()
+    sessions = []
+    for i in range(args.users):
+        # Spread session starts evenly over the ramp-up period
+        if args.ramp_up > 0 and i > 0:
+            await asyncio.sleep(args.ramp_up / args.users)
+        sessions.append(asyncio.create_task(run_session(args.url, parameters, results, args)))
+    await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await sampler
+
+    return {
+        'config': {
+            'url': args.url,
+            'users': args.users,
+            'iterations': args.iterations,
+            'ramp_up_s': args.ramp_up,
+            'think_time_s': args.think_time,
+        },
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(time.time() - elapsed)),
+        'duration_s': elapsed,
+        'requests': {
+            step: dict(summarize(values), errors=results.errors[step])
+            for step, values in sorted(results.latencies.items())
+        },
+        'jobs': dict(results.jobs, turnaround=summarize(results.job_turnaround),
+                     throughput_per_min=60 * (results.jobs['done'] + results.jobs['failed']) / elapsed),
+        'server': summarize_server(results.server_samples),
+        'server_samples': results.server_samples,
+    }
+
+
+def print_summary(report):
+    def fmt(seconds):
+        return '-' if seconds is None else f'{seconds * 1000:.0f}ms'
+
+    def fmt_number(value):
+        return '-' if value is None else f'{value:.1f}'
+
+    print(f"{report['config']['users']} users, {report['duration_s']:.1f}s")
+    for step, stats in report['requests'].items():
+        print(f"  {step:<26} n={stats['count']:<5} errors={stats['errors']:<3} "
+              f"p50={fmt(stats['p50_s'])} p95={fmt(stats['p95_s'])} p99={fmt(stats['p99_s'])}")
+    jobs = report['jobs']
+    turnaround = jobs['turnaround']
+    print(f"  jobs: done={jobs.get('done', 0)} failed={jobs.get('failed', 0)} rejected={jobs.get('rejected', 0)} "
+          f"timed_out={jobs.get('timed_out', 0)} p50={fmt(turnaround['p50_s'])} p95={fmt(turnaround['p95_s'])} "
+          f"p99={fmt(turnaround['p99_s'])}")
+    server = report['server']
+    print(f"  server: lag max={fmt_number(server['event_loop_lag_max_ms']['max'])} ms, "
+          f"cpu max={fmt_number(server['cpu_percent']['max'])}%, rss max={fmt_number(server['rss_mb']['max'])} MB, "
+          f"subprocesses max={server['subprocesses']['max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent designers against a running app instance.")
+    parser.add_argument('--url', default='http://localhost:8080', help="Base URL of the running app.")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated sessions.")
+    parser.add_argument('--iterations', type=int, default=1, help="Generate flows per session.")
+    parser.add_argument('--ramp-up', type=float, default=0.0, help="Seconds over which sessions are started.")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Pause between steps, in seconds.")
+    parser.add_argument('--poll-interval', type=float, default=0.5,
+                        help="Job status polling interval, in seconds.")
+    parser.add_argument('--sample-interval', type=float, default=1.0, help="/api/stats sampling interval.")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout, in seconds.")
+    parser.add_argument('--job-timeout', type=float, default=300.0, help="Give up on a job after this long.")
+    parser.add_argument('--out', default=None,
+                        help="Report path (default: output/load_test/report-<timestamp>.json).")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args))
+
+    out = args.out or os.path.join('output', 'load_test', f"report-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_summary(report)
+    print(f"Report written to {out}")
+
+
+if __name__ == '__main__':
+    main()
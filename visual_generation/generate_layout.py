@@ -5,6 +5,8 @@ import os
 import random
 import math
 
+from visual_generation.module_catalog import CATALOG_PATH, get_catalog
+
 def generate_2d_visual(user_input):
     """
     Converts validated user input JSON into 2D visualization.
@@ -39,21 +41,8 @@ def calculate_area_per_crew(mission_days, habitat_material):
     return base_area
 
 def module_dimensions(module_type):
-    """Return minimum dimensions for each module type (width, depth, height in meters)."""
-    dims = {
-        "Private Quarters": (0.76, 0.76, 1.98),
-        "Washroom/Hygiene": (1.14, 0.76, 1.98),
-        "Waste Management (Human)": (1.02, 0.76, 1.98),
-        "Waste Management (Trash)": (2.0, 1.0, 1.8),
-        "Gym": (2.5, 2.5, 2.5),
-        "Habitation": (3.0, 3.0, 2.5),
-        "Laboratory": (2.5, 2.5, 2.5),
-        "Airlock": (2.0, 2.0, 2.5),
-        "Storage": (2.0, 2.0, 2.5),
-        "Greenhouse": (2.5, 2.5, 2.5),
-        "Medical Bay": (2.0, 2.0, 2.5),
-    }
-    return dims.get(module_type, (2.0, 2.0, 2.5))
+    """Return the dimensions of a module type (width, depth, height in meters) from the module catalog."""
+    return get_catalog().dimensions(module_type)
 
 def generate_floor_plan(modules, module_sizes, total_area, layers=1):
     """
@@ -90,10 +79,14 @@ def generate_floor_plan(modules, module_sizes, total_area, layers=1):
         })
     return floor_plan
 
-def generate_layout(parameters):
+def generate_layout(parameters, options=None):
     """
     Calls the C++ backend executable to generate the habitat layout.
     It passes parameters via stdin and receives results via stdout.
+
+    `options` holds optional top-level backend settings, e.g.
+    {"alternatives": {"count": 3, "min_distance_m": 1.0}} to also return the
+    best 3 layouts that are at least 1 m apart.
     """
     try:
         # Determine the path to the C++ executable
@@ -116,7 +109,9 @@ def generate_layout(parameters):
                 }
 
         # The C++ backend expects the parameters to be nested under a "habitat" key
-        input_data = {"habitat": parameters}
+        input_data = {"habitat": parameters, "module_catalog": str(CATALOG_PATH)}
+        if options:
+            input_data.update(options)
         input_json = json.dumps(input_data)
 
         # Run the C++ process
@@ -0,0 +1,365 @@
+"""
+Admission-controlled job scheduler for layout generation.
+
+Every optimizer run is a job with its own ID and result file. Jobs wait in a bounded
+priority queue (interactive requests ahead of batch work), at most `max_workers` optimizer
+processes run at once, and each user may only have `per_user_limit` jobs running at a time.
+When the queue is full new submissions are rejected with QueueFullError instead of piling
+more processes onto the CPU. The number of workers is fixed (DEFAULT_MAX_WORKERS, or the
+HABITAT_MAX_WORKERS environment variable); if there are more cores than workers, each
+optimizer run uses the spare cores for extra swarm islands.
+"""
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from visual_generation.generate_layout import generate_layout
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+# Optimizer processes run at once. A fixed number rather than one per core: every run holds its
+# own memory and the per-user limit only spreads a few workers fairly. HABITAT_MAX_WORKERS
+# overrides it, and HABITAT_ISLANDS_PER_JOB the islands each run gets from the spare cores.
+DEFAULT_MAX_WORKERS = 2
+
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent.parent / 'output' / 'jobs'
+# Finished jobs are forgotten after this long; their result files stay on disk
+JOB_RETENTION_S = 60 * 60
+
+
+def _setting(name, default):
+    """Reads a positive integer from the environment variable `name`, or returns `default`."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a positive integer, not {value!r}') from None
+    if number < 1:
+        raise ValueError(f'{name} must be a positive integer, not {value!r}')
+    return number
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class Job:
+    def __init__(self, job_id, user_id, parameters, priority, sequence, options=None):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.parameters = parameters
+        self.options = options
+        self.priority = priority
+        self.sequence = sequence
+        self.status = JOB_QUEUED
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def sort_key(self):
+        # Lower priority value first, then first come, first served
+        return (self.priority, self.sequence)
+
+
+class LayoutJobScheduler:
+    def __init__(self, max_workers=None, max_queued=32, per_user_limit=1,
+                 results_dir=DEFAULT_RESULTS_DIR, runner=generate_layout, islands_per_job=None):
+        self.max_workers = max_workers or _setting('HABITAT_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+        # Cores left over per worker become optimizer islands (independent swarms) for each job
+        self.islands_per_job = islands_per_job or _setting(
+            'HABITAT_ISLANDS_PER_JOB', max(1, (os.cpu_count() or 1) // self.max_workers))
+        self.max_queued = max_queued
+        self.per_user_limit = per_user_limit
+        self.results_dir = Path(results_dir)
+        self.runner = runner
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queue = []  # heap of (sort_key, job_id)
+        self._jobs = {}
+        self._running_per_user = defaultdict(int)
+        self._listeners = defaultdict(list)  # job_id -> callbacks taking a status dict
+        self._result_listeners = []  # callbacks taking (job_id, result) of every successful job
+        self._sequence = itertools.count()
+        self._workers = []
+
+    def start(self):
+        """Starts the worker threads. Each worker runs one optimizer process at a time."""
+        with self._lock:
+            if self._workers:
+                return
+            self.results_dir.mkdir(parents=True, exist_ok=True)
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f'layout-worker-{i}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, parameters, user_id, priority=PRIORITY_INTERACTIVE, options=None):
+        """
+        Queues a layout generation job. `options` are passed through to the runner
+        (see generate_layout).
+
+        Returns:
+            str: The new job's ID.
+
+        Raises:
+            QueueFullError: If `max_queued` jobs are already waiting.
+        """
+        self.start()
+        with self._lock:
+            self._forget_finished_jobs()
+            if len(self._queue) >= self.max_queued:
+                raise QueueFullError(
+                    f'The layout queue is full ({self.max_queued} jobs waiting). Please try again shortly.'
+                )
+            job = Job(uuid.uuid4().hex, user_id, parameters, priority, next(self._sequence), options)
+            self._jobs[job.job_id] = job
+            heapq.heappush(self._queue, (job.sort_key(), job.job_id))
+            self._wakeup.notify()
+            # A new interactive job can move ahead of queued batch jobs
+            notifications = self._queued_notifications()
+        self._deliver(notifications)
+        return job.job_id
+
+    def get_status(self, job_id):
+        """
+        Returns a snapshot of a job's state, or None for unknown IDs.
+        Queued jobs include their 1-based position among the jobs that will run before them.
+        """
+        with self._lock:
+            return self._status(job_id)
+
+    def subscribe(self, job_id, callback):
+        """
+        Calls `callback(status)` with the job's current status right away, and again whenever its
+        status or queue position changes, until it finishes. `status` is a get_status() snapshot
+        (None for unknown jobs). Later calls come from worker threads.
+
+        Returns:
+            Callable[[], None]: A function that removes the callback.
+        """
+        with self._lock:
+            status = self._status(job_id)
+            if status is not None and status['status'] not in (JOB_DONE, JOB_FAILED):
+                self._listeners[job_id].append(callback)
+        callback(status)
+
+        def unsubscribe():
+            with self._lock:
+                listeners = self._listeners.get(job_id)
+                if listeners and callback in listeners:
+                    listeners.remove(callback)
+                    if not listeners:
+                        del self._listeners[job_id]
+        return unsubscribe
+
+    def add_result_listener(self, callback):
+        """
+        Calls `callback(job_id, result)` from the worker thread whenever a job's result was
+        stored successfully, before its subscribers are told it is done.
+        """
+        with self._lock:
+            self._result_listeners.append(callback)
+
+    def _status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            if not self.is_valid_job_id(job_id):
+                return None
+            # Jobs from earlier server runs only exist as result files
+            if self.result_path(job_id).exists():
+                return {'job_id': job_id, 'status': JOB_DONE, 'queue_position': 0}
+            return None
+        status = {
+            'job_id': job.job_id,
+            'status': job.status,
+            'queue_position': 0,
+            'error': job.error,
+            'parameters': job.parameters,
+        }
+        if job.status == JOB_QUEUED:
+            status['queue_position'] = 1 + sum(
+                1 for key, _ in self._queue if key < job.sort_key()
+            )
+        return status
+
+    def _queued_notifications(self, changed_job_id=None):
+        """
+        Collects (callbacks, status) for `changed_job_id` and for every subscribed queued job,
+        whose queue positions may have moved. Must be called with the lock held; deliver the
+        result with _deliver() after releasing it.
+        """
+        notifications = []
+        for job_id, listeners in list(self._listeners.items()):
+            job = self._jobs.get(job_id)
+            if job_id == changed_job_id or (job is not None and job.status == JOB_QUEUED):
+                status = self._status(job_id)
+                notifications.append((list(listeners), status))
+                if status is None or status['status'] in (JOB_DONE, JOB_FAILED):
+                    del self._listeners[job_id]
+        return notifications
+
+    @staticmethod
+    def _deliver(notifications):
+        for listeners, status in notifications:
+            for callback in listeners:
+                callback(status)
+
+    @staticmethod
+    def is_valid_job_id(job_id):
+        """Job IDs are generated hex strings; anything else (a mistyped link, say) names no job."""
+        return isinstance(job_id, str) and bool(job_id) and all(c in '0123456789abcdef' for c in job_id)
+
+    def result_path(self, job_id):
+        # Reject anything but generated IDs to keep paths inside results_dir
+        if not self.is_valid_job_id(job_id):
+            raise ValueError(f'Invalid job ID: {job_id}')
+        return self.results_dir / f'{job_id}.json'
+
+    def trajectory_path(self, job_id):
+        """Where a job that asked for {"trajectory": {}} has its optimization recorded."""
+        return self.result_path(job_id).with_suffix('.traj')
+
+    def load_result(self, job_id):
+        """Returns the stored layout for a finished job, or None if there is none."""
+        try:
+            path = self.result_path(job_id)
+        except ValueError:
+            return None
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def latest_result(self):
+        """
+        Returns the most recently stored successful layout, or None if there is none. Results
+        are files in results_dir, so this includes the jobs of earlier server runs.
+        """
+        if not self.results_dir.is_dir():
+            return None
+        paths = [path for path in self.results_dir.glob('*.json') if self.is_valid_job_id(path.stem)]
+        for path in sorted(paths, key=lambda path: path.stat().st_mtime, reverse=True):
+            result = self.load_result(path.stem)
+            if result is not None and result.get('status') == 'success':
+                return result
+        return None
+
+    def stats(self):
+        """Returns queue depth and running job counts."""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == JOB_RUNNING)
+            return {'queued': len(self._queue), 'running': running, 'max_workers': self.max_workers}
+
+    def _forget_finished_jobs(self):
+        cutoff = time.time() - JOB_RETENTION_S
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _next_runnable(self):
+        """Pops the highest-priority queued job whose user is under the concurrency cap."""
+        deferred = []
+        job = None
+        while self._queue:
+            key, job_id = heapq.heappop(self._queue)
+            candidate = self._jobs[job_id]
+            if self._running_per_user[candidate.user_id] < self.per_user_limit:
+                job = candidate
+                break
+            deferred.append((key, job_id))
+        for item in deferred:
+            heapq.heappush(self._queue, item)
+        return job
+
+    def _worker_loop(self):
+        while True:
+            with self._lock:
+                job = self._next_runnable()
+                while job is None:
+                    self._wakeup.wait()
+                    job = self._next_runnable()
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                self._running_per_user[job.user_id] += 1
+                notifications = self._queued_notifications(job.job_id)
+            self._deliver(notifications)
+
+            try:
+                result = self.runner(job.parameters, self._job_options(job))
+                result['job_id'] = job.job_id
+                self._write_result(job.job_id, result)
+                error = None if result.get('status') == 'success' else result.get('description')
+            except Exception as e:
+                error = f'An unexpected error occurred while generating the layout: {e}'
+            if error is None:
+                self._notify_result(job.job_id, result)
+
+            with self._lock:
+                job.status = JOB_DONE if error is None else JOB_FAILED
+                job.error = error
+                job.finished_at = time.time()
+                self._running_per_user[job.user_id] -= 1
+                # A user slot was freed, so deferred jobs may now be runnable
+                self._wakeup.notify_all()
+                notifications = self._queued_notifications(job.job_id)
+            self._deliver(notifications)
+
+    def _notify_result(self, job_id, result):
+        with self._lock:
+            listeners = list(self._result_listeners)
+        for callback in listeners:
+            try:
+                callback(job_id, result)
+            except Exception:
+                # A failing listener must neither fail the job nor stop the worker
+                traceback.print_exc()
+
+    def _job_options(self, job):
+        """
+        Returns the job's backend options, with the island count filled in unless the job set one,
+        and the file for a requested trajectory recording.
+        """
+        options = dict(job.options or {})
+        if self.islands_per_job > 1:
+            options.setdefault('islands', {'count': self.islands_per_job})
+        if 'trajectory' in options:
+            options['trajectory'] = dict(options['trajectory'], path=str(self.trajectory_path(job.job_id)))
+        return options
+
+    def _write_result(self, job_id, result):
+        path = self.result_path(job_id)
+        temp_path = path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(temp_path, path)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the process-wide scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LayoutJobScheduler()
+        return _scheduler
@@ -0,0 +1,104 @@
+"""
+The module catalog shared with the C++ optimizer: schemas/module_definitions.json.
+
+Module types (dimensions, category, how many a mission needs) and the adjacency rules between
+categories live in that one file, so the preview layout and the optimizer agree on every
+module's size, and new module types or rules need no code changes. The C++ side reads the same
+file (cpp_backend/src/ModuleCatalog.h); generate_layout() passes it the path.
+
+Example:
+    catalog = get_catalog()
+    for name, module in catalog.select_modules(crew_size=4):
+        width, depth, height = catalog.dimensions(module['name'])
+"""
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / 'schemas' / 'module_definitions.json'
+
+# Size of module types the catalog does not know
+DEFAULT_DIMENSIONS = (2.0, 2.0, 2.5)
+
+
+class ModuleCatalog:
+    """Module types by name (and by their display label) and adjacency rules by category pair."""
+
+    def __init__(self, data):
+        self.categories = list(data.get('categories', []))
+        self.modules = list(data['modules'])
+        self.rules = list(data.get('adjacency_rules', []))
+        self._by_name = {}
+        for module in self.modules:
+            if self.categories and module['category'] not in self.categories:
+                raise ValueError(f"Module '{module['name']}' has an unknown category: {module['category']}")
+            self._by_name[module['name']] = module
+            self._by_name.setdefault(module.get('label', module['name']), module)
+
+        # Symmetric category-pair table, as the optimizer keeps it
+        self.rule_table = {}
+        for rule in self.rules:
+            first, second = rule['categories']
+            if (first, second) in self.rule_table:
+                raise ValueError(f'More than one adjacency rule for {first} and {second}')
+            self.rule_table[(first, second)] = self.rule_table[(second, first)] = rule
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def module(self, name):
+        """Returns the catalog entry of a module type, by name or label, or None."""
+        return self._by_name.get(name)
+
+    def dimensions(self, name):
+        """Returns (width, depth, height) of a module type in meters."""
+        module = self.module(name)
+        if module is None:
+            return DEFAULT_DIMENSIONS
+        dimensions = module['dimensions_m']
+        return dimensions['width'], dimensions['depth'], dimensions['height']
+
+    def count_for(self, module, crew_size):
+        """How many modules of a type a crew needs, as in ModulePrototype::countFor."""
+        count = module.get('count', 0)
+        crew_per_module = module.get('crew_per_module', 0)
+        return max(count, crew_size // crew_per_module) if crew_per_module > 0 else count
+
+    def select_modules(self, crew_size):
+        """
+        Returns (unique name, catalog entry) of every module a mission needs, in the order and
+        with the names the optimizer gives them (a second "Washroom" becomes "Washroom_1").
+        """
+        counts = defaultdict(int)
+        selected = []
+        for module in self.modules:
+            for _ in range(self.count_for(module, crew_size)):
+                name = module['name']
+                counts[name] += 1
+                selected.append((name if counts[name] == 1 else f'{name}_{counts[name] - 1}', module))
+        return selected
+
+    def rule(self, first_category, second_category):
+        """The adjacency rule between two categories, or None."""
+        return self.rule_table.get((first_category, second_category))
+
+    def min_distance(self, first_category, second_category):
+        """Distance modules of two categories must keep, in meters (0 if no rule applies)."""
+        rule = self.rule(first_category, second_category)
+        return rule['min_distance_m'] if rule else 0.0
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Returns the process-wide catalog, loading it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModuleCatalog.load()
+        return _catalog
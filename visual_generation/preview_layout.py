@@ -0,0 +1,189 @@
+import math
+from collections import defaultdict
+
+from visual_generation.generate_layout import (
+    calculate_area_per_crew,
+    generate_floor_plan,
+    module_dimensions,
+)
+from visual_generation.module_catalog import get_catalog
+
+LEVEL_HEIGHT = 2.5      # meters between floor levels
+CELL_SIZE = 1.0         # spatial index cell size in meters
+SEARCH_STEP = 0.25      # spacing of candidate positions in meters
+CLEARANCE = 0.1         # minimum gap kept between module footprints in meters
+
+
+def select_preview_modules(crew_size):
+    """
+    Return the (name, catalog name, category) of every module for a crew size, selected from
+    the module catalog exactly as select_modules_for_mission() in the C++ backend does.
+    """
+    return [(name, module['name'], module['category']) for name, module in get_catalog().select_modules(crew_size)]
+
+
+class FootprintIndex:
+    """
+    Uniform-grid spatial index over the rectangular footprints placed on each level.
+    Overlap queries only look at footprints registered in the cells a rectangle touches.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        self.rects = []
+
+    def _cells_for(self, level, rect):
+        min_x, min_y, max_x, max_y = rect
+        size = self.cell_size
+        for cx in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            for cy in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+                yield (level, cx, cy)
+
+    def overlaps(self, level, rect):
+        min_x, min_y, max_x, max_y = rect
+        for cell in self._cells_for(level, rect):
+            for index in self.cells.get(cell, ()):
+                o_min_x, o_min_y, o_max_x, o_max_y = self.rects[index]
+                if min_x < o_max_x and max_x > o_min_x and min_y < o_max_y and max_y > o_min_y:
+                    return True
+        return False
+
+    def insert(self, level, rect):
+        index = len(self.rects)
+        self.rects.append(rect)
+        for cell in self._cells_for(level, rect):
+            self.cells[cell].append(index)
+
+
+def _fits_in_circle(x, y, half_w, half_d, radius):
+    """True if every corner of the footprint centered at (x, y) lies inside the floor circle."""
+    far_x = abs(x) + half_w
+    far_y = abs(y) + half_d
+    return far_x * far_x + far_y * far_y <= radius * radius
+
+
+def _candidate_positions(target_x, target_y, radius):
+    """Yield candidate centers in growing square rings around the radial target position."""
+    max_ring = math.ceil(2 * radius / SEARCH_STEP)
+    yield target_x, target_y
+    for ring in range(1, max_ring + 1):
+        offset = ring * SEARCH_STEP
+        for k in range(-ring, ring + 1):
+            step = k * SEARCH_STEP
+            yield target_x + step, target_y - offset
+            yield target_x + step, target_y + offset
+        for k in range(-ring + 1, ring):
+            step = k * SEARCH_STEP
+            yield target_x - offset, target_y + step
+            yield target_x + offset, target_y + step
+
+
+def _place_module(index, level, target, half_w, half_d, radius):
+    """Find the closest free position to the target on a level, or None if the level is full."""
+    for x, y in _candidate_positions(target[0], target[1], radius):
+        if not _fits_in_circle(x, y, half_w, half_d, radius):
+            continue
+        rect = (x - half_w - CLEARANCE / 2, y - half_d - CLEARANCE / 2,
+                x + half_w + CLEARANCE / 2, y + half_d + CLEARANCE / 2)
+        if not index.overlaps(level, rect):
+            index.insert(level, rect)
+            return x, y
+    return None
+
+
+def generate_preview_layout(parameters):
+    """
+    Builds an instant, overlap-free preview layout without running the optimizer.
+
+    The radial arrangement from generate_floor_plan() gives each module a target position;
+    footprints are then packed as close to their targets as possible inside the circular
+    floor, opening a new level whenever one fills up. The result uses the same structure as
+    the backend output so the result page can render it and later replace it in place.
+    """
+    crew_size = int(parameters.get("crew_size", 4))
+    mission_days = int(parameters.get("mission_days", 30))
+    material = parameters.get("habitat_material", "")
+
+    modules = select_preview_modules(crew_size)
+    module_sizes = {}
+    for name, module_type, _ in modules:
+        width, depth, height = module_dimensions(module_type)
+        module_sizes[name] = {
+            "area_m2": width * depth,
+            "volume_m3": width * depth * height,
+            "width_m": width,
+            "depth_m": depth,
+            "height_m": height,
+        }
+
+    total_area = calculate_area_per_crew(mission_days, material) * crew_size
+    floor_plan = generate_floor_plan([name for name, _, _ in modules], module_sizes, total_area)
+    radius = floor_plan[0]["radius_m"]
+    radial_positions = {entry["module"]: entry for entry in floor_plan[0]["modules"]}
+
+    # Place the largest footprints first so small modules fill the remaining gaps
+    order = sorted(range(len(modules)), key=lambda i: -module_sizes[modules[i][0]]["area_m2"])
+    index = FootprintIndex()
+    placed = [None] * len(modules)
+    for i in order:
+        name, _, category = modules[i]
+        size = module_sizes[name]
+        half_w, half_d = size["width_m"] / 2, size["depth_m"] / 2
+        angle = math.radians(radial_positions[name]["angle_deg"])
+        distance = max(0.0, radial_positions[name]["distance_from_center_m"])
+        target = (distance * math.cos(angle), distance * math.sin(angle))
+
+        if not _fits_in_circle(0.0, 0.0, half_w, half_d, radius):
+            # Footprint is wider than the floor itself; there is nothing to pack
+            placed[i] = ((0.0, 0.0), 0)
+            continue
+
+        # An empty level always accepts a footprint that fits the circle, so this terminates
+        level = 0
+        position = _place_module(index, level, target, half_w, half_d, radius)
+        while position is None:
+            level += 1
+            position = _place_module(index, level, target, half_w, half_d, radius)
+        placed[i] = (position, level)
+
+    output_modules = []
+    levels = defaultdict(list)
+    for i, (name, _, category) in enumerate(modules):
+        (x, y), level = placed[i]
+        size = module_sizes[name]
+        module_data = {
+            "index": i,
+            "name": name,
+            "category": category,
+            "position": {"x": x, "y": y, "z": level * LEVEL_HEIGHT + size["height_m"] / 2},
+            "scale": {"x": size["width_m"], "y": size["depth_m"], "z": size["height_m"]},
+            "level": level,
+            "level_height": {"min": level * LEVEL_HEIGHT, "max": (level + 1) * LEVEL_HEIGHT},
+            "violations": [],
+        }
+        output_modules.append(module_data)
+        levels[level].append(module_data)
+
+    num_levels = max(levels) + 1
+    total_height = num_levels * LEVEL_HEIGHT
+    return {
+        "status": "preview",
+        "description": f"Preview layout for {crew_size} crew. Optimizing...",
+        "modules": output_modules,
+        "levels": [
+            {"min_z": level * LEVEL_HEIGHT, "max_z": (level + 1) * LEVEL_HEIGHT, "modules": levels[level]}
+            for level in range(num_levels)
+        ],
+        "module_sizes": module_sizes,
+        "violations": [],
+        "violation_summary": {},
+        "floor_plan": floor_plan,
+        "habitat_dimensions": {
+            "total_height_m": total_height,
+            "cylindrical_base_height_m": total_height * 0.3,
+            "cylindrical_base_diameter_m": radius * 2,
+            "inflatable_section_height_m": total_height * 0.7,
+            "inflatable_section_diameter_m": radius * 2.1,
+        },
+    }
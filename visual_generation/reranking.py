@@ -0,0 +1,140 @@
+"""
+Re-ranks stored layouts under new score weights without re-running the optimizer.
+
+When asked for a candidate pool ({"candidate_pool": {"size": N}}), the optimizer stores the
+unweighted score terms of up to N of the best layouts it found next to the result. A layout's
+score under any weights is then a dot product with its terms:
+
+    score = w_compactness * compactness - (w_collision * collision + w_bounds * bounds + w_adjacency * adjacency)
+
+so scoring a whole pool (or a pool under many weightings at once) is one matrix product.
+
+The pool is opt-in: at 500 layouts it makes up most of a stored result (about 400 KB), so only
+jobs whose layouts are meant to be re-ranked should ask for it, e.g. with POOL_OPTIONS.
+
+Example:
+    result = generate_layout(parameters, {**LAYOUT_OPTIONS, **POOL_OPTIONS})
+    pool = CandidatePool.from_result(result)
+    order, scores = pool.rank({'adjacency': 0.2}, top=5)
+    modules = pool.layout(order[0])
+"""
+import copy
+import math
+
+import numpy as np
+
+from visual_generation.preview_layout import LEVEL_HEIGHT
+
+# In the order of the optimizer's ScoreTerms (cpp_backend/src/ScoreTerms.h)
+SCORE_TERMS = ('compactness', 'collision', 'bounds', 'adjacency')
+# Compactness is a reward, the other terms are penalties
+TERM_SIGNS = np.array([1.0, -1.0, -1.0, -1.0])
+# Optimizer options that keep a pool of good layouts for re-ranking
+POOL_OPTIONS = {"candidate_pool": {"size": 500}}
+
+
+def weight_vector(weights):
+    """
+    Converts weights to an array of shape (4,), or (K, 4) for K weightings at once.
+
+    Args:
+        weights: A dict by term name (missing terms weigh 1), a sequence of up to four
+            weights in SCORE_TERMS order (missing trailing weights are 1, as in the optimizer),
+            or a (K, 4) array.
+    """
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(SCORE_TERMS)
+        if unknown:
+            raise ValueError(f"Unknown score terms: {', '.join(sorted(unknown))}")
+        return np.array([float(weights.get(term, 1.0)) for term in SCORE_TERMS])
+
+    weights = np.asarray(weights, dtype=float)
+    if weights.ndim == 2:
+        if weights.shape[1] != len(SCORE_TERMS):
+            raise ValueError(f"A weight matrix needs {len(SCORE_TERMS)} columns")
+        return weights
+    if weights.ndim != 1 or len(weights) > len(SCORE_TERMS):
+        raise ValueError(f"Expected at most {len(SCORE_TERMS)} weights")
+    return np.concatenate([weights, np.ones(len(SCORE_TERMS) - len(weights))])
+
+
+class CandidatePool:
+    """The stored layouts of one optimizer result, with their score terms as an (N, 4) array."""
+
+    def __init__(self, terms, positions, yaw_degrees, modules):
+        self.terms = np.asarray(terms, dtype=float).reshape(-1, len(SCORE_TERMS))
+        self.positions = np.asarray(positions, dtype=float)      # (N, M, 3)
+        self.yaw_degrees = np.asarray(yaw_degrees, dtype=float)  # (N, M)
+        self.modules = modules  # The result's modules; names, scales and categories are shared
+
+    @classmethod
+    def from_result(cls, result):
+        """Builds a pool from an optimizer result that was asked for a candidate pool."""
+        pool = (result or {}).get('candidate_pool')
+        if not pool:
+            raise ValueError("The result has no candidate pool; request one with {'candidate_pool': {'size': N}}")
+        if tuple(pool['term_names']) != SCORE_TERMS:
+            raise ValueError(f"Unexpected score terms: {pool['term_names']}")
+        return cls(pool['terms'], pool['positions'], pool['yaw_degrees'], result['modules'])
+
+    def __len__(self):
+        return len(self.terms)
+
+    def scores(self, weights):
+        """Scores every layout: shape (N,) for one weighting, (N, K) for a (K, 4) weight matrix."""
+        return (self.terms * TERM_SIGNS) @ weight_vector(weights).T
+
+    def rank(self, weights, top=None):
+        """
+        Orders the layouts by their score under `weights`, best first.
+
+        Returns:
+            tuple: (indices, scores) for the best `top` layouts, or all of them.
+        """
+        scores = self.scores(weights)
+        if scores.ndim != 1:
+            raise ValueError("rank() takes a single weighting; use scores() for several")
+        if top is not None and top < len(scores):
+            # Only the top entries need sorting
+            best = np.argpartition(-scores, top)[:top]
+            order = best[np.argsort(-scores[best], kind='stable')]
+        else:
+            order = np.argsort(-scores, kind='stable')
+        return order, scores[order]
+
+    def layout(self, index):
+        """
+        Returns the modules of one stored layout, in the result's module format, with their
+        levels worked out for the stored positions. Stored layouts carry no per-module
+        violations, so those are left out.
+        """
+        modules = []
+        for module, position, yaw in zip(self.modules, self.positions[index], self.yaw_degrees[index]):
+            module = copy.deepcopy(module)
+            module.pop('violations', None)
+            module['position'] = dict(zip('xyz', map(float, position)))
+            module['rotation_degrees'] = dict(module.get('rotation_degrees', {'x': 0.0, 'y': 0.0}), z=float(yaw))
+            modules.append(module)
+        assign_levels(modules)
+        return modules
+
+
+def assign_levels(modules, level_height=LEVEL_HEIGHT):
+    """
+    Sets every module's 'level' and 'level_height' as the optimizer's organize_into_levels
+    (cpp_backend/src/main.cpp) does: levels of level_height from the lowest module floor up,
+    each module on the level its center is in.
+    """
+    if not modules:
+        return
+    floors = [module['position']['z'] - module['scale']['z'] / 2 for module in modules]
+    ceilings = [module['position']['z'] + module['scale']['z'] / 2 for module in modules]
+    bottom = min(floors)
+    level_count = math.ceil((max(ceilings) - bottom) / level_height)
+    for module in modules:
+        module.pop('level', None)
+        module.pop('level_height', None)
+        level = math.floor((module['position']['z'] - bottom) / level_height)
+        if 0 <= level < level_count:
+            module['level'] = level
+            module['level_height'] = {'min': bottom + level * level_height, 'max': bottom + (level + 1) * level_height}
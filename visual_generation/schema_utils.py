@@ -1,5 +1,7 @@
 import json
-from jsonschema import validate, ValidationError
+from functools import lru_cache
+from jsonschema import Draft7Validator
+from jsonschema.exceptions import best_match
 import os
 
 def get_schema_path(schema_filename):
@@ -16,6 +18,25 @@ def load_schema(schema_path):
     except FileNotFoundError:
         return None
 
+@lru_cache(maxsize=None)
+def get_validator(schema_filename='habitat_mapping_schema.json'):
+    """
+    Loads a schema once and returns a compiled validator for it, or None if the file is missing.
+    Reusing the validator avoids re-reading and re-checking the schema for every validation.
+    """
+    schema = load_schema(get_schema_path(schema_filename))
+    if schema is None:
+        return None
+    Draft7Validator.check_schema(schema)
+    return Draft7Validator(schema)
+
+def _format_error(e):
+    """Create a more user-friendly error message from a ValidationError."""
+    if e.path:
+        error_path = " -> ".join(map(str, e.path))
+        return f"Validation Error for '{error_path}': {e.message}"
+    return f"Validation Error: {e.message}"
+
 def validate_parameters(parameters):
     """
     Validates habitat parameters against the habitat_mapping_schema.json.
@@ -27,25 +48,39 @@ def validate_parameters(parameters):
         tuple[bool, str]: A tuple containing a boolean for success/failure
                          and a message string.
     """
-    schema_path = get_schema_path('habitat_mapping_schema.json')
-    schema = load_schema(schema_path)
+    return validate_parameter_batch([parameters])[0]
 
-    if schema is None:
-        return False, f"Schema file not found at {schema_path}"
+def validate_parameter_batch(parameter_sets):
+    """
+    Validates many parameter dictionaries against the habitat_mapping_schema.json
+    using a single compiled validator.
+
+    Args:
+        parameter_sets (list[dict]): Parameter dictionaries to validate.
 
+    Returns:
+        list[tuple[bool, str]]: One (success, message) tuple per parameter dictionary.
+    """
     try:
-        # The schema expects the parameters to be nested under a "habitat" key
-        instance_to_validate = {"habitat": parameters}
-        validate(instance=instance_to_validate, schema=schema)
-        return True, "Parameters are valid!"
-    except ValidationError as e:
-        # Create a more user-friendly error message
-        if e.path:
-            error_path = " -> ".join(map(str, e.path))
-            return False, f"Validation Error for '{error_path}': {e.message}"
-        else:
-            return False, f"Validation Error: {e.message}"
+        validator = get_validator('habitat_mapping_schema.json')
     except Exception as e:
-        return False, f"An unexpected error occurred during validation: {e}"
+        return [(False, f"An unexpected error occurred during validation: {e}")] * len(parameter_sets)
+
+    if validator is None:
+        schema_path = get_schema_path('habitat_mapping_schema.json')
+        return [(False, f"Schema file not found at {schema_path}")] * len(parameter_sets)
+
+    results = []
+    for parameters in parameter_sets:
+        try:
+            # The schema expects the parameters to be nested under a "habitat" key
+            error = best_match(validator.iter_errors({"habitat": parameters}))
+            if error is None:
+                results.append((True, "Parameters are valid!"))
+            else:
+                results.append((False, _format_error(error)))
+        except Exception as e:
+            results.append((False, f"An unexpected error occurred during validation: {e}"))
+    return results
 
 
@@ -0,0 +1,257 @@
+"""
+Design-space sweep over habitat parameters.
+
+Expands a parameter grid (by default every combination of the schema enums, the UI's
+mission durations and every allowed crew size), validates it in one pass, runs the
+optimizer for each combination across a process pool and writes the LayoutMetrics of
+every result incrementally. Results are flushed in part files, and a checkpoint records
+which combinations are finished, so an interrupted sweep resumes where it stopped.
+
+Usage:
+    python -m visual_generation.sweep --out output/sweep
+    python -m visual_generation.sweep --out output/sweep --crew 2 4 6 --days 30 180 --workers 32
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from frontend.layout_metrics import LayoutMetrics
+from visual_generation.generate_layout import generate_layout
+from visual_generation.module_catalog import get_catalog
+from visual_generation.schema_utils import get_schema_path, load_schema, validate_parameter_batch
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional; fall back to CSV part files
+    pyarrow = None
+
+# Mission durations offered on the parameters page
+DEFAULT_MISSION_DAYS = [3, 30, 60, 180, 1200]
+# Result columns besides the swept parameters and the per-category module counts, with their types
+RESULT_COLUMNS = {
+    'status': str,
+    'error': str,
+    'elapsed_s': float,
+    'total_height_m': float,
+    'base_diameter_m': float,
+    'total_levels': int,
+    'total_modules': int,
+    'violation_count': int,
+    'max_violation_severity': float,
+    'unreachable_modules': int,
+    'min_corridor_width_m': float,
+}
+CHECKPOINT_FILENAME = 'checkpoint.json'
+
+
+def build_grid(crew_sizes=None, mission_days=None):
+    """
+    Expands every combination of the habitat schema's enum values, crew sizes and durations.
+    Crew sizes default to every integer the schema allows.
+    """
+    schema = load_schema(get_schema_path('habitat_mapping_schema.json'))
+    properties = schema['properties']['habitat']['properties']
+
+    if crew_sizes is None:
+        crew = properties['crew_size']
+        crew_sizes = list(range(crew['minimum'], crew['maximum'] + 1))
+    if mission_days is None:
+        mission_days = DEFAULT_MISSION_DAYS
+
+    axes = {name: prop['enum'] for name, prop in properties.items() if 'enum' in prop}
+    axes['crew_size'] = list(crew_sizes)
+    axes['mission_days'] = list(mission_days)
+
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def module_categories():
+    """The module categories of the shared module catalog, in catalog order."""
+    catalog = get_catalog()
+    return catalog.categories or sorted({module['category'] for module in catalog.modules})
+
+
+def result_columns(grid):
+    """
+    Returns {column: type} for the result rows of a sweep over `grid`, in file order: the
+    parameters, RESULT_COLUMNS and a module count per category. Every part file is written with
+    exactly these columns, so parts concatenate even when a part only holds failed runs.
+    """
+    columns = {name: type(value) for name, value in sorted(grid[0].items())} if grid else {}
+    columns.update(RESULT_COLUMNS)
+    for category in module_categories():
+        columns[f'modules_{category.lower()}'] = int
+    return columns
+
+
+def combination_key(parameters):
+    """A stable identifier for a parameter combination, used by the checkpoint."""
+    return json.dumps(parameters, sort_keys=True)
+
+
+def run_combination(parameters):
+    """Runs the optimizer for one combination and flattens its metrics into a result row."""
+    start = time.perf_counter()
+    result = generate_layout(parameters)
+    row = dict(parameters)
+    row['status'] = result.get('status', 'error')
+    row['elapsed_s'] = time.perf_counter() - start
+
+    if row['status'] != 'success':
+        row['error'] = result.get('description', '')
+        return row
+
+    metrics = LayoutMetrics(result)
+    row.update({
+        'total_height_m': metrics.total_height,
+        'base_diameter_m': metrics.base_diameter,
+        'total_levels': metrics.total_levels,
+        'total_modules': metrics.total_modules,
+        'violation_count': metrics.violation_stats['total_count'],
+        'max_violation_severity': metrics.violation_stats['max_severity'],
+        'error': '',
+    })
+    for category in module_categories():
+        row[f'modules_{category.lower()}'] = metrics.modules_by_category.get(category, 0)
+    if metrics.circulation_stats is not None:
+        row['unreachable_modules'] = len(metrics.circulation_stats['unreachable_modules'])
+        row['min_corridor_width_m'] = metrics.circulation_stats['min_corridor_width']
+    return row
+
+
+class SweepWriter:
+    """
+    Writes result rows to numbered part files in the output directory and keeps the
+    checkpoint in step with them. A combination only counts as done once its part file
+    is on disk, so resuming never duplicates or drops rows. Every part has the same
+    columns, given as {column: type} (see result_columns); missing values are left empty.
+    """
+
+    def __init__(self, out_dir, flush_every, columns):
+        self.out_dir = out_dir
+        self.flush_every = flush_every
+        self.columns = columns
+        self.checkpoint_path = os.path.join(out_dir, CHECKPOINT_FILENAME)
+        self.pending = []
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.completed = set()
+        self.parts = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            self.completed = set(checkpoint['completed'])
+            self.parts = checkpoint['parts']
+
+    def add(self, key, row):
+        self.pending.append((key, row))
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows = [row for _, row in self.pending]
+        unknown = set().union(*rows) - set(self.columns)
+        if unknown:
+            raise ValueError(f'Result columns missing from the sweep schema: {sorted(unknown)}')
+        self.parts += 1
+        if pyarrow is not None:
+            table = pyarrow.table({column: [row.get(column) for row in rows] for column in self.columns},
+                                  schema=self._arrow_schema())
+            part_path = os.path.join(self.out_dir, f'part-{self.parts:05d}.parquet')
+            pyarrow.parquet.write_table(table, part_path)
+        else:
+            part_path = os.path.join(self.out_dir, f'part-{self.parts:05d}.csv')
+            with open(part_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(self.columns))
+                writer.writeheader()
+                writer.writerows(rows)
+
+        self.completed.update(key for key, _ in self.pending)
+        self.pending = []
+        self._write_checkpoint()
+
+    def _arrow_schema(self):
+        types = {str: pyarrow.string(), int: pyarrow.int64(), float: pyarrow.float64()}
+        return pyarrow.schema([(column, types[kind]) for column, kind in self.columns.items()])
+
+    def _write_checkpoint(self):
+        # Write to a temporary file first so an interrupted write never corrupts the checkpoint
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'completed': sorted(self.completed), 'parts': self.parts}, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def run_sweep(out_dir, crew_sizes=None, mission_days=None, workers=None, flush_every=64, limit=None):
+    """
+    Runs a full sweep, skipping combinations already recorded in the checkpoint.
+
+    Returns:
+        dict: Counts of valid, invalid, skipped and newly completed combinations.
+    """
+    grid = build_grid(crew_sizes, mission_days)
+    validation = validate_parameter_batch(grid)
+    valid = [parameters for parameters, (ok, _) in zip(grid, validation) if ok]
+    invalid = [(parameters, message) for parameters, (ok, message) in zip(grid, validation) if not ok]
+    for parameters, message in invalid[:10]:
+        print(f"Skipping invalid combination {parameters}: {message}")
+
+    writer = SweepWriter(out_dir, flush_every, result_columns(grid))
+    pending = [parameters for parameters in valid if combination_key(parameters) not in writer.completed]
+    todo = pending if limit is None else pending[:limit]
+    print(f"{len(grid)} combinations, {len(invalid)} invalid, "
+          f"{len(valid) - len(pending)} already done, {len(todo)} to run")
+
+    start = time.perf_counter()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_combination, parameters): parameters for parameters in todo}
+            for future in as_completed(futures):
+                parameters = futures[future]
+                try:
+                    row = future.result()
+                except Exception as e:
+                    row = dict(parameters, status='error', error=str(e))
+                writer.add(combination_key(parameters), row)
+                done += 1
+                if done % 100 == 0 or done == len(todo):
+                    rate = done / (time.perf_counter() - start)
+                    print(f"{done}/{len(todo)} combinations ({rate:.1f}/s)")
+    finally:
+        # Keep whatever finished, including on Ctrl+C, so the next run resumes from here
+        writer.flush()
+
+    return {
+        'valid': len(valid),
+        'invalid': len(invalid),
+        'skipped': len(valid) - len(pending),
+        'completed': done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the habitat design space with the layout optimizer.")
+    parser.add_argument('--out', default=os.path.join('output', 'sweep'),
+                        help="Directory for result part files and the checkpoint.")
+    parser.add_argument('--crew', type=int, nargs='+', help="Crew sizes to sweep (default: schema range).")
+    parser.add_argument('--days', type=int, nargs='+', help="Mission durations in days to sweep.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument('--flush-every', type=int, default=64, help="Rows per part file and checkpoint.")
+    parser.add_argument('--limit', type=int, default=None, help="Only run this many pending combinations.")
+    args = parser.parse_args()
+
+    summary = run_sweep(args.out, args.crew, args.days, args.workers, args.flush_every, args.limit)
+    print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Reads optimization trajectories recorded by the optimizer (cpp_backend/src/TrajectoryRecorder.h).
+
+A job records one when its options contain {"trajectory": {}}; the scheduler stores the file
+next to the job's result and the result's "trajectory" entry names it. The file is memory-mapped,
+so opening it costs nothing and only the frames that are looked at are read. Positions are stored
+as quantized deltas between keyframes: seeking decodes forward from the nearest keyframe, and
+stepping to the next frame (as a replay does) applies a single delta to the last decoded frame.
+
+Example:
+    trajectory = Trajectory(result['trajectory']['path'])
+    positions, yaw, scores = trajectory.frame(120)  # (P, M, 3) meters, (P, M) radians, (P,)
+    curve = trajectory.best_scores()                  # (T,) global best after every iteration
+"""
+import numpy as np
+
+MAGIC = b'HTRJ'
+FORMAT_VERSION = 1
+KEYFRAME, DELTA8, DELTA16 = 0, 1, 2
+VALUES_PER_MODULE = 4  # x, y, z and yaw
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'), ('version', '<u4'), ('frame_count', '<u4'), ('islands', '<u4'),
+    ('particles', '<u4'), ('modules', '<u4'), ('keyframe_interval', '<u4'),
+    ('position_quantum', '<f4'), ('yaw_quantum', '<f4'), ('yaw_steps', '<u4'), ('index_offset', '<u8'),
+])
+FRAME_HEADER_DTYPE = np.dtype([('kind', 'u1'), ('padding', 'u1', 3), ('iteration', '<u4'), ('best_score', '<f4')])
+
+
+class Trajectory:
+    """One recorded optimization run: T frames of P particles (all islands) with M modules each."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(self._data) < HEADER_DTYPE.itemsize:
+            raise ValueError(f'{path} is too short to be a trajectory')
+        header = np.frombuffer(self._data, dtype=HEADER_DTYPE, count=1)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f'{path} is not a trajectory file')
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported trajectory version {header['version']}")
+
+        self.frame_count = int(header['frame_count'])
+        self.islands = int(header['islands'])
+        self.particles = int(header['particles'])
+        self.modules = int(header['modules'])
+        self.keyframe_interval = int(header['keyframe_interval'])
+        self.position_quantum = float(header['position_quantum'])
+        self.yaw_quantum = float(header['yaw_quantum'])
+        self.yaw_steps = int(header['yaw_steps'])
+
+        self.offsets = np.frombuffer(self._data, dtype='<u8', count=self.frame_count,
+                                     offset=int(header['index_offset'])).astype(np.int64)
+        self.kinds = np.asarray(self._data[self.offsets])
+        self.keyframes = np.flatnonzero(self.kinds == KEYFRAME)
+        if self.frame_count and (len(self.keyframes) == 0 or self.keyframes[0] != 0):
+            raise ValueError(f'{path} does not start with a keyframe')
+
+        self._values_per_frame = self.particles * self.modules * VALUES_PER_MODULE
+        self._decoded = None  # (frame index, int32 quantized values) of the last decoded frame
+
+    def __len__(self):
+        return self.frame_count
+
+    @property
+    def particles_per_island(self):
+        return self.particles // max(1, self.islands)
+
+    def _values(self, index):
+        """The stored values of a frame: absolute for keyframes, differences otherwise."""
+        offset = self.offsets[index] + FRAME_HEADER_DTYPE.itemsize + 4 * self.particles
+        dtype = np.int8 if self.kinds[index] == DELTA8 else np.dtype('<i2')
+        return np.frombuffer(self._data, dtype=dtype, count=self._values_per_frame, offset=int(offset))
+
+    def _quantized(self, index):
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f'Frame {index} is out of range (0-{self.frame_count - 1})')
+        keyframe = self.keyframes[np.searchsorted(self.keyframes, index, side='right') - 1]
+        if self._decoded is not None and keyframe <= self._decoded[0] <= index:
+            start, values = self._decoded
+            values = values.copy()
+        else:
+            start, values = keyframe, self._values(keyframe).astype(np.int32)
+        for frame in range(start + 1, index + 1):
+            values += self._values(frame)
+            # Yaw differences wrap around the half turn
+            np.mod(values[VALUES_PER_MODULE - 1::VALUES_PER_MODULE], self.yaw_steps,
+                   out=values[VALUES_PER_MODULE - 1::VALUES_PER_MODULE])
+        self._decoded = (index, values)
+        return values
+
+    def frame(self, index):
+        """
+        Decodes one frame.
+
+        Returns:
+            tuple: (positions, yaw, scores) of shapes (P, M, 3) in meters, (P, M) in radians
+            and (P,). Particles are ordered island by island; see scores() for NaN scores.
+        """
+        values = self._quantized(index).reshape(self.particles, self.modules, VALUES_PER_MODULE)
+        positions = (values[..., :3] * self.position_quantum).astype(np.float32)
+        yaw = (values[..., 3] * self.yaw_quantum).astype(np.float32)
+        return positions, yaw, self.scores(index)
+
+    def header(self, index):
+        """Returns a frame's kind, iteration and global best score."""
+        header = np.frombuffer(self._data, dtype=FRAME_HEADER_DTYPE, count=1, offset=int(self.offsets[index]))[0]
+        return int(header['kind']), int(header['iteration']), float(header['best_score'])
+
+    def scores(self, index=None):
+        """
+        Particle scores of one frame (P,), or of every frame (T, P). Layouts that surrogate
+        screening rejected were not evaluated and score NaN.
+        """
+        if index is not None:
+            offset = self.offsets[index] + FRAME_HEADER_DTYPE.itemsize
+            return np.frombuffer(self._data, dtype='<f4', count=self.particles, offset=int(offset))
+        return self._gather(FRAME_HEADER_DTYPE.itemsize, 4 * self.particles).view('<f4')
+
+    def best_scores(self):
+        """The global best score after every iteration, shape (T,)."""
+        return self._gather(FRAME_HEADER_DTYPE.fields['best_score'][1], 4).view('<f4').ravel()
+
+    def _gather(self, start, length):
+        """Reads the same byte range of every frame at once, as a (T, length) uint8 array."""
+        return np.ascontiguousarray(self._data[self.offsets[:, None] + start + np.arange(length)])
+
+    def island_of(self, particle):
+        return particle // self.particles_per_island
+
+    def compression_ratio(self):
+        """Size of the frames as float32 values over the size of the file."""
+        raw = self.frame_count * self.particles * (self.modules * VALUES_PER_MODULE + 1) * 4
+        return raw / max(1, len(self._data))